@@ -0,0 +1,150 @@
+"""
+Annual extrema benchmark
+
+Builds a synthetic multi-decade lake and times four ways of getting each year's
+min/max value and when it happened:
+
+    window ranking      the former vw_nwis_annual_stats_local: two row_number() windows
+                        over every reading, joined back to the grouped values
+    single pass (raw)   one arg_min/arg_max aggregation over every reading
+    refresh (full)      refresh_aggregates(full=True): readings -> daily -> annual tables
+    from daily tier     the annual aggregation over nwis_daily_stats alone
+
+Usage:
+    python benchmarks/annual_extrema.py [--sites N] [--years N] [--repeat N]
+"""
+import sys
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import duckdb
+
+# Add project root to python path so 'src' can be imported
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import synthetic_iv_table
+from src.database.aggregates import ANNUAL_FROM_DAILY_SQL, refresh_aggregates
+from src.etl.loaders import DataLakeLoader
+
+LOCAL_DATE = (
+    "CAST(CAST(read_ts AS TIMESTAMP) AT TIME ZONE 'UTC' AT TIME ZONE 'America/Denver' AS DATE)"
+)
+
+WINDOW_RANKING_SQL = f"""
+WITH ranked AS (
+    SELECT
+        site_cd, parameter_cd, year, value, approval_status,
+        {LOCAL_DATE} AS date_recorded_local,
+        row_number() OVER (
+            PARTITION BY site_cd, parameter_cd, year ORDER BY value
+        ) AS min_rank,
+        row_number() OVER (
+            PARTITION BY site_cd, parameter_cd, year ORDER BY value DESC
+        ) AS max_rank
+    FROM read_parquet(?)
+),
+min_dates AS (
+    SELECT site_cd, parameter_cd, year, date_recorded_local AS min_date
+    FROM ranked WHERE min_rank = 1
+),
+max_dates AS (
+    SELECT site_cd, parameter_cd, year, date_recorded_local AS max_date
+    FROM ranked WHERE max_rank = 1
+),
+aggregated AS (
+    SELECT site_cd, parameter_cd, year, approval_status,
+        min(value) AS min_value, max(value) AS max_value
+    FROM ranked
+    GROUP BY site_cd, parameter_cd, year, approval_status
+)
+SELECT a.*, md.min_date, mx.max_date
+FROM aggregated AS a
+LEFT JOIN min_dates AS md USING (site_cd, parameter_cd, year)
+LEFT JOIN max_dates AS mx USING (site_cd, parameter_cd, year)
+"""
+
+SINGLE_PASS_SQL = f"""
+SELECT
+    site_cd, parameter_cd, year, approval_status,
+    min(value) AS min_value,
+    max(value) AS max_value,
+    arg_min({LOCAL_DATE}, value) AS min_date,
+    arg_max({LOCAL_DATE}, value) AS max_date,
+    arg_min(read_ts, value) AS min_read_ts,
+    arg_max(read_ts, value) AS max_read_ts
+FROM read_parquet(?)
+GROUP BY site_cd, parameter_cd, year, approval_status
+"""
+
+
+def best_of(repeat: int, fn) -> float:
+    """Best wall time of ``repeat`` calls, in milliseconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark annual extrema queries')
+    parser.add_argument('--sites', type=int, default=2, help='Synthetic sites. Default: 2')
+    parser.add_argument('--years', type=int, default=30, help='Years per site. Default: 30')
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per variant. Default: 3')
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='annual_extrema_'))
+    datalake_root = work_dir / 'hydrology_datalake'
+    db_path = work_dir / 'hydrologic_data.duckdb'
+    try:
+        rows = 0
+        for i in range(args.sites):
+            site_code = f"0900{i:04d}"
+            table = synthetic_iv_table([site_code], start_year=2025 - args.years, end_year=2024)
+            DataLakeLoader(table, site_code, datalake_root, merge=False, db_path=db_path)
+            rows += table.num_rows
+        files = sorted(
+            path.as_posix() for path in datalake_root.glob('timeseries_iv/*/*/*.parquet')
+        )
+        print(f"{rows:,} rows, {args.sites} sites x {args.years} years of 15-minute data\n")
+
+        timings = {}
+        with duckdb.connect() as con:
+            timings['window ranking'] = best_of(
+                args.repeat, lambda: con.execute(WINDOW_RANKING_SQL, [files]).fetchall()
+            )
+            timings['single pass (raw)'] = best_of(
+                args.repeat, lambda: con.execute(SINGLE_PASS_SQL, [files]).fetchall()
+            )
+        timings['refresh (full)'] = best_of(
+            args.repeat, lambda: refresh_aggregates(datalake_root, db_path, full=True)
+        )
+
+        with duckdb.connect(str(db_path)) as con:
+            con.execute(
+                "CREATE TEMP TABLE stale_partition AS"
+                " SELECT DISTINCT site_cd, year FROM nwis_daily_stats"
+            )
+
+            def annual_from_daily():
+                con.execute("BEGIN TRANSACTION")
+                con.execute(ANNUAL_FROM_DAILY_SQL)
+                con.execute("ROLLBACK")
+
+            timings['from daily tier'] = best_of(args.repeat, annual_from_daily)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = timings['window ranking']
+    print(f"{'variant':<20}{'ms':>12}{'speedup':>10}")
+    print('-' * 42)
+    for name, ms in timings.items():
+        print(f"{name:<20}{ms:>12.1f}{baseline / ms:>9.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,148 @@
+"""
+daily_observations ingest benchmark
+
+Builds a throwaway database from sql/schema.sql with synthetic sites, parameters and
+site_parameter rows, then measures throughput in rows per second of:
+
+    row by row          key lookup through site/parameter/site_parameter and one INSERT
+                        per value, timed on a sample of the batch
+    bulk insert         DailyObservationsLoader into the empty table
+    bulk upsert         DailyObservationsLoader with every value changed
+    bulk no-op          DailyObservationsLoader with the same batch again
+
+Usage:
+    python benchmarks/daily_observations.py [--sites N] [--parameters N] [--years N]
+"""
+import sys
+import argparse
+import datetime as dt
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import duckdb
+import numpy as np
+import pyarrow as pa
+
+# Add project root to python path so 'src' can be imported
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from src.database.observations import DailyObservationsLoader
+
+
+def create_database(db_path: Path, site_count: int, parameter_count: int) -> None:
+    """Schema from sql/schema.sql plus synthetic metadata rows."""
+    sql_script = (PROJECT_ROOT / 'sql' / 'schema.sql').read_text()
+    with duckdb.connect(str(db_path)) as con:
+        for stmt in (stmt.strip() for stmt in sql_script.split(';')):
+            if stmt:
+                con.execute(stmt)
+        con.execute("INSERT INTO source VALUES (1, 'USGS', 'USGS', 'NWIS', 'NWIS', NULL, NULL,"
+                    " DEFAULT, DEFAULT)")
+        con.execute(f"""
+            INSERT INTO site (site_id, site_cd, site_nm, hydro_area_cd, hydro_area_nm, source_id)
+            SELECT i, printf('09%06d', i), 'site ' || i, 'UC', 'Upper Colorado', 1
+            FROM range(1, {site_count + 1}) AS t (i)
+        """)
+        con.execute(f"""
+            INSERT INTO parameter (parameter_id, parameter_cd, parameter_nm, unit_cd, unit_nm)
+            SELECT i, printf('%05d', i), 'parameter ' || i, 'u', 'unit'
+            FROM range(1, {parameter_count + 1}) AS t (i)
+        """)
+        con.execute(f"""
+            INSERT INTO site_parameter (site_parameter_id, site_id, parameter_id)
+            SELECT (s.i - 1) * {parameter_count} + p.i, s.i, p.i
+            FROM range(1, {site_count + 1}) AS s (i), range(1, {parameter_count + 1}) AS p (i)
+        """)
+
+
+def daily_batch(site_count: int, parameter_count: int, years: int, seed: int = 0) -> pa.Table:
+    """One value per site, parameter and day."""
+    days = np.arange(
+        np.datetime64(dt.date(2025 - years, 1, 1)), np.datetime64(dt.date(2025, 1, 1))
+    )
+    series = site_count * parameter_count
+    site_cds = np.array([f"09{i:06d}" for i in range(1, site_count + 1)])
+    parameter_cds = np.array([f"{i:05d}" for i in range(1, parameter_count + 1)])
+    return pa.table({
+        'site_cd': np.repeat(np.repeat(site_cds, parameter_count), len(days)),
+        'parameter_cd': np.repeat(np.tile(parameter_cds, site_count), len(days)),
+        'read_dt': np.tile(days, series),
+        'value': np.random.default_rng(seed).uniform(0, 5000, series * len(days)).round(3),
+    })
+
+
+def row_by_row(db_path: Path, batch: pa.Table) -> None:
+    """Per-row key lookup and insert, the way fetch_site_parameters resolves keys."""
+    with duckdb.connect(str(db_path)) as con:
+        for row in batch.to_pylist():
+            site_parameter_id = con.execute(
+                "SELECT sp.site_parameter_id FROM site_parameter AS sp"
+                " INNER JOIN site AS s ON s.site_id = sp.site_id"
+                " INNER JOIN parameter AS p ON p.parameter_id = sp.parameter_id"
+                " WHERE s.site_cd = ? AND p.parameter_cd = ?",
+                [row['site_cd'], row['parameter_cd']]
+            ).fetchone()[0]
+            con.execute(
+                "INSERT INTO daily_observations (site_parameter_id, read_dt, value)"
+                " VALUES (?, ?, ?)",
+                [site_parameter_id, row['read_dt'], row['value']]
+            )
+
+
+def rows_per_second(rows: int, fn) -> float:
+    start = time.perf_counter()
+    fn()
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark daily_observations ingest')
+    parser.add_argument('--sites', type=int, default=100, help='Synthetic sites. Default: 100')
+    parser.add_argument('--parameters', type=int, default=4, help='Parameters per site. Default: 4')
+    parser.add_argument('--years', type=int, default=20, help='Years of daily values. Default: 20')
+    parser.add_argument('--sample', type=int, default=2000,
+                        help='Rows timed for the row-by-row variant. Default: 2000')
+    args = parser.parse_args()
+
+    work_dir = Path(tempfile.mkdtemp(prefix='daily_observations_'))
+    try:
+        batch = daily_batch(args.sites, args.parameters, args.years)
+        changed = batch.set_column(3, 'value', daily_batch(
+            args.sites, args.parameters, args.years, seed=1
+        )['value'])
+        print(f"{batch.num_rows:,} daily values, {args.sites} sites x {args.parameters}"
+              f" parameters x {args.years} years\n")
+
+        sample_db = work_dir / 'row_by_row.duckdb'
+        create_database(sample_db, args.sites, args.parameters)
+        db_path = work_dir / 'bulk.duckdb'
+        create_database(db_path, args.sites, args.parameters)
+
+        throughput = {
+            'row by row': rows_per_second(
+                args.sample, lambda: row_by_row(sample_db, batch.slice(0, args.sample))
+            ),
+            'bulk insert': rows_per_second(
+                batch.num_rows, lambda: DailyObservationsLoader(batch, db_path)
+            ),
+            'bulk upsert': rows_per_second(
+                batch.num_rows, lambda: DailyObservationsLoader(changed, db_path)
+            ),
+            'bulk no-op': rows_per_second(
+                batch.num_rows, lambda: DailyObservationsLoader(changed, db_path)
+            ),
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    baseline = throughput['row by row']
+    print(f"{'variant':<14}{'rows/s':>14}{'speedup':>10}")
+    print('-' * 38)
+    for name, rate in throughput.items():
+        print(f"{name:<14}{rate:>14,.0f}{rate / baseline:>9.0f}x")
+
+
+if __name__ == '__main__':
+    main()
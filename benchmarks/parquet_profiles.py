@@ -0,0 +1,115 @@
+"""
+Parquet write profile benchmark
+
+Writes the same synthetic 15-minute dataset with every write profile in
+src.etl.loaders.WRITE_PROFILES, plus the previous layout (time-sorted, DuckDB default
+options) as a baseline, and reports on-disk size, write time and scan times for a full
+scan, a single-parameter scan and a one-month, single-parameter scan.
+
+Usage:
+    python benchmarks/parquet_profiles.py [--sites N] [--years N] [--repeat N]
+"""
+import sys
+import argparse
+import shutil
+import tempfile
+import time
+from pathlib import Path
+import duckdb
+
+# Add project root to python path so 'src' can be imported
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import synthetic_iv_table
+from src.etl.loaders import WRITE_PROFILES, DataLakeLoader
+
+QUERIES = {
+    'full scan': "SELECT count(*), sum(value) FROM read_parquet(?)",
+    'one parameter': (
+        "SELECT count(*), sum(value) FROM read_parquet(?) WHERE parameter_cd = '00065'"
+    ),
+    'one month': (
+        "SELECT count(*), sum(value) FROM read_parquet(?) WHERE parameter_cd = '00065'"
+        " AND read_ts >= TIMESTAMP '2020-07-01' AND read_ts < TIMESTAMP '2020-08-01'"
+    ),
+}
+
+
+def write_baseline(table, datalake_root: Path) -> None:
+    """The layout written before write profiles existed."""
+    site_code = table['site_cd'][0].as_py()
+    (datalake_root / 'timeseries_iv').mkdir(parents=True, exist_ok=True)
+    with duckdb.connect() as con:
+        con.register('data', table)
+        con.execute(
+            "COPY (SELECT * FROM data ORDER BY read_ts)"
+            f" TO '{(datalake_root / 'timeseries_iv' / f'site={site_code}').as_posix()}'"
+            " (FORMAT PARQUET, PARTITION_BY (year), WRITE_PARTITION_COLUMNS true)"
+        )
+
+
+def time_queries(files, repeat: int) -> dict:
+    """Best-of-``repeat`` wall time for each query, in milliseconds."""
+    timings = {}
+    with duckdb.connect() as con:
+        for name, query in QUERIES.items():
+            best = float('inf')
+            for _ in range(repeat):
+                start = time.perf_counter()
+                con.execute(query, [files]).fetchall()
+                best = min(best, time.perf_counter() - start)
+            timings[name] = best * 1000
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark parquet write profiles')
+    parser.add_argument('--sites', type=int, default=4, help='Synthetic sites. Default: 4')
+    parser.add_argument('--years', type=int, default=10, help='Years per site. Default: 10')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per query. Default: 5')
+    args = parser.parse_args()
+
+    site_codes = [f"0900{i:04d}" for i in range(args.sites)]
+    tables = {
+        site_code: synthetic_iv_table([site_code], start_year=2025 - args.years, end_year=2024)
+        for site_code in site_codes
+    }
+    rows = sum(table.num_rows for table in tables.values())
+    print(f"{rows:,} rows, {args.sites} sites x {args.years} years of 15-minute data\n")
+
+    work_dir = Path(tempfile.mkdtemp(prefix='parquet_profiles_'))
+    results = []
+    try:
+        for profile in ['baseline'] + list(WRITE_PROFILES):
+            datalake_root = work_dir / profile
+            start = time.perf_counter()
+            for site_code, table in tables.items():
+                if profile == 'baseline':
+                    write_baseline(table, datalake_root)
+                else:
+                    DataLakeLoader(
+                        table, site_code, datalake_root, merge=False, db_path=None, profile=profile
+                    )
+            write_s = time.perf_counter() - start
+
+            files = sorted(
+                path.as_posix() for path in datalake_root.glob('timeseries_iv/*/*/*.parquet')
+            )
+            size_mb = sum(Path(path).stat().st_size for path in files) / 1024 ** 2
+            results.append((profile, size_mb, write_s, time_queries(files, args.repeat)))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    header = f"{'profile':<10}{'size MB':>10}{'write s':>10}"
+    header += ''.join(f"{name + ' ms':>18}" for name in QUERIES)
+    print(header)
+    print('-' * len(header))
+    for profile, size_mb, write_s, timings in results:
+        line = f"{profile:<10}{size_mb:>10.1f}{write_s:>10.2f}"
+        line += ''.join(f"{timings[name]:>18.1f}" for name in QUERIES)
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
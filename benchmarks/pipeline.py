@@ -0,0 +1,254 @@
+"""
+End-to-end pipeline benchmark
+
+Generates raw frames shaped like nwis.get_record() responses (15-minute readings over
+several decades, several parameters per site, approved and provisional qualifiers, gauge
+outages and sensor gaps) and times every stage of the extract -> transform -> load ->
+query path on them:
+
+    transform           NWISTransformer, one call per site and parameter
+    transform multi     NWISMultiTransformer, one call per site
+    load                DataLakeLoader into an empty lake, recording the manifest
+    reload              DataLakeLoader of the same data again (merge, nothing changes)
+    aggregates          refresh_aggregates of the new partitions
+    views               create_views, then a full read of every view in sql/views.sql
+
+Each stage reports rows per second, wall time, the peak resident set size (RSS) of
+the process during the stage and the bytes it produced. Results are written as JSON
+together with the git commit, so runs on different commits can be compared with
+--compare.
+
+Usage:
+    python benchmarks/pipeline.py [--sites N] [--parameters N] [--years N]
+                                  [--output PATH] [--compare PATH]
+"""
+import sys
+import argparse
+import datetime as dt
+import json
+import platform
+import shutil
+import subprocess
+import tempfile
+from pathlib import Path
+import duckdb
+import pyarrow as pa
+
+# Add project root to python path so 'src' can be imported
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from benchmarks.synthetic import DEFAULT_PARAMETERS, synthetic_nwis_frame
+from src.database.aggregates import refresh_aggregates
+from src.database.views import create_views, render_views
+from src.etl.loaders import DataLakeLoader
+from src.etl.metrics import RunMetrics
+from src.etl.transformers import NWISMultiTransformer, NWISTransformer
+
+RESULTS_DIR = PROJECT_ROOT / 'benchmarks' / 'results'
+
+
+class Stage:
+    """
+    Accumulated wall time, peak RSS and output of one pipeline stage, measured with
+    RunMetrics.stage as in the ETL runs.
+    """
+
+    def __init__(self, name: str, metrics: RunMetrics):
+        self.name = name
+        self.metrics = metrics
+        self.seconds = 0.0
+        self.rows = 0
+        self.output_bytes = 0
+        self.peak_rss = 0
+
+    def run(self, rows: int, fn):
+        """Time one call of ``fn`` that processes ``rows`` readings and return its result."""
+        with self.metrics.stage(self.name) as metric:
+            result = fn()
+        self.seconds += metric.seconds
+        self.rows += rows
+        self.peak_rss = max(self.peak_rss, metric.peak_rss or 0)
+        return result
+
+    def as_dict(self) -> dict:
+        return {
+            'rows': self.rows,
+            'seconds': round(self.seconds, 4),
+            'rows_per_second': round(self.rows / self.seconds) if self.seconds else None,
+            'peak_rss_bytes': self.peak_rss,
+            'output_bytes': self.output_bytes,
+        }
+
+
+def create_database(db_path: Path, site_codes, parameter_codes) -> None:
+    """Schema from sql/schema.sql plus the site and parameter rows the views join to."""
+    sql_script = (PROJECT_ROOT / 'sql' / 'schema.sql').read_text()
+    with duckdb.connect(str(db_path)) as con:
+        for stmt in (stmt.strip() for stmt in sql_script.split(';')):
+            if stmt:
+                con.execute(stmt)
+        con.execute("INSERT INTO source VALUES (1, 'USGS', 'USGS', 'NWIS', 'NWIS', NULL, NULL,"
+                    " DEFAULT, DEFAULT)")
+        for i, site_code in enumerate(site_codes, start=1):
+            con.execute(
+                "INSERT INTO site (site_id, site_cd, site_nm, hydro_area_cd, hydro_area_nm,"
+                " source_id) VALUES (?, ?, ?, 'UC', 'Upper Colorado', 1)",
+                [i, site_code, f"site {site_code}"]
+            )
+        for i, parameter_code in enumerate(parameter_codes, start=1):
+            con.execute(
+                "INSERT INTO parameter (parameter_id, parameter_cd, parameter_nm, unit_cd, unit_nm)"
+                " VALUES (?, ?, ?, 'u', 'unit')",
+                [i, parameter_code, f"parameter {parameter_code}"]
+            )
+
+
+def run_pipeline(args, work_dir: Path) -> dict:
+    """Run every stage over the synthetic sites and return the stage results."""
+    site_codes = [f"09{i:06d}" for i in range(1, args.sites + 1)]
+    parameter_codes = DEFAULT_PARAMETERS[:args.parameters]
+    datalake_root = work_dir / 'lake'
+    db_path = work_dir / 'bench.duckdb'
+    create_database(db_path, site_codes, parameter_codes)
+
+    # Sampled more often than in ETL runs, since a stage call can take milliseconds
+    metrics = RunMetrics('benchmark', sample_interval=0.005)
+    stages = {name: Stage(name, metrics) for name in (
+        'transform', 'transform multi', 'load', 'reload', 'aggregates', 'views'
+    )}
+    readings = 0
+    for i, site_code in enumerate(site_codes):
+        # One site at a time, as initial_load.py streams them
+        frame = synthetic_nwis_frame(
+            site_code, parameter_codes, args.start_year, args.start_year + args.years - 1,
+            seed=i
+        )
+        rows = int(frame[parameter_codes].notna().sum().sum())
+        readings += rows
+
+        for parameter_code in parameter_codes:
+            single = frame[['site_no', parameter_code, f"{parameter_code}_cd"]]
+            result = stages['transform'].run(
+                int(single[parameter_code].notna().sum()),
+                lambda: NWISTransformer(single, site_code, parameter_code)
+            )
+            stages['transform'].output_bytes += int(result.memory_usage(deep=True).sum())
+
+        table = stages['transform multi'].run(
+            rows, lambda: NWISMultiTransformer(frame, site_code, parameter_codes)
+        )
+        stages['transform multi'].output_bytes += table.nbytes
+
+        written = stages['load'].run(
+            rows, lambda: DataLakeLoader(table, site_code, datalake_root, db_path=db_path)
+        )
+        stages['load'].output_bytes += sum(path.stat().st_size for path in written)
+
+        written = stages['reload'].run(
+            rows, lambda: DataLakeLoader(table, site_code, datalake_root, db_path=db_path)
+        )
+        stages['reload'].output_bytes += sum(path.stat().st_size for path in written)
+
+    size_before = db_path.stat().st_size
+    stages['aggregates'].run(readings, lambda: refresh_aggregates(datalake_root, db_path))
+    stages['aggregates'].output_bytes = max(0, db_path.stat().st_size - size_before)
+
+    def read_views() -> int:
+        create_views(datalake_root, db_path)
+        view_names = [stmt.split(' AS', 1)[0].split()[-1] for stmt in render_views(datalake_root)]
+        result_bytes = 0
+        with duckdb.connect(str(db_path), read_only=True) as con:
+            for view_name in view_names:
+                result_bytes += con.execute(f"SELECT * FROM {view_name}").arrow().nbytes
+        return result_bytes
+
+    stages['views'].output_bytes = stages['views'].run(readings, read_views)
+    return {name: stage.as_dict() for name, stage in stages.items()}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=PROJECT_ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def print_results(results: dict, baseline: dict = None) -> None:
+    header = f"{'stage':<16}{'rows/s':>14}{'seconds':>10}{'peak RSS MB':>13}{'output MB':>11}"
+    if baseline:
+        header += f"{'vs ' + baseline['commit']:>14}"
+    print(header)
+    print('-' * len(header))
+    for name, stage in results['stages'].items():
+        line = (
+            f"{name:<16}{stage['rows_per_second'] or 0:>14,}{stage['seconds']:>10.2f}"
+            f"{stage['peak_rss_bytes'] / 1024 ** 2:>13,.0f}"
+            f"{stage['output_bytes'] / 1024 ** 2:>11,.1f}"
+        )
+        before = (baseline or {}).get('stages', {}).get(name, {}).get('rows_per_second')
+        if baseline:
+            change = f"{(stage['rows_per_second'] or 0) / before - 1:+.1%}" if before else 'n/a'
+            line += f"{change:>14}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the NWIS ETL pipeline end to end')
+    parser.add_argument('--sites', type=int, default=2, help='Synthetic sites. Default: 2')
+    parser.add_argument('--parameters', type=int, default=4,
+                        help=f"Parameters per site, at most {len(DEFAULT_PARAMETERS)}. Default: 4")
+    parser.add_argument('--years', type=int, default=30, help='Years per site. Default: 30')
+    parser.add_argument('--start-year', type=int, default=1995, help='First year. Default: 1995')
+    parser.add_argument('--output', type=Path, default=None,
+                        help='JSON results file. Default: benchmarks/results/pipeline-<commit>-'
+                             '<timestamp>.json')
+    parser.add_argument('--compare', type=Path, default=None,
+                        help='Earlier JSON results to compare rows/s against')
+    args = parser.parse_args()
+
+    commit = git_commit()
+    work_dir = Path(tempfile.mkdtemp(prefix='pipeline_bench_'))
+    try:
+        stages = run_pipeline(args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    run_ts = dt.datetime.now()
+    results = {
+        'benchmark': 'pipeline',
+        'commit': commit,
+        'run_ts': run_ts.isoformat(timespec='seconds'),
+        'parameters': {
+            'sites': args.sites,
+            'parameters': args.parameters,
+            'years': args.years,
+            'start_year': args.start_year,
+        },
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'duckdb': duckdb.__version__,
+            'pyarrow': pa.__version__,
+        },
+        'stages': stages,
+    }
+
+    output = args.output or RESULTS_DIR / f"pipeline-{commit}-{run_ts:%Y%m%d-%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as file:
+        json.dump(results, file, indent=2)
+
+    baseline = None
+    if args.compare is not None:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)
+    print_results(results, baseline)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""
+Synthetic NWIS 'iv' data for benchmarks.
+
+Generates transformed rows (the layout NWISMultiTransformer produces) for any number of
+sites, parameters and years at a fixed reading interval, or raw frames shaped like
+nwis.get_record() responses with gaps and qualifiers. Values follow a seasonal cycle
+with a random walk and are rounded like real gauge readings, so they compress like
+real data. Readings before ``provisional_from`` are approved ('A'), later ones provisional.
+"""
+import datetime as dt
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+DEFAULT_PARAMETERS = ['00060', '00065', '00010', '00095']
+
+
+def synthetic_iv_table(
+        site_codes: List[str],
+        parameter_codes: Optional[List[str]] = None,
+        start_year: int = 2015,
+        end_year: int = 2024,
+        freq_minutes: int = 15,
+        provisional_from: Optional[dt.datetime] = None,
+        seed: int = 0
+        ) -> pa.Table:
+    """
+    Build a synthetic transformed table.
+
+    Parameters:
+        site_codes          : Site numbers to generate
+        parameter_codes     : Parameter codes per site. Default: DEFAULT_PARAMETERS
+        start_year          : First calendar year (UTC)
+        end_year            : Last calendar year (UTC), inclusive
+        freq_minutes        : Minutes between readings
+        provisional_from    : Readings at or after this UTC time are provisional.
+                              Default: the last 60 days of the range
+        seed                : Random seed
+    Returns:
+        pa.Table: Columns site_cd, read_ts, parameter_cd, value, approval_status, year.
+    """
+    parameter_codes = parameter_codes or DEFAULT_PARAMETERS
+    rng = np.random.default_rng(seed)
+
+    read_ts = _time_axis(start_year, end_year, freq_minutes)
+    n = len(read_ts)
+    if provisional_from is None:
+        provisional_from = dt.datetime(end_year + 1, 1, 1) - dt.timedelta(days=60)
+    provisional = read_ts >= np.datetime64(provisional_from)
+    years = read_ts.astype('datetime64[Y]').astype(np.int64) + 1970
+    season = _season(read_ts)
+
+    tables = []
+    for site_code in site_codes:
+        for i, parameter_code in enumerate(parameter_codes):
+            tables.append(pa.table({
+                'site_cd': pa.array(np.full(n, site_code)),
+                'read_ts': pa.array(read_ts),
+                'parameter_cd': pa.array(np.full(n, parameter_code)),
+                'value': pa.array(_values(rng, season, i)),
+                'approval_status': pa.array(np.where(provisional, 'P', 'A')),
+                'year': pa.array(years),
+            }))
+    return pa.concat_tables(tables)
+
+
+def synthetic_nwis_frame(
+        site_code: str,
+        parameter_codes: Optional[List[str]] = None,
+        start_year: int = 1995,
+        end_year: int = 2024,
+        freq_minutes: int = 15,
+        provisional_from: Optional[dt.datetime] = None,
+        outage_fraction: float = 0.02,
+        sensor_gap_fraction: float = 0.01,
+        estimated_fraction: float = 0.005,
+        seed: int = 0
+        ) -> pd.DataFrame:
+    """
+    Build a raw frame shaped like ``nwis.get_record(service='iv')`` for one site and
+    several parameters: a UTC 'datetime' index, a 'site_no' column, and one value and
+    one '_cd' qualifier column per parameter.
+
+    Gauge outages drop whole rows (about ``outage_fraction`` of the record, in runs of up
+    to two weeks), sensor gaps leave a single parameter empty for a run of readings, and
+    a few approved readings are qualified as estimated ('A, e'), like real responses.
+
+    Parameters:
+        site_code           : Site number
+        parameter_codes     : Parameter codes. Default: DEFAULT_PARAMETERS
+        start_year          : First calendar year (UTC)
+        end_year            : Last calendar year (UTC), inclusive
+        freq_minutes        : Minutes between readings
+        provisional_from    : Readings at or after this UTC time are provisional ('P').
+                              Default: the last 60 days of the range
+        outage_fraction     : Share of readings removed by gauge outages
+        sensor_gap_fraction : Share of each parameter's readings left empty
+        estimated_fraction  : Share of approved readings qualified 'A, e'
+        seed                : Random seed
+    Returns:
+        pd.DataFrame: Raw 'iv' frame, e.g. for NWISTransformer or NWISMultiTransformer.
+    """
+    parameter_codes = parameter_codes or DEFAULT_PARAMETERS
+    rng = np.random.default_rng(seed)
+
+    read_ts = _time_axis(start_year, end_year, freq_minutes)
+    n = len(read_ts)
+    if provisional_from is None:
+        provisional_from = dt.datetime(end_year + 1, 1, 1) - dt.timedelta(days=60)
+    provisional = read_ts >= np.datetime64(provisional_from)
+    season = _season(read_ts)
+    max_run = 14 * 24 * 60 // freq_minutes
+
+    columns = {'site_no': np.full(n, site_code)}
+    for i, parameter_code in enumerate(parameter_codes):
+        value = _values(rng, season, i)
+        value[_gap_mask(rng, n, sensor_gap_fraction, max_run)] = np.nan
+        qualifier = np.where(provisional, 'P', 'A').astype(object)
+        qualifier[~provisional & (rng.random(n) < estimated_fraction)] = 'A, e'
+        columns[parameter_code] = value
+        columns[f"{parameter_code}_cd"] = qualifier
+
+    keep = ~_gap_mask(rng, n, outage_fraction, max_run)
+    index = pd.DatetimeIndex(read_ts[keep], name='datetime').tz_localize('UTC')
+    return pd.DataFrame({name: column[keep] for name, column in columns.items()}, index=index)
+
+
+def _time_axis(start_year: int, end_year: int, freq_minutes: int) -> np.ndarray:
+    """Reading times (naive UTC) from the start of ``start_year`` through ``end_year``."""
+    return np.arange(
+        np.datetime64(f"{start_year}-01-01"),
+        np.datetime64(f"{end_year + 1}-01-01"),
+        np.timedelta64(freq_minutes, 'm')
+    ).astype('datetime64[ns]')
+
+
+def _season(read_ts: np.ndarray) -> np.ndarray:
+    day_of_year = (read_ts - read_ts.astype('datetime64[Y]')) / np.timedelta64(1, 'D')
+    return np.sin(2 * np.pi * day_of_year / 365.25)
+
+
+def _values(rng: np.random.Generator, season: np.ndarray, parameter_index: int) -> np.ndarray:
+    """Seasonal cycle plus a random walk, scaled per parameter and rounded like readings."""
+    level = 10.0 ** (parameter_index % 3 + 1)
+    walk = np.cumsum(rng.normal(0, 0.002, len(season)))
+    return np.round(level * (1.5 + season + walk - walk.mean()), 2)
+
+
+def _gap_mask(rng: np.random.Generator, n: int, fraction: float, max_run: int) -> np.ndarray:
+    """Boolean mask covering about ``fraction`` of ``n`` readings in random runs."""
+    mask = np.zeros(n, dtype=bool)
+    if fraction <= 0 or n == 0:
+        return mask
+    run_count = max(1, int(fraction * n / (max_run / 2)))
+    starts = rng.integers(0, n, run_count)
+    lengths = rng.integers(1, max_run + 1, run_count)
+    for start, length in zip(starts, lengths):
+        mask[start:start + length] = True
+    return mask
@@ -1,14 +1,17 @@
-import database.connection as db
-import src.utils.fetch_data as fd
-import pandas as pd
+import src.database.connection as db
 import logging
 import os
 import datetime as dt
 
-from etl.transformers import transform_nwis_iv_data
-from src.utils.write_to_datalake import write_to_datalake
+from src.etl.extractors import NWISExtractor
+from src.etl.transformers import NWISMultiTransformer
+from src.etl.loaders import DataLakeLoader
+from src.etl.scheduler import FetchTask, fetch_concurrently
 # from collections import namedtuple
 
+MAX_WORKERS = 4             # Concurrent NWIS requests
+REQUESTS_PER_SECOND = None  # Per-host rate limit, None for unlimited
+
 
 def main():
 
@@ -32,38 +35,39 @@ def main():
 
     logging.info(f"Fetched {len(site_info)} site codes from DuckDB.")
 
-    # Loop through sites and parameters and fetch data
-    for site_id, site_code in site_info:
-        logging.info(f"Fetching data for site {site_code}")
-        all_data = []
-        parameter_codes = fd.fetch_site_parameters(site_id)
-        if not parameter_codes:
-            logging.warning(
-                f"No parameters found for site {site_code} (site_id={site_id}). Skipping."
-                )
-            continue
-
-        for parameter_code in parameter_codes:
-            logging.info(f"  Fetching parameter {parameter_code}")
-            try:
-                df = fd.fetch_nwis_data(site_code, parameter_code, start_date, end_date)
-                if df is None or df.empty:
-                    logging.warning(
-                        f"No data found for site {site_code} with parameter {parameter_code}."
-                        )
-                    continue
-                df = transform_nwis_iv_data(df, site_code, parameter_code)
-            except Exception as e:
-                logging.error(
-                    f"Error processing site {site_code} and parameter {parameter_code}: {e}"
+    # Build one fetch task per site, requesting all of its parameters at once
+    def fetch_tasks():
+        for site_id, site_code in site_info:
+            parameter_codes = db.fetch_site_parameters(site_id)
+            if not parameter_codes:
+                logging.warning(
+                    f"No parameters found for site {site_code} (site_id={site_id}). Skipping."
                     )
                 continue
-            if df is not None and not df.empty:
-                all_data.append(df)
-        if all_data:
-            df_combined = pd.concat(all_data, ignore_index=True)
-            write_to_datalake(df_combined, site_code)
-            logging.info(f"Combined data for site {site_code} successfully written to datalake.")
+            yield FetchTask(site_code, parameter_codes, start_date, end_date)
+
+    results = fetch_concurrently(
+        fetch_tasks(),
+        fetch_fn=NWISExtractor,
+        max_workers=MAX_WORKERS,
+        requests_per_second=REQUESTS_PER_SECOND
+        )
+
+    # Results come back in submission order
+    for task, df in results:
+        site_code = task.site_code
+        logging.info(f"Processing data for site {site_code}")
+        try:
+            if df is None or df.empty:
+                logging.warning(f"No data found for site {site_code}.")
+                continue
+            df = NWISMultiTransformer(df, site_code, task.parameter_code)
+        except Exception as e:
+            logging.error(f"Error processing site {site_code}: {e}")
+            continue
+        if df is not None and df.num_rows:
+            DataLakeLoader(df, site_code)
+            logging.info(f"Data for site {site_code} successfully written to datalake.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+"""
+Data Lake Compaction Script
+
+This script rewrites timeseries_iv partitions that hold more than one parquet file, or a
+file in an outdated layout, as a single sorted data.parquet in the partition's write
+profile. Leftover staging directories from killed loads are removed. File counts, size
+and scan times of the lake are reported before and after.
+
+Usage:
+    python scripts/compact_lake.py [--sites SITE ...] [--profile archive|hot] [--dry-run]
+"""
+import sys
+import argparse
+import logging
+import time
+import datetime as dt
+from pathlib import Path
+import duckdb
+
+# Add project root's parent to python path so 'src' can be imported
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from src.etl.compaction import LakeCompactor
+from src.etl.loaders import DEFAULT_DATALAKE_PATH, WRITE_PROFILES
+from src.utils.logging_config import setup_logging
+
+SCAN_QUERY = "SELECT parameter_cd, count(*), avg(value) FROM read_parquet(?) GROUP BY 1"
+
+
+def lake_stats(datalake_root: Path) -> dict:
+    """File count, size and best-of-three full scan time of the timeseries_iv tier."""
+    tier_path = datalake_root / 'timeseries_iv'
+    files = [path.as_posix() for path in tier_path.glob('site=*/year=*/*.parquet')]
+    stats = {
+        'files': len(files),
+        'mb': sum(Path(path).stat().st_size for path in files) / 1024 ** 2,
+        'scan_ms': 0.0
+    }
+    if files:
+        with duckdb.connect() as con:
+            best = float('inf')
+            for _ in range(3):
+                start = time.perf_counter()
+                con.execute(SCAN_QUERY, [files]).fetchall()
+                best = min(best, time.perf_counter() - start)
+        stats['scan_ms'] = best * 1000
+    return stats
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Compact the timeseries_iv data lake for UCPO Water Data System',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    # Compact every partition that needs it
+    python scripts/compact_lake.py
+
+    # Show what would be compacted
+    python scripts/compact_lake.py --dry-run
+
+    # Rewrite two sites with the archive profile
+    python scripts/compact_lake.py --sites 09380000 09180500 --profile archive
+        """
+    )
+
+    parser.add_argument(
+        '--sites',
+        nargs='+',
+        default=None,
+        help='Only compact these site numbers. Default: all sites'
+    )
+
+    parser.add_argument(
+        '--profile',
+        choices=list(WRITE_PROFILES),
+        default=None,
+        help='Write profile for every partition. Default: hot for the current year, else archive'
+    )
+
+    parser.add_argument(
+        '--staging-max-age-hours',
+        type=float,
+        default=24.0,
+        help='Delete loader staging directories older than this. Default: 24'
+    )
+
+    parser.add_argument(
+        '--dry-run',
+        action='store_true',
+        help='Only report the partitions that would be compacted'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    print("🚀 UCPO Water Data System - Lake Compaction")
+    print("=" * 50)
+
+    args = parse_arguments()
+
+    run_ts = dt.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    log_file = PROJECT_ROOT / 'logs' / f"compact_lake_{run_ts}.log"
+    setup_logging(level=logging.INFO, log_to_file=True, log_file_path=log_file)
+
+    try:
+        before = lake_stats(DEFAULT_DATALAKE_PATH)
+        report = LakeCompactor(
+            DEFAULT_DATALAKE_PATH,
+            site_codes=args.sites,
+            profile=args.profile,
+            dry_run=args.dry_run,
+            staging_max_age_hours=args.staging_max_age_hours
+        )
+        after = lake_stats(DEFAULT_DATALAKE_PATH)
+
+        logging.info("📊 COMPACTION SUMMARY REPORT")
+        logging.info("=" * 50)
+        logging.info(f"🔍 Partitions checked: {report['partitions_checked']}")
+        logging.info(f"🗜️ Partitions compacted: {report['partitions_compacted']}")
+        logging.info(f"🗑️ Files removed: {report['files_removed']}")
+        logging.info(f"🧹 Staging directories removed: {report['staging_removed']}")
+        for label, stats in (('Before', before), ('After', after)):
+            logging.info(
+                f"📂 {label}: {stats['files']} files, {stats['mb']:,.1f} MB,"
+                f" full scan {stats['scan_ms']:,.0f} ms"
+            )
+
+        print("\n🎉 Compaction completed successfully!")
+
+    except KeyboardInterrupt:
+        logging.warning("⚠️ Compaction interrupted by user")
+        print("\n⚠️ Compaction interrupted")
+        sys.exit(1)
+
+    except Exception as e:
+        logging.error(f"💥 Fatal error in compaction: {e}")
+        print(f"\n💥 Fatal error: {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,417 @@
+"""
+Daily Update Script
+
+This script performs an incremental update of the data lake. For every site and parameter
+already in the lake it requests only the data since the series' high-water mark (or since
+its earliest provisional reading, which USGS may still revise) and rewrites only the
+year partitions whose contents the new data changes.
+
+Series that are configured but not yet in the lake are skipped; run initial_load.py for those.
+
+Usage:
+    python scripts/daily_update.py [--end-date YYYY-MM-DD] [--lookback-days N]
+"""
+import sys
+import argparse
+import logging
+import datetime as dt
+from functools import partial
+from itertools import groupby
+from pathlib import Path
+import pyarrow as pa
+
+# Add project root's parent to python path so 'src' can be imported
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(PROJECT_ROOT))
+
+from src.database.aggregates import refresh_aggregates
+from src.database.connection import connect_duckdb, fetch_site_parameters
+from src.database.observations import daily_high_water_marks
+from src.etl.daily_values import NWISDailyLoader, daily_fetch_tasks
+from src.etl.extractors import (
+    CBRFC_HOST,
+    CBRFCExtractor,
+    NWISExtractor,
+    fetch_high_water_marks
+)
+from src.etl.forecasts import CBRFCLoader, cbrfc_fetch_tasks
+from src.etl.transformers import NWISMultiTransformer
+from src.etl.loaders import DataLakeLoader, DEFAULT_DATALAKE_PATH
+from src.etl.metrics import RunMetrics, file_bytes
+from src.etl.resilience import DeadLetterQueue, ResilientFetcher, RetryBudget
+from src.etl.scheduler import NWIS_HOST, FetchTask, fetch_concurrently, get_rate_limiter
+from src.utils.logging_config import setup_logging
+
+
+class DailyDataUpdater:
+    """Class to handle the incremental update process."""
+
+    def __init__(
+            self,
+            end_date: str,
+            lookback_days: int = 1,
+            max_workers: int = 4,
+            requests_per_second: float = None,
+            datalake_root: Path = DEFAULT_DATALAKE_PATH,
+            metrics: RunMetrics = None
+            ):
+        self.end_date = end_date
+        self.lookback_days = lookback_days
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.datalake_root = Path(datalake_root)
+
+        # Per-stage time, rows, bytes, retries and memory of the run
+        self.metrics = metrics or RunMetrics()
+
+        # Failed requests go to the same dead-letter list initial_load.py --retry-failed reads
+        self.dead_letter = DeadLetterQueue()
+        limiter = get_rate_limiter(NWIS_HOST, requests_per_second) if requests_per_second else None
+        self.fetcher = ResilientFetcher(
+            partial(NWISExtractor, raise_errors=True),
+            budget=RetryBudget(),
+            dead_letter=self.dead_letter,
+            rate_limiter=limiter
+        )
+        self.forecast_fetcher = ResilientFetcher(
+            partial(CBRFCExtractor, raise_errors=True),
+            budget=self.fetcher.budget,
+            dead_letter=DeadLetterQueue(self.dead_letter.path.with_name('cbrfc.jsonl')),
+            host=CBRFC_HOST
+        )
+
+        # Statistics
+        self.sites_processed = 0
+        self.sites_failed = 0
+        self.series_skipped = 0
+        self.partitions_written = 0
+        self.total_records = 0
+        self.daily_values = 0
+        self.forecast_values = 0
+
+    def update_nwis_data(self):
+        """Fetch and load new NWIS data for every series already in the lake."""
+        logging.info("🌊 Starting NWIS incremental update...")
+
+        marks = {
+            (mark.site_code, mark.parameter_code): mark
+            for mark in fetch_high_water_marks(self.datalake_root)
+        }
+        logging.info(f"📍 Found high-water marks for {len(marks)} site-parameter series")
+
+        with connect_duckdb() as con:
+            nwis_sites = con.execute("""
+                                     SELECT s.site_id, s.site_cd, s.site_nm
+                                     FROM site s
+                                     INNER JOIN source src ON s.source_id = src.source_id
+                                     WHERE src.source_cd = 'NWIS'
+                                     ORDER BY s.site_cd
+                                     """).fetchall()
+
+        site_names = {site_code: site_name for _, site_code, site_name in nwis_sites}
+        results = fetch_concurrently(
+            self._nwis_fetch_tasks(nwis_sites, marks),
+            fetch_fn=self.metrics.instrument(self.fetcher),
+            max_workers=self.max_workers
+        )
+
+        for site_code, site_results in groupby(results, key=lambda result: result[0].site_code):
+            self._update_nwis_site(site_code, site_names[site_code], site_results)
+
+    def update_nwis_dv_data(self, dv_lookback_days: int = 120):
+        """
+        Fetch NWIS daily mean values since each series' latest daily value, in multi-site
+        requests, and upsert them into daily_observations. Provisional daily values are
+        revised for months, so the window reaches ``dv_lookback_days`` back; unchanged
+        days are not rewritten. Sites without any daily value yet are left to
+        initial_load.py.
+        """
+        logging.info("📅 Starting NWIS daily values update...")
+
+        with connect_duckdb() as con:
+            nwis_sites = con.execute("""
+                                     SELECT s.site_id, s.site_cd
+                                     FROM site s
+                                     INNER JOIN source src ON s.source_id = src.source_id
+                                     WHERE src.source_cd = 'NWIS'
+                                     ORDER BY s.site_cd
+                                     """).fetchall()
+        series = {
+            site_code: fetch_site_parameters(site_id) or [] for site_id, site_code in nwis_sites
+        }
+        tasks = daily_fetch_tasks(
+            series, self.end_date, marks=daily_high_water_marks(), lookback_days=dv_lookback_days
+        )
+        logging.info(
+            f"📍 Requesting daily values of {len(series)} NWIS sites in {len(tasks)} requests"
+        )
+
+        results = fetch_concurrently(
+            tasks, fetch_fn=self.metrics.instrument(self.fetcher), max_workers=self.max_workers
+        )
+        report = NWISDailyLoader(results, series, metrics=self.metrics)
+        self.daily_values += report['values']
+        logging.info(
+            f"✅ Loaded {report['values']:,} daily values"
+            f" ({report['rows_written']:,} rows inserted or updated)"
+        )
+
+    def update_cbrfc_forecasts(self):
+        """
+        Fetch the current CBRFC forecast of every forecast point in batched requests and
+        add it to the forecast_cbrfc tier as a new issuance.
+        """
+        logging.info("🔮 Starting CBRFC forecast update...")
+
+        with connect_duckdb() as con:
+            site_codes = [row[0] for row in con.execute("""
+                                     SELECT s.site_cd
+                                     FROM site s
+                                     INNER JOIN source src ON s.source_id = src.source_id
+                                     WHERE src.source_cd = 'CBRFC'
+                                     ORDER BY s.site_cd
+                                     """).fetchall()]
+        tasks = cbrfc_fetch_tasks(site_codes)
+        logging.info(f"📍 Requesting forecasts of {len(site_codes)} points in {len(tasks)} requests")
+
+        results = fetch_concurrently(
+            tasks, fetch_fn=self.metrics.instrument(self.forecast_fetcher),
+            max_workers=self.max_workers, host=CBRFC_HOST
+        )
+        report = CBRFCLoader(results, self.datalake_root, metrics=self.metrics)
+        self.forecast_values += report['values']
+        logging.info(
+            f"✅ Loaded {report['values']:,} forecast values"
+            f" ({report['files_written']} issuance files written)"
+        )
+
+    def _nwis_fetch_tasks(self, nwis_sites, marks):
+        """
+        Yield fetch tasks starting at each series' update window. Parameters of a site
+        that share a window start are requested together in one call.
+        """
+        for site_id, site_code, site_name in nwis_sites:
+            parameter_codes = fetch_site_parameters(site_id) or []
+            windows = {}
+
+            for parameter_code in parameter_codes:
+                mark = marks.get((site_code, parameter_code))
+                if mark is None:
+                    logging.info(
+                        f"⏭️ No data in lake for site {site_code} and parameter {parameter_code}."
+                        " Run initial_load.py to backfill it."
+                    )
+                    self.series_skipped += 1
+                    continue
+                windows.setdefault(self._window_start(mark), []).append(parameter_code)
+
+            for start_date, window_parameters in sorted(windows.items()):
+                yield FetchTask(
+                    site_code=site_code,
+                    parameter_code=window_parameters,
+                    start_date=start_date,
+                    end_date=self.end_date
+                )
+
+    def _window_start(self, mark) -> str:
+        """Start date of the update window for one series."""
+        start_ts = mark.min_provisional_ts or mark.max_read_ts
+        start_date = start_ts.date() - dt.timedelta(days=self.lookback_days)
+        return start_date.strftime('%Y-%m-%d')
+
+    def _update_nwis_site(self, site_code: str, site_name: str, site_results):
+        """Transform new data for a site and upsert it into the partitions it changes."""
+        logging.info(f"🔄 Updating NWIS site: {site_code} - {site_name}")
+
+        try:
+            site_data = []
+
+            for task, raw_data in site_results:
+                if raw_data is None or raw_data.empty:
+                    logging.info(
+                        f"  No new data for site {site_code} and parameters {task.parameter_code}"
+                        f" since {task.start_date}"
+                    )
+                    continue
+
+                with self.metrics.stage('transform', task) as metric:
+                    transformed_data = NWISMultiTransformer(
+                        raw_data, site_code, task.parameter_code
+                    )
+                    metric.rows, metric.bytes = transformed_data.num_rows, transformed_data.nbytes
+                if transformed_data.num_rows:
+                    site_data.append(transformed_data)
+
+            if site_data:
+                new_data = pa.concat_tables(site_data)
+                with self.metrics.stage('load', site_code=site_code) as metric:
+                    written = DataLakeLoader(new_data, site_code, self.datalake_root)
+                    metric.rows, metric.bytes = new_data.num_rows, file_bytes(written)
+                self.total_records += new_data.num_rows
+                self.partitions_written += len(written)
+                logging.info(
+                    f"✅ Merged {new_data.num_rows} new records into"
+                    f" {len(written)} partitions for site {site_code}"
+                )
+            self.sites_processed += 1
+        except Exception as e:
+            logging.error(f"❌ Error updating NWIS site {site_code}: {e}")
+            self.sites_failed += 1
+
+    def update_aggregates(self):
+        """Recompute the daily and annual statistics of every partition that changed."""
+        try:
+            with self.metrics.stage('aggregates') as metric:
+                result = refresh_aggregates(self.datalake_root)
+                metric.rows = result['daily_rows']
+            logging.info(
+                "📈 Refreshed daily and annual statistics for"
+                f" {result['partitions_refreshed']} partitions"
+            )
+        except Exception as e:
+            logging.error(f"❌ Error refreshing aggregate tables: {e}")
+
+    def generate_summary_report(self):
+        """Log a summary report of the update."""
+        logging.info("📊 DAILY UPDATE SUMMARY REPORT")
+        logging.info("=" * 50)
+        logging.info(f"🏁 Update completed: {dt.datetime.now()}")
+        logging.info(f"📅 Updated through: {self.end_date}")
+        logging.info(f"✅ Sites processed successfully: {self.sites_processed}")
+        logging.info(f"❌ Sites failed: {self.sites_failed}")
+        logging.info(f"⏭️ Series skipped (not in lake): {self.series_skipped}")
+        logging.info(f"📂 Partitions rewritten: {self.partitions_written}")
+        logging.info(f"📊 New records fetched: {self.total_records:,}")
+        logging.info(f"📅 Daily values fetched: {self.daily_values:,}")
+        logging.info(f"🔮 Forecast values fetched: {self.forecast_values:,}")
+        logging.info(f"🔁 Request retries: {self.fetcher.retries}")
+        if self.fetcher.failures:
+            logging.warning(
+                f"⚠️ {self.fetcher.failures} requests failed and were written to"
+                f" {self.dead_letter.path}; run initial_load.py --retry-failed to recover them"
+            )
+        self.metrics.log_summary()
+        if self.metrics.jsonl_path is not None:
+            logging.info(f"⏱️ Stage metrics written to {self.metrics.jsonl_path}")
+
+
+def parse_arguments():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(
+        description='Incremental daily data update for UCPO Water Data System',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+    # Update every series through today
+    python scripts/daily_update.py
+
+    # Re-request an extra week before each high-water mark
+    python scripts/daily_update.py --lookback-days 7
+
+    # Update observations only, without a new forecast issuance
+    python scripts/daily_update.py --skip-forecasts
+        """
+    )
+
+    parser.add_argument(
+        '--end-date',
+        type=str,
+        default=dt.date.today().strftime('%Y-%m-%d'),
+        help='End date for the update (YYYY-MM-DD format). Default: today'
+    )
+
+    parser.add_argument(
+        '--lookback-days',
+        type=int,
+        default=1,
+        help='Days to re-request before each high-water mark. Default: 1'
+    )
+
+    parser.add_argument(
+        '--dv-lookback-days',
+        type=int,
+        default=120,
+        help='Days of daily values to re-request for provisional revisions. Default: 120'
+    )
+
+    parser.add_argument(
+        '--skip-dv',
+        action='store_true',
+        help='Skip the NWIS daily values update'
+    )
+
+    parser.add_argument(
+        '--skip-forecasts',
+        action='store_true',
+        help='Skip the CBRFC forecast update'
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Number of concurrent NWIS requests. Default: 4'
+    )
+
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='Maximum NWIS requests per second across all workers. Default: unlimited'
+    )
+
+    return parser.parse_args()
+
+
+def main():
+    """Main execution function."""
+    print("🚀 UCPO Water Data System - Daily Update")
+    print("=" * 50)
+
+    args = parse_arguments()
+
+    run_ts = dt.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    log_file = PROJECT_ROOT / 'logs' / f"daily_update_{run_ts}.log"
+    setup_logging(level=logging.INFO, log_to_file=True, log_file_path=log_file)
+
+    # Stage metrics go next to the log as JSON lines, and to run_metrics at the end
+    metrics = RunMetrics(log_file.stem, log_file.with_suffix('.metrics.jsonl'))
+
+    logging.info("🚀 Starting daily update process")
+
+    try:
+        updater = DailyDataUpdater(
+            args.end_date,
+            lookback_days=args.lookback_days,
+            max_workers=args.workers,
+            requests_per_second=args.rate_limit,
+            metrics=metrics
+        )
+        updater.update_nwis_data()
+        updater.update_aggregates()
+        if not args.skip_dv:
+            updater.update_nwis_dv_data(args.dv_lookback_days)
+        if not args.skip_forecasts:
+            updater.update_cbrfc_forecasts()
+        updater.generate_summary_report()
+
+        print("\n🎉 Daily update completed successfully!")
+        print("📊 Check logs for details: logs/daily_update_*.log")
+
+    except KeyboardInterrupt:
+        logging.warning("⚠️ Daily update interrupted by user")
+        print("\n⚠️ Update process interrupted")
+        sys.exit(1)
+
+    except Exception as e:
+        logging.error(f"💥 Fatal error in daily update: {e}")
+        print(f"\n💥 Fatal error: {e}")
+        print("📋 Check logs for details")
+        sys.exit(1)
+
+    finally:
+        metrics.persist()
+
+
+if __name__ == "__main__":
+    main()
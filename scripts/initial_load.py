@@ -6,12 +6,18 @@ It should be run once to populate an empty data lake with historical data.
 
 Usage:
     python scripts/initial_load.py [--start-date YYYY-MM-DD] [--end-date YYYY-MM-DD]
+                                   [--workers N] [--rate-limit REQUESTS_PER_SECOND]
+                                   [--window-years N] [--cache-dir PATH]
+                                   [--retry-failed] [--resume [RUN_ID]] [--processes N]
 """
 import sys
 import argparse
 import logging
 import datetime as dt
+from functools import partial
+from itertools import groupby
 from pathlib import Path
+import pyarrow as pa
 
 # Add project root's parent to python path so 'src' can be imported
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -23,28 +29,92 @@ from src.database.connection import (
     write_meta_tables_to_csv,
     fetch_site_parameters
 )
-from src.etl.extractors import NWISExtractor
-from src.etl.transformers import NWISTransformer
-from src.etl.loaders import DataLakeLoader
+from src.database.aggregates import refresh_aggregates
+from src.database.manifest import rebuild_manifest, record_partitions
+from src.database.run_ledger import RunLedger, latest_run_id, unit_key
+from src.database.views import create_views
+from src.etl.cache import ResponseCache
+from src.etl.daily_values import NWISDailyLoader, daily_fetch_tasks
+from src.etl.extractors import HDB_HOST, HDBExtractor, NWISExtractor, iter_time_windows
+from src.etl.hdb import HDBLoader, fetch_hdb_series, hdb_fetch_tasks
+from src.etl.transformers import NWIS_IV_SCHEMA, NWISMultiTransformer
+from src.etl.loaders import DEFAULT_DATALAKE_PATH, DataLakeLoader, StreamingDataLakeLoader
+from src.etl.metrics import RunMetrics, file_bytes
+from src.etl.parallel import TransformLoadPool
+from src.etl.resilience import DeadLetterQueue, ResilientFetcher, RetryBudget
+from src.etl.scheduler import NWIS_HOST, FetchTask, fetch_concurrently, get_rate_limiter
 from src.utils.logging_config import setup_logging
 
 
+def _last_utc_year(task: FetchTask) -> int:
+    """UTC year the readings of a request window can reach, past its local end date."""
+    end_date = dt.date.fromisoformat(task.end_date) + dt.timedelta(days=1)
+    return end_date.year
+
+
 class InitialDataLoader:
     """Class to handle the initial data load process."""
 
-    def __init__(self, start_date: str, end_date: str):
+    def __init__(
+            self,
+            start_date: str,
+            end_date: str,
+            max_workers: int = 4,
+            requests_per_second: float = None,
+            window_years: int = 1,
+            cache: ResponseCache = None,
+            retry_budget: int = 500,
+            dead_letter: DeadLetterQueue = None,
+            dv_batch_size: int = 25,
+            hdb_sites_per_request: int = 5,
+            metrics: RunMetrics = None,
+            ledger: RunLedger = None,
+            processes: int = 0
+            ):
         self.start_date = start_date
         self.end_date = end_date
-        self.nwis_extractor = NWISExtractor()
-        # self.hdb_extractor = HDBExtractor()  # Placeholder for future use
-        self.transformer = NWISTransformer()
-        # self.hdb_transformer = HDBTransformer()  # Placeholder for future use
-        self.loader = DataLakeLoader()
+
+        # Fetch scheduler settings
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.window_years = window_years
+        self.dv_batch_size = dv_batch_size
+        self.hdb_sites_per_request = hdb_sites_per_request
+        self.cache = cache
+
+        # Worker processes transforming and writing NWIS sites, 0 to do it in this process
+        self.processes = processes
+
+        # Per-stage time, rows, bytes, retries and memory of the run
+        self.metrics = metrics or RunMetrics()
+
+        # Status of every unit of work, so an interrupted load can be resumed
+        self.ledger = ledger
+
+        # Retries, circuit breaking and the dead-letter list of failed requests
+        self.dead_letter = dead_letter or DeadLetterQueue()
+        limiter = get_rate_limiter(NWIS_HOST, requests_per_second) if requests_per_second else None
+        self.fetcher = ResilientFetcher(
+            partial(NWISExtractor, raise_errors=True),
+            budget=RetryBudget(retry_budget),
+            dead_letter=self.dead_letter,
+            rate_limiter=limiter,
+            cache=cache
+        )
+        # HDB requests share the retry budget but have their own breaker and dead letters
+        self.hdb_dead_letter = DeadLetterQueue(self.dead_letter.path.with_name('hdb.jsonl'))
+        self.hdb_fetcher = ResilientFetcher(
+            partial(HDBExtractor, raise_errors=True),
+            budget=self.fetcher.budget,
+            dead_letter=self.hdb_dead_letter,
+            host=HDB_HOST
+        )
 
         # Statistics
         self.sites_processed = 0
         self.sites_failed = 0
         self.total_records = 0
+        self.daily_values = 0
 
     def initialize_database(self):
         """Initialize the DuckDB database schema and metadata tables."""
@@ -59,16 +129,18 @@ class InitialDataLoader:
             else:
                 logging.warning(f"⚠️ Schema file not found: {schema_file}")
 
-            # Create views
-            views_file = PROJECT_ROOT / 'sql' / 'views.sql'
-            if views_file.exists():
-                execute_sql_script(views_file)
-                logging.info("✅ Database views created successfully")
+            self.create_views()
 
         except Exception as e:
             logging.error(f"❌ Error initializing database: {e}")
             raise
 
+    def create_views(self):
+        """Create the database views, bound to the configured datalake root."""
+        with self.metrics.stage('views'):
+            views = create_views(DEFAULT_DATALAKE_PATH)
+        logging.info(f"✅ {views} database views created over {DEFAULT_DATALAKE_PATH}")
+
     def load_nwis_data(self):
         """Load historical NWIS data for all sites and parameters."""
         logging.info("🌊 Starting NWIS data load...")
@@ -85,128 +157,407 @@ class InitialDataLoader:
                                          """).fetchall()
             
             logging.info(f"📍 Found {len(nwis_sites)} NWIS sites to process")
+            logging.info(
+                f"⚙️ Fetching with {self.max_workers} workers"
+                f" (rate limit: {self.requests_per_second or 'none'} req/s)"
+            )
+            if self.processes:
+                logging.info(f"⚙️ Transforming and loading in {self.processes} processes")
+
+            site_names = {site_code: site_name for _, site_code, site_name in nwis_sites}
+            tasks = self._nwis_fetch_tasks(nwis_sites)
+            if self.ledger is not None:
+                tasks = self.ledger.plan(tasks)
+            if self.processes:
+                self._load_nwis_parallel(tasks, site_names)
+                return
+            results = fetch_concurrently(
+                tasks,
+                fetch_fn=self.metrics.instrument(self.fetcher),
+                max_workers=self.max_workers
+            )
 
-            for site_id, site_code, site_name in nwis_sites:
-                self._process_nwis_site(site_id, site_code, site_name)
+            # Results arrive in submission order, so each site's parameters are contiguous
+            for site_code, site_results in groupby(results, key=lambda result: result[0].site_code):
+                self._process_nwis_site(site_code, site_names[site_code], site_results)
 
         except Exception as e:
             logging.error(f"❌ Error in NWIS data load: {e}")
             raise
 
-    def load_hdb_data(self):
-        """Load historical HDB data for all sites and parameters."""
-        logging.info("🏔️ Starting HDB data load...")
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    def load_nwis_dv_data(self):
+        """Load NWIS daily mean values for all sites into daily_observations."""
+        logging.info("📅 Starting NWIS daily values load...")
 
         try:
-            with connect_duckdb() as con:
-                # Get all HDB sites with their site_datatype_ids
-                hdb_sites = con.execute("""
-                                        SELECT s.site_id, s.site_cd, s.site_nm, u.usbr_site_parameter_cd
-                                        FROM site s
-                                        INNER JOIN source src ON s.source_id = src.source_id
-                                        INNER JOIN site_parameter sp ON s.site_id = sp.site_id
-                                        INNER JOIN usbr_site_parameter u ON sp.site_parameter_id = u.site_parameter_id
-                                        WHERE src.source_cd = 'HDB'
-                                        ORDER BY s.site_cd
-                                        """).fetchall() 
-                
-            logging.info(f"📍 Found {len(hdb_sites)} HDB site-parameter combinations to process")
-
-            for site_id, site_code, site_name, usbr_site_parameter_code in hdb_sites:
-                self._process_hdb_site(site_id, site_code, site_name, usbr_site_parameter_code)
+            series = self._nwis_series()
+            tasks = daily_fetch_tasks(
+                series, self.end_date, batch_size=self.dv_batch_size, start_date=self.start_date
+            )
+            if self.ledger is not None:
+                tasks = self.ledger.plan(tasks)
+            logging.info(
+                f"📍 Requesting daily values of {len(series)} NWIS sites in {len(tasks)} requests"
+            )
+            self._load_dv_tasks(tasks, series)
 
         except Exception as e:
-            logging.error(f"❌ Error in HDB data load: {e}")
+            logging.error(f"❌ Error in NWIS daily values load: {e}")
             raise
 
-    def _process_nwis_site(self, site_id: int, site_code: str, site_name: str):
-        """Process a single NWIS site."""
-        logging.info(f"🔄 Processing NWIS site: {site_code} - {site_name}")
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    def _load_dv_tasks(self, tasks, series):
+        """Fetch multi-site daily-value requests and upsert them into daily_observations."""
+        results = fetch_concurrently(
+            tasks, fetch_fn=self.metrics.instrument(self.fetcher), max_workers=self.max_workers
+        )
+        report = NWISDailyLoader(
+            self._checkpointed(results, self.dead_letter), series, metrics=self.metrics
+        )
+        self.daily_values += report['values']
+        logging.info(
+            f"✅ Loaded {report['values']:,} daily values from {report['responses']} responses"
+            f" ({report['rows_written']:,} rows inserted or updated)"
+        )
+
+    def _nwis_series(self):
+        """Parameter codes of every NWIS site, by site code."""
+        with connect_duckdb() as con:
+            nwis_sites = con.execute("""
+                                     SELECT s.site_id, s.site_cd
+                                     FROM site s
+                                     INNER JOIN source src ON s.source_id = src.source_id
+                                     WHERE src.source_cd = 'NWIS'
+                                     ORDER BY s.site_cd
+                                     """).fetchall()
+        return {
+            site_code: fetch_site_parameters(site_id) or [] for site_id, site_code in nwis_sites
+        }
+
+    def retry_failed_nwis(self):
+        """Re-drive the NWIS requests recorded in the dead-letter list by earlier runs."""
+        tasks = self.dead_letter.take()
+        logging.info(f"🔁 Retrying {len(tasks)} failed NWIS requests from {self.dead_letter.path}")
+        if not tasks:
+            return
 
         try:
-            # Get parameters for the site
+            # Daily-value tasks cover several sites each and go to daily_observations
+            dv_tasks = [task for task in tasks if task.service_code == 'dv']
+            if dv_tasks:
+                self._load_dv_tasks(dv_tasks, self._nwis_series())
+            tasks = [task for task in tasks if task.service_code != 'dv']
+
+            tasks.sort(key=lambda task: (task.site_code, task.start_date or ''))
+            results = fetch_concurrently(
+                tasks, fetch_fn=self.metrics.instrument(self.fetcher), max_workers=self.max_workers
+            )
+
+            for site_code, site_results in groupby(results, key=lambda result: result[0].site_code):
+                site_data = []
+                for task, raw_data in site_results:
+                    if raw_data is None or raw_data.empty:
+                        continue
+                    with self.metrics.stage('transform', task) as metric:
+                        transformed_data = NWISMultiTransformer(
+                            raw_data, site_code, task.parameter_code
+                        )
+                        metric.rows = transformed_data.num_rows
+                        metric.bytes = transformed_data.nbytes
+                    if transformed_data.num_rows:
+                        site_data.append(transformed_data)
+
+                if site_data:
+                    # Retried windows are merged into the partitions already on disk
+                    new_data = pa.concat_tables(site_data)
+                    with self.metrics.stage('load', site_code=site_code) as metric:
+                        written = DataLakeLoader(new_data, site_code)
+                        metric.rows, metric.bytes = new_data.num_rows, file_bytes(written)
+                    self.total_records += new_data.num_rows
+                    logging.info(f"✅ Recovered {new_data.num_rows} records for site {site_code}")
+                self.sites_processed += 1
+
+        finally:
+            if self.cache is not None:
+                self.cache.flush()
+
+    def _nwis_fetch_tasks(self, nwis_sites):
+        """
+        Yield one fetch task per site and time window, requesting every parameter of the
+        site in a single call. Tasks are ordered by site, then window, so results can be
+        streamed to the lake.
+        """
+        windows = list(iter_time_windows(self.start_date, self.end_date, self.window_years))
+
+        for site_id, site_code, site_name in nwis_sites:
             parameter_codes = fetch_site_parameters(site_id)
             if not parameter_codes:
                 logging.warning(f"⚠️ No parameters found for NWIS site {site_code}. Skipping.")
-                return
-            
-            site_data = []
-
-            for parameter_code in parameter_codes:
-                logging.info(f"  📊 Fetching parameter {parameter_code}")
-
-                try:
-                    # Extract data
-                    raw_data = self.nwis_extractor.fetch_timeseries_data(
-                        site_code=site_code,
-                        parameter_code=parameter_code,
-                        start_date=self.start_date,
-                        end_date=self.end_date
-                    )
+                continue
 
-                    if raw_data is None or raw_data.empty:
-                        logging.warning(f"⚠️ No data returned for site {site_code} and parameter {parameter_code}.")
-                        continue
+            for window_start, window_end in windows:
+                yield FetchTask(
+                    site_code=site_code,
+                    parameter_code=parameter_codes,
+                    start_date=window_start,
+                    end_date=window_end
+                )
 
-                    # Transform data
-                    transformed_data = self.nwis_transformer.transform(
-                        raw_data,
-                        site_code=site_code,
-                        parameter_code=parameter_code
-                    )
+    def load_hdb_data(self):
+        """Load historical HDB data for all sites and parameters into the timeseries_hdb tier."""
+        logging.info("🏔️ Starting HDB data load...")
 
-                    if not transformed_data.empty:
-                        site_data.append(transformed_data)
-                        logging.info(f"    ✅ Got {len(transformed_data)} records for parameter {parameter_code}")
+        try:
+            # Every configured HDB series, by site-datatype id
+            series = fetch_hdb_series()
+            tasks = hdb_fetch_tasks(
+                series, self.start_date, self.end_date,
+                sites_per_request=self.hdb_sites_per_request
+            )
+            if self.ledger is not None:
+                tasks = self.ledger.plan(tasks)
+            site_count = len({site_code for site_code, _ in series.values()})
+            logging.info(
+                f"📍 Requesting {len(series)} HDB series of {site_count} sites"
+                f" in {len(tasks)} requests"
+            )
+            self._load_hdb_tasks(tasks, series)
 
-                except Exception as e:
-                    logging.error(f"❌ Error processing parameter {parameter_code}: {e}")
-                    continue
-            
-            # Load all data for the site
-            if site_data:
-                combined_data = pd.concat(site_data, ignore_index=True)
-                self.loader.load_timeseries_data(combined_data, site_code)
-                self.total_records += len(combined_data)
-                logging.info(f"✅ Loaded {len(combined_data)} total records for site {site_code}")
-            self.sites_processed += 1
         except Exception as e:
-            logging.error(f"❌ Error processing NWIS site {site_code}: {e}")
-            self.sites_failed += 1
+            logging.error(f"❌ Error in HDB data load: {e}")
+            raise
+
+    def _load_hdb_tasks(self, tasks, series):
+        """Fetch batched HDB requests and write them to the timeseries_hdb tier."""
+        results = fetch_concurrently(
+            tasks, fetch_fn=self.metrics.instrument(self.hdb_fetcher),
+            max_workers=self.max_workers, host=HDB_HOST
+        )
+        report = HDBLoader(
+            self._checkpointed(results, self.hdb_dead_letter), series, metrics=self.metrics
+        )
+        self.total_records += report['values']
+        logging.info(
+            f"✅ Loaded {report['values']:,} HDB values from {report['responses']} responses"
+            f" ({report['partitions_written']} partitions written)"
+        )
+
+    def retry_failed_hdb(self):
+        """Re-drive the HDB requests recorded in the dead-letter list by earlier runs."""
+        tasks = self.hdb_dead_letter.take()
+        logging.info(
+            f"🔁 Retrying {len(tasks)} failed HDB requests from {self.hdb_dead_letter.path}"
+        )
+        if tasks:
+            self._load_hdb_tasks(tasks, fetch_hdb_series())
+
+    def _process_nwis_site(self, site_code: str, site_name: str, site_results):
+        """
+        Transform and stream the fetched windows of a single NWIS site into the lake.
+        Windows are checkpointed in the run ledger as the years holding them are written.
+        """
+        logging.info(f"🔄 Processing NWIS site: {site_code} - {site_name}")
 
-    def _process_hdb_site(self, site_id: int, site_code: str, site_name: str, usbr_site_parameter_code: str):
-        """Process a single HDB site-parameter combination."""
-        logging.info(f"🔄 Processing HDB site: {site_code} - {site_name} ({usbr_site_parameter_code})")
+        # Windows streamed into the loader but not yet checkpointed, oldest first
+        units = []
+        site_files = []
 
         try:
-            # Extract data
-            raw_data = self.hdb_extractor.fetch_timeseries_data(
-                usbr_site_parameter_code=usbr_site_parameter_code,
-                start_date=self.start_date,
-                end_date=self.end_date
+            windows = groupby(
+                site_results, key=lambda result: (result[0].start_date, result[0].end_date)
             )
+            window_frames = (
+                self._transform_nwis_window(site_code, window, window_results, units)
+                for window, window_results in windows
+            )
+            # Waiting on requests and transforming are measured by their own stages
+            with self.metrics.stage('load', site_code=site_code) as metric:
+                written = StreamingDataLakeLoader(
+                    metric.consume(window_frames), site_code,
+                    on_flush=(
+                        partial(self._checkpoint_nwis, units, site_files)
+                        if self.ledger is not None else None
+                    )
+                )
+                metric.bytes = file_bytes(written)
+            self._mark_nwis_done(units, written)
 
-            if raw_data is None or raw_data.empty:
-                logging.warning(f"⚠️ No data returned for HDB site {site_code} ({usbr_site_parameter_code}).")
-                return
-            
-            # Transform data
-            transformed_data = self.hdb_transformer.transform(
-                raw_data, 
-                site_code=site_code, 
-                usbr_site_parameter_code=usbr_site_parameter_code
+            self.total_records += metric.rows
+            logging.info(f"✅ Loaded {metric.rows} total records for site {site_code}")
+            self.sites_processed += 1
+        except Exception as e:
+            logging.error(f"❌ Error processing NWIS site {site_code}: {e}")
+            self.sites_failed += 1
+
+    def _load_nwis_parallel(self, tasks, site_names):
+        """
+        Fetch NWIS windows in this process and hand them to a pool of worker processes that
+        transform them and write each site's partitions. This process records the files
+        in the manifest and checkpoints the run ledger, the only writes to the database.
+        """
+        site_tasks = {}
+        for task in tasks:
+            site_tasks.setdefault(task.site_code, []).append(task)
+        units = {site_code: [] for site_code in site_tasks}
+        site_files = {site_code: [] for site_code in site_tasks}
+
+        with TransformLoadPool(
+                self.processes, DEFAULT_DATALAKE_PATH, run_id=self.metrics.run_id
+                ) as pool:
+            results = fetch_concurrently(
+                pool.schedule(site_tasks),
+                fetch_fn=self.metrics.instrument(self.fetcher),
+                max_workers=self.max_workers
             )
+            started = set()
+            for task, raw_data in results:
+                if task.site_code not in started:
+                    started.add(task.site_code)
+                    logging.info(
+                        f"🔄 Processing NWIS site: {task.site_code} - {site_names[task.site_code]}"
+                    )
+                if raw_data is None and task in self.dead_letter:
+                    self._mark_failed(task, 'Request failed after retries')
+                    pool.skip(task)
+                else:
+                    pool.submit(task, raw_data)
+                self._handle_pool_events(pool.events(), units, site_files)
+            self._handle_pool_events(pool.events(wait=True), units, site_files)
+
+    def _handle_pool_events(self, events, units, site_files):
+        """Record the windows, flushed years and finished sites reported by the workers."""
+        for event in events:
+            kind, site_code = event[:2]
+            if kind == 'window':
+                _, _, task, error, records = event
+                self.metrics.merge(records)
+                if error is None:
+                    units[site_code].append(task)
+                else:
+                    logging.error(
+                        f"❌ Error transforming window {task.start_date} to {task.end_date}"
+                        f" of site {site_code}: {error}"
+                    )
+                    self._mark_failed(task, error)
+            elif kind == 'flush':
+                _, _, files, through_year = event
+                record_partitions(files, DEFAULT_DATALAKE_PATH, site_code=site_code)
+                if self.ledger is not None:
+                    self._checkpoint_nwis(
+                        units[site_code], site_files[site_code], files, through_year
+                    )
+            elif kind == 'site':
+                _, _, files, rows, error, records = event
+                self.metrics.merge(records)
+                if error is not None:
+                    logging.error(f"❌ Error processing NWIS site {site_code}: {error}")
+                    self.sites_failed += 1
+                    continue
+                record_partitions(files, DEFAULT_DATALAKE_PATH, site_code=site_code)
+                self._mark_nwis_done(units.pop(site_code), site_files.pop(site_code) + files)
+                self.total_records += rows
+                logging.info(f"✅ Loaded {rows} total records for site {site_code}")
+                self.sites_processed += 1
 
-            if not transformed_data.empty:
-                self.loader.load_timeseries_data(transformed_data, site_code)
-                self.total_records += len(transformed_data)
-                logging.info(f"✅ Loaded {len(transformed_data)} records for HDB site {site_code} ({usbr_site_parameter_code})")
+    def _checkpoint_nwis(self, units, site_files, files, through_year):
+        """
+        Checkpoint the windows of a site whose readings are all on disk once the years
+        up to ``through_year`` are written. ``units`` holds the windows streamed but not
+        yet checkpointed, oldest first; ``site_files`` the site's files written so far.
+        """
+        site_files.extend(files)
+        done = []
+        while units and _last_utc_year(units[0]) <= through_year:
+            done.append(units.pop(0))
+        self._mark_nwis_done(done, site_files)
 
-            self.sites_processed += 1
+    def _transform_nwis_window(self, site_code: str, window, window_results, units) -> pa.Table:
+        """
+        Transform the multi-parameter response fetched for one site and time window.
+        Tasks handled without error are appended to ``units``; failed ones are marked
+        failed in the run ledger.
+        """
+        window_start, window_end = window
+        logging.info(f"  📅 Window {window_start} to {window_end}")
+        window_data = []
+
+        for task, raw_data in window_results:
+            try:
+                if raw_data is None and task in self.dead_letter:
+                    self._mark_failed(task, 'Request failed after retries')
+                    continue
+
+                if raw_data is None or raw_data.empty:
+                    logging.info(f"    No data returned for site {site_code} in this window.")
+                    units.append(task)
+                    continue
 
+                # Transform every parameter in one vectorized pass
+                with self.metrics.stage('transform', task) as metric:
+                    transformed_data = NWISMultiTransformer(
+                        raw_data, site_code, task.parameter_code
+                    )
+                    metric.rows, metric.bytes = transformed_data.num_rows, transformed_data.nbytes
+
+                if transformed_data.num_rows:
+                    window_data.append(transformed_data)
+                    logging.info(
+                        f"    ✅ Got {transformed_data.num_rows} records for"
+                        f" {len(transformed_data['parameter_cd'].unique())} parameters"
+                    )
+                units.append(task)
+
+            except Exception as e:
+                logging.error(f"❌ Error transforming window {window_start} to {window_end}: {e}")
+                self._mark_failed(task, str(e))
+                continue
+
+        if not window_data:
+            return NWIS_IV_SCHEMA.empty_table()
+        return pa.concat_tables(window_data)
+
+    def _mark_nwis_done(self, tasks, files):
+        """Checkpoint NWIS windows with the year partitions their readings fall in."""
+        if self.ledger is None or not tasks:
+            return
+        partitions = {}
+        for task in tasks:
+            years = range(int(task.start_date[:4]), _last_utc_year(task) + 1)
+            partitions[unit_key(task)] = [
+                path for path in files if int(path.parent.name.split('=')[1]) in years
+            ]
+        self.ledger.mark_done(tasks, partitions)
+
+    def _mark_failed(self, task, error: str):
+        """Record a unit that failed in the run ledger, so a resumed run redoes it."""
+        if self.ledger is not None:
+            self.ledger.mark_failed(task, error)
+
+    def _checkpointed(self, results, dead_letter):
+        """Fetch results that are checkpointed in the run ledger as the loader consumes them."""
+        if self.ledger is None:
+            return results
+        return self.ledger.checkpoint(results, dead_letter)
+
+    def update_aggregates(self):
+        """Recompute the daily and annual statistics of every partition that changed."""
+        try:
+            with self.metrics.stage('aggregates') as metric:
+                result = refresh_aggregates(DEFAULT_DATALAKE_PATH)
+                metric.rows = result['daily_rows']
+            logging.info(
+                "📈 Refreshed daily and annual statistics for"
+                f" {result['partitions_refreshed']} partitions"
+            )
         except Exception as e:
-            logging.error(f"❌ Error processing HDB site {site_code} ({usbr_site_parameter_code}): {e}")
-            self.sites_failed += 1
+            logging.error(f"❌ Error refreshing aggregate tables: {e}")
 
     def generate_summary_report(self):
         """Generate and log a summary report of the initial load."""
@@ -217,6 +568,34 @@ class InitialDataLoader:
         logging.info(f"✅ Sites processed successfully: {self.sites_processed}")
         logging.info(f"❌ Sites failed: {self.sites_failed}")
         logging.info(f"📊 Total records loaded: {self.total_records:,}")
+        logging.info(f"📅 Daily values loaded: {self.daily_values:,}")
+        logging.info(f"🔁 Request retries: {self.fetcher.retries + self.hdb_fetcher.retries}")
+        for fetcher, dead_letter in ((self.fetcher, self.dead_letter),
+                                     (self.hdb_fetcher, self.hdb_dead_letter)):
+            if fetcher.failures:
+                logging.warning(
+                    f"⚠️ {fetcher.failures} requests failed and were written to"
+                    f" {dead_letter.path}; re-run with --retry-failed to recover them"
+                )
+        if self.cache is not None:
+            stats = self.cache.stats()
+            logging.info(
+                f"💾 Response cache: {stats['hits']} hits, {stats['misses']} misses,"
+                f" {stats['evictions']} evictions, {stats['bytes'] / 1024 ** 2:,.1f} MB on disk"
+            )
+        self.metrics.log_summary()
+        if self.metrics.jsonl_path is not None:
+            logging.info(f"⏱️ Stage metrics written to {self.metrics.jsonl_path}")
+        if self.ledger is not None:
+            progress = self.ledger.progress()
+            logging.info(
+                f"📒 Run ledger {self.ledger.run_id}: {progress.get('done', 0)} units done,"
+                f" {progress.get('failed', 0)} failed, {progress.get('pending', 0)} pending"
+            )
+            if progress.get('failed') or progress.get('pending'):
+                logging.info(
+                    f"⏯️ Re-run with --resume {self.ledger.run_id} to finish the remaining units"
+                )
 
         # Export metadata for review
         try:
@@ -241,6 +620,37 @@ Examples:
 
     # Load recent data only
     python scripts/initial_load.py --start-date 2023-01-01
+
+    # Fetch with 8 concurrent requests, at most 5 requests per second
+    python scripts/initial_load.py --workers 8 --rate-limit 5
+
+    # Request five calendar years per call instead of one
+    python scripts/initial_load.py --window-years 5
+
+    # Reuse raw responses cached by earlier runs
+    python scripts/initial_load.py --cache-dir data/cache/raw_responses
+
+    # Skip the daily values, or request them 10 sites at a time
+    python scripts/initial_load.py --skip-dv
+    python scripts/initial_load.py --dv-batch-size 10
+
+    # Request the series of all ten reservoirs in one HDB call per window
+    python scripts/initial_load.py --skip-nwis --skip-dv --hdb-sites-per-request 10
+
+    # Re-drive only the requests that failed in earlier runs
+    python scripts/initial_load.py --retry-failed
+
+    # Continue the latest interrupted load with the same arguments, skipping finished units
+    python scripts/initial_load.py --start-date 2020-01-01 --resume
+
+    # Transform and write four sites at a time in worker processes
+    python scripts/initial_load.py --workers 8 --processes 4
+
+    # Continue a particular load
+    python scripts/initial_load.py --resume initial_load_2025-06-01_02-00-00
+
+    # Re-scan the datalake and rebuild the partition manifest
+    python scripts/initial_load.py --rebuild-manifest
         """
     )
 
@@ -258,18 +668,117 @@ Examples:
         help='End date for data load (YYYY-MM-DD format). Default: today'
     )
 
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=4,
+        help='Number of concurrent NWIS requests. Default: 4'
+    )
+
+    parser.add_argument(
+        '--rate-limit',
+        type=float,
+        default=None,
+        help='Maximum NWIS requests per second across all workers. Default: unlimited'
+    )
+
+    parser.add_argument(
+        '--window-years',
+        type=int,
+        default=1,
+        help='Calendar years requested per NWIS call. Default: 1'
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        type=Path,
+        default=None,
+        help='Directory for the raw NWIS response cache. Default: no caching'
+    )
+
+    parser.add_argument(
+        '--cache-max-gb',
+        type=float,
+        default=5.0,
+        help='Size limit of the response cache in GB. Default: 5'
+    )
+
+    parser.add_argument(
+        '--cache-ttl-hours',
+        type=float,
+        default=12.0,
+        help='Lifetime of cached provisional or empty windows in hours. Default: 12'
+    )
+
+    parser.add_argument(
+        '--retry-budget',
+        type=int,
+        default=500,
+        help='Maximum request retries across the whole run. Default: 500'
+    )
+
+    parser.add_argument(
+        '--retry-failed',
+        action='store_true',
+        help='Only re-drive NWIS and HDB requests recorded as failed by earlier runs'
+    )
+
+    parser.add_argument(
+        '--resume',
+        nargs='?',
+        const='latest',
+        default=None,
+        metavar='RUN_ID',
+        help='Resume an interrupted load, by default the latest one, skipping the units its'
+             ' run ledger records as done. Pass the arguments of the original load.'
+    )
+
+    parser.add_argument(
+        '--processes',
+        type=int,
+        default=0,
+        help='Worker processes transforming and writing NWIS sites in parallel.'
+             ' Default: 0, in the main process'
+    )
+
+    parser.add_argument(
+        '--rebuild-manifest',
+        action='store_true',
+        help='Only rebuild the partition manifest from the files in the datalake'
+    )
+
     parser.add_argument(
         '--skip-nwis',
         action='store_true',
         help='Skip NWIS data loading'
     )
 
+    parser.add_argument(
+        '--skip-dv',
+        action='store_true',
+        help='Skip the NWIS daily values load into daily_observations'
+    )
+
+    parser.add_argument(
+        '--dv-batch-size',
+        type=int,
+        default=25,
+        help='NWIS sites per daily-values request. Default: 25'
+    )
+
     parser.add_argument(
         '--skip-hdb',
         action='store_true', 
         help='Skip HDB data loading'
     )
 
+    parser.add_argument(
+        '--hdb-sites-per-request',
+        type=int,
+        default=5,
+        help='HDB sites whose series share one request. Default: 5'
+    )
+
     return parser.parse_args()
 
 
@@ -282,15 +791,67 @@ def main():
     args = parse_arguments()
 
     # Setup logging
-    setup_logging('initial_load', level=logging.INFO)
+    run_ts = dt.datetime.now().strftime('%Y-%m-%d_%H-%M-%S')
+    log_file = PROJECT_ROOT / 'logs' / f"initial_load_{run_ts}.log"
+    setup_logging(level=logging.INFO, log_to_file=True, log_file_path=log_file)
+
+    # Stage metrics go next to the log as JSON lines, and to run_metrics at the end
+    metrics = RunMetrics(log_file.stem, log_file.with_suffix('.metrics.jsonl'))
 
     # Log startup info
     logging.info("🚀 Starting initial data load process")
     logging.info(f"📅 Date range: {args.start_date} to {args.end_date}")
 
     try:
+        cache = None
+        if args.cache_dir is not None:
+            cache = ResponseCache(
+                args.cache_dir,
+                max_bytes=int(args.cache_max_gb * 1024 ** 3),
+                provisional_ttl=args.cache_ttl_hours * 3600
+            )
+
+        # Full loads record every unit in the run ledger so they can be resumed
+        ledger = None
+        if not (args.rebuild_manifest or args.retry_failed):
+            run_id = log_file.stem
+            if args.resume == 'latest':
+                run_id = latest_run_id('initial_load_') or run_id
+            elif args.resume is not None:
+                run_id = args.resume
+            if args.resume is not None:
+                logging.info(f"⏯️ Resuming load {run_id}")
+            ledger = RunLedger(run_id, DEFAULT_DATALAKE_PATH)
+
         # Initialize the loader
-        loader = InitialDataLoader(args.start_date, args.end_date)
+        loader = InitialDataLoader(
+            args.start_date,
+            args.end_date,
+            max_workers=args.workers,
+            requests_per_second=args.rate_limit,
+            window_years=args.window_years,
+            cache=cache,
+            retry_budget=args.retry_budget,
+            dv_batch_size=args.dv_batch_size,
+            hdb_sites_per_request=args.hdb_sites_per_request,
+            metrics=metrics,
+            ledger=ledger,
+            processes=args.processes
+        )
+
+        if args.rebuild_manifest:
+            files = rebuild_manifest(DEFAULT_DATALAKE_PATH)
+            logging.info(f"📂 Partition manifest rebuilt with {files} files")
+            print("\n🎉 Partition manifest rebuilt!")
+            return
+
+        if args.retry_failed:
+            loader.retry_failed_nwis()
+            loader.retry_failed_hdb()
+            loader.update_aggregates()
+            loader.generate_summary_report()
+            print("\n🎉 Failed requests re-driven!")
+            return
 
         # Initialize database
         loader.initialize_database()
@@ -298,9 +859,16 @@ def main():
         # Load data from different sources
         if not args.skip_nwis:
             loader.load_nwis_data()
+            loader.update_aggregates()
+            loader.create_views()
         else:
             logging.info("⏭️ Skipping NWIS data load")
 
+        if not args.skip_dv:
+            loader.load_nwis_dv_data()
+        else:
+            logging.info("⏭️ Skipping NWIS daily values load")
+
         if not args.skip_hdb:
             loader.load_hdb_data()
         else:
@@ -323,6 +891,9 @@ def main():
         print("📋 Check logs for details")
         sys.exit(1)
 
+    finally:
+        metrics.persist()
+
 
 if __name__ == "__main__":
     main()
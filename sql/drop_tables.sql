@@ -4,3 +4,11 @@ DROP TABLE IF EXISTS site;
 DROP TABLE IF EXISTS source;
 DROP TABLE IF EXISTS parameter;
 DROP TABLE IF EXISTS daily_observations;
+DROP SEQUENCE IF EXISTS daily_observation_id_seq;
+DROP TABLE IF EXISTS partition_manifest;
+DROP TABLE IF EXISTS forecast_index;
+DROP TABLE IF EXISTS nwis_daily_stats;
+DROP TABLE IF EXISTS nwis_annual_stats;
+DROP TABLE IF EXISTS aggregate_refresh;
+DROP TABLE IF EXISTS run_metrics;
+DROP TABLE IF EXISTS run_ledger;
@@ -69,11 +69,121 @@ CREATE TABLE IF NOT EXISTS usbr_site_parameter (
     UNIQUE (site_parameter_id, usbr_site_parameter_cd)  -- Ensure unique site-parameter combinations for USBR
 );
 
+CREATE SEQUENCE IF NOT EXISTS daily_observation_id_seq START 1;
+
 CREATE TABLE IF NOT EXISTS daily_observations (
-    daily_observation_id INTEGER NOT NULL PRIMARY KEY,
+    daily_observation_id INTEGER NOT NULL PRIMARY KEY
+        DEFAULT nextval('daily_observation_id_seq'),
     site_parameter_id INTEGER NOT NULL,    -- Foreign key to site_parameter table
     read_dt DATE NOT NULL,                 -- Date of the observation
     value DECIMAL(10, 3) NOT NULL,         -- Observation value
     create_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                   -- Creation timestamp
-    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP                    -- Last update timestamp
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                   -- Last update timestamp
+    UNIQUE (site_parameter_id, read_dt)    -- One value per site-parameter and day
+);
+
+CREATE TABLE IF NOT EXISTS partition_manifest (
+    file_path TEXT NOT NULL PRIMARY KEY,   -- Partition file relative to the datalake root
+    tier_cd TEXT NOT NULL,                 -- Datalake tier, e.g. 'timeseries_iv'
+    site_cd TEXT NOT NULL,                 -- Hive 'site' key of the partition
+    year INTEGER NOT NULL,                 -- Hive 'year' key of the partition
+    row_cnt BIGINT NOT NULL,               -- Rows in the file
+    min_read_ts TIMESTAMP_NS,              -- Earliest reading (UTC)
+    max_read_ts TIMESTAMP_NS,              -- Latest reading (UTC)
+    parameter_cds TEXT[],                  -- Parameters present in the file
+    approved_cnt BIGINT,                   -- Rows with approval_status 'A'
+    provisional_cnt BIGINT,                -- Rows with approval_status 'P'
+    parameter_stats STRUCT(
+        parameter_cd TEXT,
+        row_cnt BIGINT,
+        min_read_ts TIMESTAMP_NS,
+        max_read_ts TIMESTAMP_NS,
+        max_approved_ts TIMESTAMP_NS,
+        min_provisional_ts TIMESTAMP_NS
+    )[],                                   -- Per-parameter summary of the file
+    file_bytes BIGINT NOT NULL,            -- File size in bytes
+    content_hash TEXT NOT NULL,            -- sha256 of the file contents
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP    -- Last update timestamp
+);
+
+CREATE TABLE IF NOT EXISTS forecast_index (
+    file_path TEXT NOT NULL PRIMARY KEY,   -- Partition file relative to the datalake root
+    tier_cd TEXT NOT NULL,                 -- Datalake tier, e.g. 'forecast_cbrfc'
+    site_cd TEXT NOT NULL,                 -- Hive 'site' key of the partition
+    issue_dt DATE NOT NULL,                -- Hive 'issue_dt' key of the partition
+    issue_ts TIMESTAMP_NS NOT NULL,        -- Issuance held in the file (UTC)
+    row_cnt BIGINT NOT NULL,               -- Rows in the file
+    min_valid_ts TIMESTAMP_NS,             -- First forecast valid time (UTC)
+    max_valid_ts TIMESTAMP_NS,             -- Last forecast valid time (UTC)
+    parameter_cds TEXT[],                  -- Parameters forecast in the file
+    file_bytes BIGINT NOT NULL,            -- File size in bytes
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP    -- Last update timestamp
+);
+
+CREATE TABLE IF NOT EXISTS nwis_daily_stats (
+    site_cd TEXT NOT NULL,                 -- USGS site number
+    parameter_cd TEXT NOT NULL,            -- USGS parameter code
+    approval_status TEXT,                  -- 'A' approved, 'P' provisional
+    year INTEGER NOT NULL,                 -- Datalake year partition (UTC) of the readings
+    date_recorded DATE NOT NULL,           -- Local date of the readings
+    mean_value DOUBLE,
+    median_value DOUBLE,
+    min_value DOUBLE,
+    max_value DOUBLE,
+    reading_cnt BIGINT NOT NULL,           -- Readings aggregated into the row
+    min_read_ts TIMESTAMP_NS,              -- UTC time of the day's minimum
+    max_read_ts TIMESTAMP_NS               -- UTC time of the day's maximum
+);
+
+CREATE TABLE IF NOT EXISTS nwis_annual_stats (
+    site_cd TEXT NOT NULL,                 -- USGS site number
+    parameter_cd TEXT NOT NULL,            -- USGS parameter code
+    year INTEGER NOT NULL,                 -- Datalake year partition (UTC)
+    approval_status TEXT,                  -- 'A' approved, 'P' provisional
+    min_value DOUBLE,
+    max_value DOUBLE,
+    min_date DATE,                         -- Local date of min_value
+    max_date DATE,                         -- Local date of max_value
+    reading_cnt BIGINT NOT NULL,           -- Readings aggregated into the row
+    min_read_ts TIMESTAMP_NS,              -- UTC time of min_value
+    max_read_ts TIMESTAMP_NS               -- UTC time of max_value
+);
+
+CREATE TABLE IF NOT EXISTS aggregate_refresh (
+    file_path TEXT NOT NULL PRIMARY KEY,   -- Partition file relative to the datalake root
+    content_hash TEXT NOT NULL,            -- Manifest hash of the file when aggregated
+    refresh_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- Last refresh timestamp
+);
+
+CREATE TABLE IF NOT EXISTS run_metrics (
+    run_id TEXT NOT NULL,                  -- Run of the measurement, e.g. 'initial_load_<ts>'
+    stage_cd TEXT NOT NULL,                -- 'extract', 'transform', 'load', 'aggregates', 'views'
+    service_cd TEXT,                       -- Request service, e.g. 'iv', 'dv', 'DY', 'forecast'
+    site_cd TEXT,                          -- Site code(s) of the unit, comma separated for batches
+    parameter_cd TEXT,                     -- Parameter code(s) of the unit, comma separated
+    start_dt DATE,                         -- First date of the request window
+    end_dt DATE,                           -- Last date of the request window
+    start_ts TIMESTAMP NOT NULL,           -- When the stage started (UTC)
+    elapsed_sec DOUBLE NOT NULL,           -- Wall time of the stage in seconds
+    row_cnt BIGINT,                        -- Rows received, transformed or loaded
+    byte_cnt BIGINT,                       -- Bytes received, transformed or written
+    retry_cnt INTEGER,                     -- Request retries
+    peak_rss_byte_cnt BIGINT,              -- Peak resident memory of the process during the stage
+    status_cd TEXT NOT NULL,               -- 'ok' or 'failed'
+    error_tx TEXT                          -- Error of a failed stage
+);
+
+CREATE TABLE IF NOT EXISTS run_ledger (
+    run_id TEXT NOT NULL,                  -- Load the unit belongs to, e.g. 'initial_load_<ts>'
+    unit_key TEXT NOT NULL,                -- service|site|parameter|start|end of the fetch task
+    service_cd TEXT,                       -- Request service, e.g. 'iv', 'dv', 'DY'
+    site_cd TEXT NOT NULL,                 -- Site code(s) of the unit, comma separated for batches
+    parameter_cd TEXT,                     -- Parameter code(s) of the unit, comma separated
+    start_dt DATE,                         -- First date of the request window
+    end_dt DATE,                           -- Last date of the request window
+    status_cd TEXT NOT NULL,               -- 'pending', 'done' or 'failed'
+    partition_paths TEXT[],                -- Partition files holding the unit, relative to the lake
+    error_tx TEXT,                         -- Why the unit failed
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,   -- Last status change
+    PRIMARY KEY (run_id, unit_key)
 );
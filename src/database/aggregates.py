@@ -0,0 +1,233 @@
+import datetime as dt
+import logging
+from pathlib import Path
+from typing import Union
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb
+from src.database.manifest import MANIFEST_TABLE, ensure_manifest_table, repair_manifest
+
+LOCAL_TIME_ZONE = 'America/Denver'
+
+# Kept in step with sql/schema.sql so a refresh can run against an older database
+AGGREGATE_DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS nwis_daily_stats (
+        site_cd TEXT NOT NULL,                 -- USGS site number
+        parameter_cd TEXT NOT NULL,            -- USGS parameter code
+        approval_status TEXT,                  -- 'A' approved, 'P' provisional
+        year INTEGER NOT NULL,                 -- Datalake year partition (UTC) of the readings
+        date_recorded DATE NOT NULL,           -- Local date of the readings
+        mean_value DOUBLE,
+        median_value DOUBLE,
+        min_value DOUBLE,
+        max_value DOUBLE,
+        reading_cnt BIGINT NOT NULL,           -- Readings aggregated into the row
+        min_read_ts TIMESTAMP_NS,              -- UTC time of the day's minimum
+        max_read_ts TIMESTAMP_NS               -- UTC time of the day's maximum
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS nwis_annual_stats (
+        site_cd TEXT NOT NULL,                 -- USGS site number
+        parameter_cd TEXT NOT NULL,            -- USGS parameter code
+        year INTEGER NOT NULL,                 -- Datalake year partition (UTC)
+        approval_status TEXT,                  -- 'A' approved, 'P' provisional
+        min_value DOUBLE,
+        max_value DOUBLE,
+        min_date DATE,                         -- Local date of min_value
+        max_date DATE,                         -- Local date of max_value
+        reading_cnt BIGINT NOT NULL,           -- Readings aggregated into the row
+        min_read_ts TIMESTAMP_NS,              -- UTC time of min_value
+        max_read_ts TIMESTAMP_NS               -- UTC time of max_value
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS aggregate_refresh (
+        file_path TEXT NOT NULL PRIMARY KEY,   -- Partition file relative to the datalake root
+        content_hash TEXT NOT NULL,            -- Manifest hash of the file when aggregated
+        refresh_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP   -- Last refresh timestamp
+    )
+    """,
+]
+
+
+# Columns added after the tables were first released, as (table, column, type)
+AGGREGATE_MIGRATIONS = [
+    ('nwis_daily_stats', 'min_read_ts', 'TIMESTAMP_NS'),
+    ('nwis_daily_stats', 'max_read_ts', 'TIMESTAMP_NS'),
+    ('nwis_annual_stats', 'min_read_ts', 'TIMESTAMP_NS'),
+    ('nwis_annual_stats', 'max_read_ts', 'TIMESTAMP_NS'),
+]
+
+
+# Annual extrema of the stale partitions in one aggregation pass over the daily rows.
+# Values and their dates/times are taken within the same approval-status group.
+ANNUAL_FROM_DAILY_SQL = """
+    INSERT INTO nwis_annual_stats BY NAME
+    SELECT
+        site_cd,
+        parameter_cd,
+        year,
+        approval_status,
+        min(min_value) AS min_value,
+        max(max_value) AS max_value,
+        arg_min(date_recorded, min_value) AS min_date,
+        arg_max(date_recorded, max_value) AS max_date,
+        sum(reading_cnt) AS reading_cnt,
+        arg_min(min_read_ts, min_value) AS min_read_ts,
+        arg_max(max_read_ts, max_value) AS max_read_ts
+    FROM nwis_daily_stats
+    SEMI JOIN stale_partition USING (site_cd, year)
+    GROUP BY site_cd, parameter_cd, year, approval_status
+"""
+
+
+def ensure_aggregate_tables(con) -> None:
+    """
+    Create the aggregate tables and their refresh log if they do not exist yet, and add
+    missing columns to older ones. Adding a column empties the refresh log so the next
+    refresh recomputes every partition.
+    """
+    for ddl in AGGREGATE_DDL:
+        con.execute(ddl)
+
+    migrated = False
+    for table, column, column_type in AGGREGATE_MIGRATIONS:
+        exists = con.execute(
+            "SELECT count(*) FROM information_schema.columns"
+            " WHERE table_name = ? AND column_name = ?",
+            [table, column]
+        ).fetchone()[0]
+        if not exists:
+            con.execute(f"ALTER TABLE {table} ADD COLUMN {column} {column_type}")
+            migrated = True
+    if migrated:
+        logging.info("Aggregate tables gained new columns; every partition will be refreshed")
+        con.execute("DELETE FROM aggregate_refresh")
+
+
+def refresh_aggregates(
+        datalake_root: Union[str, Path],
+        db_path: Path = DEFAULT_DB_PATH,
+        full: bool = False
+        ) -> dict:
+    """
+    Bring nwis_daily_stats and nwis_annual_stats up to date with the datalake.
+
+    The partition manifest maintained by the loader tells which files changed: a
+    (site, year) partition is recomputed when one of its files is new, has a different
+    content hash than at the last refresh, or was removed. Everything else is left alone,
+    so a refresh after a daily update only touches the current year of each site.
+    The refresh runs in one transaction; readers never see a half-refreshed table.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake the manifest describes
+        db_path         : DuckDB file holding the manifest and the aggregate tables
+        full            : Recompute every partition
+    Returns:
+        dict: Numbers of partitions refreshed and of daily rows written.
+    """
+    root = Path(datalake_root)
+    # Files a failed manifest update left out must be in the manifest before it is trusted
+    repair_manifest(root, db_path)
+    with connect_duckdb(db_path) as con:
+        ensure_manifest_table(con)
+        ensure_aggregate_tables(con)
+        con.execute("BEGIN TRANSACTION")
+        try:
+            if full:
+                con.execute("DELETE FROM aggregate_refresh")
+
+            # Partitions with new, changed or removed files since the last refresh
+            con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE stale_partition AS
+                SELECT DISTINCT site_cd, year FROM (
+                    SELECT m.site_cd, m.year
+                    FROM {MANIFEST_TABLE} AS m
+                    LEFT JOIN aggregate_refresh AS r ON r.file_path = m.file_path
+                    WHERE m.tier_cd = 'timeseries_iv'
+                        AND r.content_hash IS DISTINCT FROM m.content_hash
+                    UNION ALL
+                    SELECT
+                        regexp_extract(r.file_path, 'site=([^/]+)', 1),
+                        CAST(regexp_extract(r.file_path, 'year=([0-9]+)', 1) AS INTEGER)
+                    FROM aggregate_refresh AS r
+                    ANTI JOIN {MANIFEST_TABLE} AS m ON m.file_path = r.file_path
+                )
+            """)
+            if full:
+                con.execute("""
+                    INSERT INTO stale_partition
+                    SELECT DISTINCT site_cd, year FROM nwis_daily_stats
+                    EXCEPT SELECT site_cd, year FROM stale_partition
+                """)
+
+            partitions = con.execute("SELECT count(*) FROM stale_partition").fetchone()[0]
+            files = [
+                (root / file_path).as_posix() for file_path, in con.execute(f"""
+                    SELECT m.file_path FROM {MANIFEST_TABLE} AS m
+                    SEMI JOIN stale_partition AS p ON p.site_cd = m.site_cd AND p.year = m.year
+                    WHERE m.tier_cd = 'timeseries_iv'
+                    ORDER BY m.file_path
+                """).fetchall()
+            ]
+
+            for table in ('nwis_daily_stats', 'nwis_annual_stats'):
+                con.execute(f"""
+                    DELETE FROM {table} AS t
+                    WHERE EXISTS (
+                        SELECT 1 FROM stale_partition AS p
+                        WHERE p.site_cd = t.site_cd AND p.year = t.year
+                    )
+                """)
+
+            daily_rows = 0
+            if files:
+                daily_rows = con.execute(f"""
+                    INSERT INTO nwis_daily_stats BY NAME
+                    SELECT
+                        site_cd,
+                        parameter_cd,
+                        approval_status,
+                        year,
+                        CAST(
+                            CAST(read_ts AS TIMESTAMP)
+                            AT TIME ZONE 'UTC' AT TIME ZONE '{LOCAL_TIME_ZONE}' AS DATE
+                        ) AS date_recorded,
+                        avg(value) AS mean_value,
+                        median(value) AS median_value,
+                        min(value) AS min_value,
+                        max(value) AS max_value,
+                        count(*) AS reading_cnt,
+                        arg_min(read_ts, value) AS min_read_ts,
+                        arg_max(read_ts, value) AS max_read_ts
+                    FROM read_parquet(?, hive_partitioning = false)
+                    GROUP BY site_cd, parameter_cd, approval_status, year, date_recorded
+                """, [files]).fetchone()[0]
+
+                # Annual rows come from the fresh daily rows, not the raw readings
+                con.execute(ANNUAL_FROM_DAILY_SQL)
+
+            con.execute("""
+                DELETE FROM aggregate_refresh AS r
+                WHERE EXISTS (
+                    SELECT 1 FROM stale_partition AS p
+                    WHERE r.file_path LIKE 'timeseries_iv/site=' || p.site_cd
+                        || '/year=' || p.year || '/%'
+                )
+            """)
+            con.execute(f"""
+                INSERT INTO aggregate_refresh
+                SELECT m.file_path, m.content_hash, ?
+                FROM {MANIFEST_TABLE} AS m
+                SEMI JOIN stale_partition AS p ON p.site_cd = m.site_cd AND p.year = m.year
+                WHERE m.tier_cd = 'timeseries_iv'
+            """, [dt.datetime.now()])
+
+            con.execute("DROP TABLE stale_partition")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    logging.info(f"Refreshed aggregates for {partitions} partitions ({daily_rows} daily rows)")
+    return {'partitions_refreshed': partitions, 'daily_rows': daily_rows}
@@ -50,6 +50,13 @@ def connect_duckdb(path: Path = DEFAULT_DB_PATH):
             con.close()
 
 
+def has_table(con: duckdb.DuckDBPyConnection, table_name: str) -> bool:
+    """Whether the database behind ``con`` holds a table of this name."""
+    return bool(con.execute(
+        "SELECT count(*) FROM duckdb_tables() WHERE table_name = ?", [table_name]
+    ).fetchone()[0])
+
+
 def execute_sql_script(
         sql_file: Union[str, Path],
         verbose: bool = False
@@ -0,0 +1,384 @@
+import datetime as dt
+import logging
+from contextlib import nullcontext
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb, has_table
+from src.database.manifest import manifest_covers, manifest_files
+from src.etl.loaders import DEFAULT_DATALAKE_PATH
+from src.utils.helpers import TimeLike, to_utc
+from src.utils.site_list import cbrfc_nwis_sites
+
+FORECAST_TIER = 'forecast_cbrfc'
+FORECAST_INDEX_TABLE = 'forecast_index'
+
+# Kept in step with sql/schema.sql so the loader can create the table on first use
+FORECAST_INDEX_DDL = f"""
+CREATE TABLE IF NOT EXISTS {FORECAST_INDEX_TABLE} (
+    file_path TEXT NOT NULL PRIMARY KEY,   -- Partition file relative to the datalake root
+    tier_cd TEXT NOT NULL,                 -- Datalake tier, e.g. 'forecast_cbrfc'
+    site_cd TEXT NOT NULL,                 -- Hive 'site' key of the partition
+    issue_dt DATE NOT NULL,                -- Hive 'issue_dt' key of the partition
+    issue_ts TIMESTAMP_NS NOT NULL,        -- Issuance held in the file (UTC)
+    row_cnt BIGINT NOT NULL,               -- Rows in the file
+    min_valid_ts TIMESTAMP_NS,             -- First forecast valid time (UTC)
+    max_valid_ts TIMESTAMP_NS,             -- Last forecast valid time (UTC)
+    parameter_cds TEXT[],                  -- Parameters forecast in the file
+    file_bytes BIGINT NOT NULL,            -- File size in bytes
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP    -- Last update timestamp
+)
+"""
+
+# Columns returned by the forecast readers, in order
+FORECAST_RESULT_SCHEMA = pa.schema([
+    ('site_cd', pa.string()),
+    ('parameter_cd', pa.string()),
+    ('issue_ts', pa.timestamp('ns')),
+    ('valid_ts', pa.timestamp('ns')),
+    ('value', pa.float64())
+])
+
+# Columns returned by forecast_vs_observed, in order
+FORECAST_OBSERVED_SCHEMA = pa.schema([
+    ('site_cd', pa.string()),
+    ('nwis_site_cd', pa.string()),
+    ('parameter_cd', pa.string()),
+    ('issue_ts', pa.timestamp('ns')),
+    ('valid_ts', pa.timestamp('ns')),
+    ('lead_hours', pa.int64()),
+    ('forecast_value', pa.float64()),
+    ('observed_value', pa.float64())
+])
+
+# Statistics of every file passed as the single read_parquet parameter
+_DESCRIBE_SQL = """
+SELECT
+    filename,
+    max(issue_ts) AS issue_ts,
+    count(*) AS row_cnt,
+    min(valid_ts) AS min_valid_ts,
+    max(valid_ts) AS max_valid_ts,
+    list(DISTINCT CAST(parameter_cd AS VARCHAR) ORDER BY CAST(parameter_cd AS VARCHAR))
+        AS parameter_cds
+FROM read_parquet(?, filename = true, hive_partitioning = false)
+GROUP BY filename
+"""
+
+
+def ensure_forecast_index_table(con: duckdb.DuckDBPyConnection) -> None:
+    """Create the forecast index table if it does not exist yet."""
+    con.execute(FORECAST_INDEX_DDL)
+
+
+def update_forecast_index(
+        files: Iterable[Union[str, Path]],
+        datalake_root: Union[str, Path],
+        db_path: Path = DEFAULT_DB_PATH
+        ) -> int:
+    """
+    Record freshly written forecast files in the index, replacing their old entries.
+
+    Parameters:
+        files           : Forecast files, laid out as <tier>/issue_dt=<date>/site=<cd>/<file>
+        datalake_root   : Root directory of the datalake the files belong to
+        db_path         : DuckDB file holding the index
+    Returns:
+        int: Number of index rows written.
+    """
+    root = Path(datalake_root).resolve()
+    file_info = []
+    for file_path in files:
+        relative_path = Path(file_path).resolve().relative_to(root)
+        tier, issue_dir, site_dir = relative_path.parts[:3]
+        file_info.append({
+            'filename': Path(file_path).as_posix(),
+            'file_path': relative_path.as_posix(),
+            'tier_cd': tier,
+            'site_cd': site_dir.split('=', 1)[1],
+            'issue_dt': dt.date.fromisoformat(issue_dir.split('=', 1)[1]),
+            'file_bytes': Path(file_path).stat().st_size
+        })
+    if not file_info:
+        return 0
+
+    info_table = pa.Table.from_pylist(file_info)
+    with connect_duckdb(db_path) as con:
+        ensure_forecast_index_table(con)
+        con.register('file_info', info_table)
+        con.execute(
+            f"INSERT OR REPLACE INTO {FORECAST_INDEX_TABLE} BY NAME"
+            " SELECT"
+            "  f.file_path, f.tier_cd, f.site_cd, f.issue_dt, s.issue_ts, s.row_cnt,"
+            "  s.min_valid_ts, s.max_valid_ts, s.parameter_cds, f.file_bytes,"
+            "  ? AS update_ts"
+            f" FROM file_info AS f INNER JOIN ({_DESCRIBE_SQL}) AS s USING (filename)",
+            [dt.datetime.now(), info_table['filename'].to_pylist()]
+        )
+        con.unregister('file_info')
+    return len(file_info)
+
+
+def rebuild_forecast_index(
+        datalake_root: Union[str, Path],
+        tier: str = FORECAST_TIER,
+        db_path: Path = DEFAULT_DB_PATH
+        ) -> int:
+    """
+    Re-scan every forecast file of a datalake tier and rebuild its index entries.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake
+        tier            : Datalake tier directory to scan
+        db_path         : DuckDB file holding the index
+    Returns:
+        int: Number of forecast files recorded.
+    """
+    files = sorted((Path(datalake_root) / tier).glob('issue_dt=*/site=*/*.parquet'))
+    with connect_duckdb(db_path) as con:
+        ensure_forecast_index_table(con)
+        con.execute(f"DELETE FROM {FORECAST_INDEX_TABLE} WHERE tier_cd = ?", [tier])
+
+    recorded = update_forecast_index(files, datalake_root, db_path)
+    logging.info(f"Rebuilt forecast index for {tier}: {recorded} files")
+    return recorded
+
+
+def latest_forecast(
+        sites: Optional[Union[str, List[str]]] = None,
+        parameters: Optional[Union[str, List[str]]] = None,
+        as_of: Optional[TimeLike] = None,
+        as_pandas: bool = False,
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Path = DEFAULT_DB_PATH,
+        con: Optional[duckdb.DuckDBPyConnection] = None
+        ) -> Union[pa.Table, pd.DataFrame]:
+    """
+    Latest forecast of each site. The issuance is picked from the forecast index, so only
+    one file per site is opened however many issuances the lake holds.
+
+    Parameters:
+        sites           : CBRFC forecast point(s), None for all
+        parameters      : Parameter code(s), None for all
+        as_of           : Latest issuance at or before this UTC time, None for the newest
+        as_pandas       : Return a DataFrame instead of an Arrow table
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the forecast index
+        con             : Open connection to ``db_path`` to reuse across calls
+    Returns:
+        pa.Table or pd.DataFrame: Forecasts ordered by site, parameter and valid_ts.
+    """
+    with _index_connection(db_path, con) as index_con:
+        files = _forecast_files(index_con, datalake_root, sites, parameters,
+                                issued_before=as_of, latest_only=True)
+    table = _read_forecasts(files, parameters)
+    return table.to_pandas() if as_pandas else table
+
+
+def forecast_vs_observed(
+        sites: Union[str, List[str]],
+        parameters: Optional[Union[str, List[str]]] = None,
+        issued_after: Optional[TimeLike] = None,
+        issued_before: Optional[TimeLike] = None,
+        tolerance_minutes: int = 60,
+        as_pandas: bool = False,
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Path = DEFAULT_DB_PATH,
+        crosswalk: Optional[Dict[str, str]] = None,
+        con: Optional[duckdb.DuckDBPyConnection] = None
+        ) -> Union[pa.Table, pd.DataFrame]:
+    """
+    Pair forecast values with the NWIS reading observed at their valid time.
+
+    Issuances are selected from the forecast index and the NWIS files from the partition
+    manifest, restricted to the paired gauges and the valid-time span of the selected
+    forecasts, so neither tier is scanned beyond the files that can match. Each forecast
+    value is matched to the latest reading at or before its valid time; readings older
+    than ``tolerance_minutes`` leave observed_value empty, as do future valid times.
+
+    Parameters:
+        sites           : CBRFC forecast point(s)
+        parameters      : Parameter code(s), None for all
+        issued_after    : Earliest issuance, inclusive (UTC)
+        issued_before   : Latest issuance, inclusive (UTC). Without either bound only
+                          the latest issuance of each site is compared.
+        tolerance_minutes : Maximum age of the observation matched to a valid time
+        as_pandas       : Return a DataFrame instead of an Arrow table
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the forecast index and partition manifest
+        crosswalk       : NWIS site by CBRFC forecast point. Defaults to
+                          site_list.cbrfc_nwis_sites.
+        con             : Open connection to ``db_path`` to reuse across calls
+    Returns:
+        pa.Table or pd.DataFrame: Pairs ordered by site, parameter, issue_ts and valid_ts.
+    """
+    sites = [sites] if isinstance(sites, str) else list(sites)
+    crosswalk = cbrfc_nwis_sites if crosswalk is None else crosswalk
+    paired = {site: crosswalk[site] for site in sites if site in crosswalk}
+    if len(paired) < len(sites):
+        logging.warning(
+            f"No NWIS gauge paired with {[site for site in sites if site not in paired]}"
+        )
+
+    with _index_connection(db_path, con) as index_con:
+        files = _forecast_files(
+            index_con, datalake_root, list(paired), parameters, issued_after, issued_before,
+            latest_only=issued_after is None and issued_before is None
+        )
+        if not files:
+            table = FORECAST_OBSERVED_SCHEMA.empty_table()
+            return table.to_pandas() if as_pandas else table
+        span = index_con.execute(
+            f"SELECT min(min_valid_ts), max(max_valid_ts) FROM {FORECAST_INDEX_TABLE}"
+            " WHERE list_contains(?, file_path)",
+            [[Path(file_path).resolve().relative_to(Path(datalake_root).resolve()).as_posix()
+              for file_path in files]]
+        ).fetchone()
+        observed_start = span[0] - dt.timedelta(minutes=tolerance_minutes)
+        if manifest_covers(index_con, datalake_root, 'timeseries_iv', paired.values()):
+            observed_files = manifest_files(
+                index_con, datalake_root, 'timeseries_iv',
+                site_codes=sorted(set(paired.values())), parameter_codes=parameters,
+                start_ts=observed_start, end_ts=span[1]
+            )
+        else:
+            observed_files = _listed_files(
+                datalake_root, 'timeseries_iv', set(paired.values()), observed_start, span[1]
+            )
+
+    # DuckDB's ASOF LEFT JOIN drops every row when the right side is empty, so forecasts
+    # without any reading to compare, e.g. all valid times in the future, skip the join
+    if observed_files:
+        observed_value = (
+            "CASE WHEN p.valid_ts - o.read_ts <= to_minutes($tolerance)"
+            " THEN o.value END"
+        )
+        observed_join = """
+            ASOF LEFT JOIN (
+                SELECT CAST(site_cd AS VARCHAR) AS nwis_site_cd,
+                    CAST(parameter_cd AS VARCHAR) AS parameter_cd, read_ts, value
+                FROM read_parquet($observed_files, hive_partitioning = false)
+                WHERE read_ts BETWEEN $span_start AND $span_end
+            ) AS o
+                ON p.nwis_site_cd = o.nwis_site_cd
+                AND p.parameter_cd = o.parameter_cd
+                AND p.valid_ts >= o.read_ts"""
+        params = {
+            'tolerance': tolerance_minutes,
+            'observed_files': observed_files,
+            'span_start': observed_start,
+            'span_end': span[1]
+        }
+    else:
+        observed_value, observed_join, params = "NULL::DOUBLE", "", {}
+
+    with duckdb.connect() as read_con:
+        read_con.register('forecast', _read_forecasts(files, parameters))
+        read_con.register('crosswalk', pa.table({
+            'site_cd': list(paired), 'nwis_site_cd': list(paired.values())
+        }))
+        table = read_con.execute(f"""
+            WITH paired AS (
+                SELECT f.*, x.nwis_site_cd
+                FROM forecast AS f INNER JOIN crosswalk AS x USING (site_cd)
+            )
+            SELECT
+                p.site_cd, p.nwis_site_cd, p.parameter_cd, p.issue_ts, p.valid_ts,
+                date_diff('hour', p.issue_ts, p.valid_ts) AS lead_hours,
+                p.value AS forecast_value,
+                {observed_value} AS observed_value
+            FROM paired AS p{observed_join}
+            ORDER BY p.site_cd, p.parameter_cd, p.issue_ts, p.valid_ts
+        """, params).arrow().cast(FORECAST_OBSERVED_SCHEMA)
+    return table.to_pandas() if as_pandas else table
+
+
+def _forecast_files(
+        con: duckdb.DuckDBPyConnection,
+        datalake_root: Union[str, Path],
+        sites: Optional[Union[str, List[str]]],
+        parameters: Optional[Union[str, List[str]]],
+        issued_after: Optional[TimeLike] = None,
+        issued_before: Optional[TimeLike] = None,
+        latest_only: bool = False
+        ) -> List[str]:
+    """Forecast files of the selected issuances, taken from the forecast index."""
+    if not has_table(con, FORECAST_INDEX_TABLE):
+        return []
+    filters = ["tier_cd = ?"]
+    params: list = [FORECAST_TIER]
+    if sites is not None:
+        filters.append("list_contains(?, site_cd)")
+        params.append([sites] if isinstance(sites, str) else list(sites))
+    if parameters is not None:
+        filters.append("list_has_any(parameter_cds, ?)")
+        params.append([parameters] if isinstance(parameters, str) else list(parameters))
+    if issued_after is not None:
+        filters.append("issue_ts >= ?")
+        params.append(to_utc(issued_after, None))
+    if issued_before is not None:
+        filters.append("issue_ts <= ?")
+        params.append(to_utc(issued_before, None))
+    latest = (
+        " QUALIFY row_number() OVER (PARTITION BY site_cd ORDER BY issue_ts DESC) = 1"
+        if latest_only else ""
+    )
+
+    rows = con.execute(
+        f"SELECT file_path FROM {FORECAST_INDEX_TABLE}"
+        f" WHERE {' AND '.join(filters)}{latest} ORDER BY site_cd, issue_ts",
+        params
+    ).fetchall()
+    root = Path(datalake_root)
+    return [(root / file_path).as_posix() for file_path, in rows]
+
+
+def _listed_files(
+        datalake_root: Union[str, Path],
+        tier: str,
+        site_codes: Iterable[str],
+        start_ts: dt.datetime,
+        end_ts: dt.datetime
+        ) -> List[str]:
+    """Partition files of the sites and years in the span, listed from the datalake."""
+    tier_path = Path(datalake_root) / tier
+    return [
+        file_path.as_posix()
+        for site_code in sorted(site_codes)
+        for year in range(start_ts.year, end_ts.year + 1)
+        for file_path in sorted(
+            (tier_path / f"site={site_code}" / f"year={year}").glob('*.parquet')
+        )
+    ]
+
+
+def _read_forecasts(
+        files: List[str],
+        parameters: Optional[Union[str, List[str]]]
+        ) -> pa.Table:
+    """Rows of the given forecast files, optionally limited to some parameters."""
+    if not files:
+        return FORECAST_RESULT_SCHEMA.empty_table()
+    filters = ""
+    params: list = [files]
+    if parameters is not None:
+        filters = " WHERE list_contains(?, CAST(parameter_cd AS VARCHAR))"
+        params.append([parameters] if isinstance(parameters, str) else list(parameters))
+    with duckdb.connect() as con:
+        return con.execute(
+            "SELECT site_cd, parameter_cd, issue_ts, valid_ts, value"
+            f" FROM read_parquet(?, hive_partitioning = false){filters}"
+            " ORDER BY site_cd, parameter_cd, issue_ts, valid_ts",
+            params
+        ).arrow().cast(FORECAST_RESULT_SCHEMA)
+
+
+def _index_connection(db_path: Path, con: Optional[duckdb.DuckDBPyConnection]):
+    """The caller's connection, left open, or a read-only one closed on exit."""
+    if con is not None:
+        return nullcontext(con)
+    if not Path(db_path).exists():
+        return duckdb.connect()
+    return duckdb.connect(str(db_path), read_only=True)
@@ -0,0 +1,415 @@
+import datetime as dt
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional, Union
+import duckdb
+import pyarrow as pa
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb, has_table
+
+MANIFEST_TABLE = 'partition_manifest'
+
+# Partition files written while the manifest could not be updated, one JSON line per
+# file relative to the datalake root. Readers do not trust the manifest while it lists
+# files of their tier, and the next manifest update records them.
+STALE_MANIFEST_FILE = '_manifest_stale.jsonl'
+
+# Kept in step with sql/schema.sql so the loader can create the table on first use
+MANIFEST_DDL = f"""
+CREATE TABLE IF NOT EXISTS {MANIFEST_TABLE} (
+    file_path TEXT NOT NULL PRIMARY KEY,   -- Partition file relative to the datalake root
+    tier_cd TEXT NOT NULL,                 -- Datalake tier, e.g. 'timeseries_iv'
+    site_cd TEXT NOT NULL,                 -- Hive 'site' key of the partition
+    year INTEGER NOT NULL,                 -- Hive 'year' key of the partition
+    row_cnt BIGINT NOT NULL,               -- Rows in the file
+    min_read_ts TIMESTAMP_NS,              -- Earliest reading (UTC)
+    max_read_ts TIMESTAMP_NS,              -- Latest reading (UTC)
+    parameter_cds TEXT[],                  -- Parameters present in the file
+    approved_cnt BIGINT,                   -- Rows with approval_status 'A'
+    provisional_cnt BIGINT,                -- Rows with approval_status 'P'
+    parameter_stats STRUCT(
+        parameter_cd TEXT,
+        row_cnt BIGINT,
+        min_read_ts TIMESTAMP_NS,
+        max_read_ts TIMESTAMP_NS,
+        max_approved_ts TIMESTAMP_NS,
+        min_provisional_ts TIMESTAMP_NS
+    )[],                                   -- Per-parameter summary of the file
+    file_bytes BIGINT NOT NULL,            -- File size in bytes
+    content_hash TEXT NOT NULL,            -- sha256 of the file contents
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP    -- Last update timestamp
+)
+"""
+
+# Summary statistics of every file passed as the single read_parquet parameter
+_DESCRIBE_SQL = """
+WITH per_parameter AS (
+    SELECT
+        filename,
+        CAST(parameter_cd AS VARCHAR) AS parameter_cd,
+        count(*) AS row_cnt,
+        min(read_ts) AS min_read_ts,
+        max(read_ts) AS max_read_ts,
+        max(read_ts) FILTER (WHERE approval_status = 'A') AS max_approved_ts,
+        min(read_ts) FILTER (WHERE approval_status = 'P') AS min_provisional_ts,
+        count(*) FILTER (WHERE approval_status = 'A') AS approved_cnt,
+        count(*) FILTER (WHERE approval_status = 'P') AS provisional_cnt
+    FROM read_parquet(?, filename = true, hive_partitioning = false)
+    GROUP BY filename, parameter_cd
+)
+SELECT
+    filename,
+    sum(row_cnt) AS row_cnt,
+    min(min_read_ts) AS min_read_ts,
+    max(max_read_ts) AS max_read_ts,
+    list(parameter_cd ORDER BY parameter_cd) AS parameter_cds,
+    sum(approved_cnt) AS approved_cnt,
+    sum(provisional_cnt) AS provisional_cnt,
+    list({
+        'parameter_cd': parameter_cd,
+        'row_cnt': row_cnt,
+        'min_read_ts': min_read_ts,
+        'max_read_ts': max_read_ts,
+        'max_approved_ts': max_approved_ts,
+        'min_provisional_ts': min_provisional_ts
+    } ORDER BY parameter_cd) AS parameter_stats
+FROM per_parameter
+GROUP BY filename
+"""
+
+
+def ensure_manifest_table(con: duckdb.DuckDBPyConnection) -> None:
+    """Create the partition manifest table if it does not exist yet."""
+    con.execute(MANIFEST_DDL)
+
+
+def update_manifest(
+        files: Iterable[Union[str, Path]],
+        datalake_root: Union[str, Path],
+        db_path: Path = DEFAULT_DB_PATH
+        ) -> int:
+    """
+    Record freshly written partition files in the manifest, replacing their old entries.
+
+    Parameters:
+        files           : Partition files, laid out as <tier>/site=<cd>/year=<yyyy>/<file>
+        datalake_root   : Root directory of the datalake the files belong to
+        db_path         : DuckDB file holding the manifest
+    Returns:
+        int: Number of manifest rows written.
+    """
+    datalake_root = Path(datalake_root)
+    file_info = [_file_info(Path(file_path), datalake_root) for file_path in files]
+    if not file_info:
+        return 0
+
+    info_table = pa.Table.from_pylist(file_info)
+    with connect_duckdb(db_path) as con:
+        ensure_manifest_table(con)
+        con.register('file_info', info_table)
+        con.execute(
+            f"CREATE TEMP TABLE file_stats AS {_DESCRIBE_SQL}",
+            [info_table['filename'].to_pylist()]
+        )
+        con.execute(
+            f"INSERT OR REPLACE INTO {MANIFEST_TABLE} BY NAME"
+            " SELECT"
+            "  f.file_path, f.tier_cd, f.site_cd, f.year,"
+            "  coalesce(s.row_cnt, 0) AS row_cnt, s.min_read_ts, s.max_read_ts,"
+            "  s.parameter_cds, coalesce(s.approved_cnt, 0) AS approved_cnt,"
+            "  coalesce(s.provisional_cnt, 0) AS provisional_cnt, s.parameter_stats,"
+            "  f.file_bytes, f.content_hash, ? AS update_ts"
+            " FROM file_info AS f"
+            " LEFT JOIN file_stats AS s ON s.filename = f.filename",
+            [dt.datetime.now()]
+        )
+        con.execute("DROP TABLE file_stats")
+        con.unregister('file_info')
+    return len(file_info)
+
+
+def record_partitions(
+        files: Iterable[Union[str, Path]],
+        datalake_root: Union[str, Path],
+        db_path: Path = DEFAULT_DB_PATH,
+        site_code: Optional[str] = None
+        ) -> bool:
+    """
+    Record freshly written partition files in the manifest, together with any files an
+    earlier failed update left behind. When the update fails the files are marked stale
+    instead, so readers fall back to listing the datalake and a later update or
+    ``repair_manifest`` records them.
+
+    Parameters:
+        files           : Partition files, laid out as <tier>/site=<cd>/year=<yyyy>/<file>
+        datalake_root   : Root directory of the datalake the files belong to
+        db_path         : DuckDB file holding the manifest
+        site_code       : Site the files belong to, for the log
+    Returns:
+        bool: True if the manifest is up to date with the files.
+    """
+    files = [Path(file_path) for file_path in files]
+    if not files and not stale_manifest_files(datalake_root):
+        return True
+    try:
+        update_manifest(files, datalake_root, db_path)
+        repair_manifest(datalake_root, db_path)
+        return True
+    except Exception as e:
+        mark_manifest_stale(files, datalake_root)
+        logging.error(
+            f"Partition manifest not updated for site {site_code}: {e}."
+            f" {len(files)} files marked stale in {STALE_MANIFEST_FILE}; readers list the"
+            " datalake until the next manifest update records them"
+        )
+        return False
+
+
+def mark_manifest_stale(
+        files: Iterable[Union[str, Path]],
+        datalake_root: Union[str, Path]
+        ) -> None:
+    """Note partition files the manifest does not describe correctly."""
+    root = Path(datalake_root)
+    lines = [
+        json.dumps({'file_path': _relative_path(file_path, root)}) + '\n' for file_path in files
+    ]
+    if lines:
+        root.mkdir(parents=True, exist_ok=True)
+        with open(root / STALE_MANIFEST_FILE, 'a', encoding='utf-8') as file:
+            file.writelines(lines)
+
+
+def stale_manifest_files(
+        datalake_root: Union[str, Path],
+        tier: Optional[str] = None
+        ) -> List[str]:
+    """
+    Partition files marked stale, relative to the datalake root.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake
+        tier            : Only files of this tier, None for all
+    Returns:
+        List[str]: The files, in the order they were marked, without duplicates.
+    """
+    marker = Path(datalake_root) / STALE_MANIFEST_FILE
+    if not marker.exists():
+        return []
+    return [
+        file_path for file_path in _marked_files(marker)
+        if tier is None or file_path.split('/')[0] == tier
+    ]
+
+
+def repair_manifest(datalake_root: Union[str, Path], db_path: Path = DEFAULT_DB_PATH) -> int:
+    """
+    Record the files marked stale in the manifest, or drop their entries if they are
+    gone, and clear the marker.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake
+        db_path         : DuckDB file holding the manifest
+    Returns:
+        int: Number of stale files handled.
+    """
+    root = Path(datalake_root)
+    marker = root / STALE_MANIFEST_FILE
+    if not marker.exists():
+        return 0
+    # Files marked while the repair runs land in a fresh marker and are not lost
+    claimed = marker.with_name(f"{STALE_MANIFEST_FILE}.{os.getpid()}")
+    os.replace(marker, claimed)
+    try:
+        stale = _marked_files(claimed)
+        present = [root / file_path for file_path in stale if (root / file_path).exists()]
+        update_manifest(present, root, db_path)
+        remove_from_manifest(
+            [root / file_path for file_path in stale if not (root / file_path).exists()],
+            root, db_path
+        )
+    except Exception:
+        with open(claimed, 'r', encoding='utf-8') as source, \
+                open(marker, 'a', encoding='utf-8') as target:
+            target.write(source.read())
+        raise
+    finally:
+        claimed.unlink(missing_ok=True)
+    logging.info(f"Repaired the manifest entries of {len(stale)} stale partition files")
+    return len(stale)
+
+
+def _marked_files(marker: Path) -> List[str]:
+    """Files listed in a stale marker, in the order they were marked, without duplicates."""
+    with open(marker, 'r', encoding='utf-8') as file:
+        return list(dict.fromkeys(json.loads(line)['file_path'] for line in file if line.strip()))
+
+
+def _relative_path(file_path: Union[str, Path], root: Path) -> str:
+    return Path(file_path).resolve().relative_to(root.resolve()).as_posix()
+
+
+def remove_from_manifest(
+        files: Iterable[Union[str, Path]],
+        datalake_root: Union[str, Path],
+        db_path: Path = DEFAULT_DB_PATH
+        ) -> None:
+    """
+    Drop the manifest entries of partition files that were deleted from the datalake.
+
+    Parameters:
+        files           : Deleted partition files
+        datalake_root   : Root directory of the datalake the files belonged to
+        db_path         : DuckDB file holding the manifest
+    """
+    root = Path(datalake_root).resolve()
+    file_paths = [Path(file_path).resolve().relative_to(root).as_posix() for file_path in files]
+    if not file_paths:
+        return
+    with connect_duckdb(db_path) as con:
+        ensure_manifest_table(con)
+        con.execute(
+            f"DELETE FROM {MANIFEST_TABLE} WHERE list_contains(?, file_path)", [file_paths]
+        )
+
+
+def rebuild_manifest(
+        datalake_root: Union[str, Path],
+        tier: str = 'timeseries_iv',
+        db_path: Path = DEFAULT_DB_PATH
+        ) -> int:
+    """
+    Re-scan every partition file of a datalake tier and rebuild its manifest entries.
+    Use this for lakes written before the manifest existed or after files were moved by hand.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake
+        tier            : Datalake tier directory to scan
+        db_path         : DuckDB file holding the manifest
+    Returns:
+        int: Number of partition files recorded.
+    """
+    files = sorted((Path(datalake_root) / tier).glob('site=*/year=*/*.parquet'))
+    with connect_duckdb(db_path) as con:
+        ensure_manifest_table(con)
+        con.execute(f"DELETE FROM {MANIFEST_TABLE} WHERE tier_cd = ?", [tier])
+
+    recorded = update_manifest(files, datalake_root, db_path)
+    repair_manifest(datalake_root, db_path)
+    logging.info(f"Rebuilt manifest for {tier}: {recorded} partition files")
+    return recorded
+
+
+def manifest_files(
+        con: duckdb.DuckDBPyConnection,
+        datalake_root: Union[str, Path],
+        tier: str = 'timeseries_iv',
+        site_codes: Optional[List[str]] = None,
+        parameter_codes: Optional[List[str]] = None,
+        start_ts: Optional[dt.datetime] = None,
+        end_ts: Optional[dt.datetime] = None
+        ) -> List[str]:
+    """
+    Partition files that may hold rows matching the filters, taken from the manifest
+    instead of listing the filesystem. Pass the result to ``read_parquet``.
+
+    Parameters:
+        con             : Connection to the DuckDB file holding the manifest
+        datalake_root   : Root directory of the datalake
+        tier            : Datalake tier
+        site_codes      : Only files of these sites
+        parameter_codes : Only files containing at least one of these parameters
+        start_ts        : Only files with readings at or after this UTC timestamp
+        end_ts          : Only files with readings at or before this UTC timestamp
+    Returns:
+        List[str]: Absolute file paths, ordered by site and year.
+    """
+    filters = ["tier_cd = ?"]
+    params = [tier]
+    if site_codes is not None:
+        filters.append("list_contains(?, site_cd)")
+        params.append(list(site_codes))
+    if parameter_codes is not None:
+        filters.append("list_has_any(parameter_cds, ?)")
+        params.append(list(parameter_codes))
+    if start_ts is not None:
+        filters.append("max_read_ts >= ?")
+        params.append(start_ts)
+    if end_ts is not None:
+        filters.append("min_read_ts <= ?")
+        params.append(end_ts)
+
+    rows = con.execute(
+        f"SELECT file_path FROM {MANIFEST_TABLE}"
+        f" WHERE {' AND '.join(filters)} ORDER BY site_cd, year, file_path",
+        params
+    ).fetchall()
+    root = Path(datalake_root)
+    return [(root / file_path).as_posix() for file_path, in rows]
+
+
+def manifest_covers(
+        con: duckdb.DuckDBPyConnection,
+        datalake_root: Union[str, Path],
+        tier: str,
+        site_codes: Iterable[str]
+        ) -> bool:
+    """
+    Whether the manifest behind ``con`` can be trusted to list the tier's files of some
+    sites. It cannot when the table is missing (databases older than the manifest), when
+    files of the tier are marked stale, or when a site has partitions on disk but no
+    manifest rows, e.g. a lake loaded before the manifest existed whose table only holds
+    the files written since. Readers list or prune the lake on hive keys instead.
+
+    Parameters:
+        con             : Connection to the DuckDB file holding the manifest
+        datalake_root   : Root directory of the datalake
+        tier            : Datalake tier
+        site_codes      : Sites about to be read
+    Returns:
+        bool: True when ``manifest_files`` finds every file of the sites.
+    """
+    if not has_table(con, MANIFEST_TABLE) or stale_manifest_files(datalake_root, tier):
+        return False
+    on_disk = [
+        site_code for site_code in sorted(set(site_codes))
+        if (Path(datalake_root) / tier / f"site={site_code}").is_dir()
+    ]
+    if not on_disk:
+        return True
+    recorded = {site_code for site_code, in con.execute(
+        f"SELECT DISTINCT site_cd FROM {MANIFEST_TABLE}"
+        " WHERE tier_cd = ? AND list_contains(?, site_cd)",
+        [tier, on_disk]
+    ).fetchall()}
+    unrecorded = [site_code for site_code in on_disk if site_code not in recorded]
+    if unrecorded:
+        logging.warning(
+            f"Partition manifest holds no {tier} files of sites {unrecorded}; listing the"
+            " lake instead. Run initial_load.py --rebuild-manifest to record them."
+        )
+        return False
+    return True
+
+
+def _file_info(file_path: Path, datalake_root: Path) -> dict:
+    """Hive keys, size and content hash of one partition file."""
+    relative_path = file_path.resolve().relative_to(datalake_root.resolve())
+    tier, site_dir, year_dir = relative_path.parts[:3]
+
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b''):
+            digest.update(chunk)
+
+    return {
+        'filename': file_path.as_posix(),
+        'file_path': relative_path.as_posix(),
+        'tier_cd': tier,
+        'site_cd': site_dir.split('=', 1)[1],
+        'year': int(year_dir.split('=', 1)[1]),
+        'file_bytes': file_path.stat().st_size,
+        'content_hash': digest.hexdigest()
+    }
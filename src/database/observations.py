@@ -0,0 +1,163 @@
+import datetime as dt
+import logging
+from pathlib import Path
+from typing import Dict, Tuple, Union
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb
+
+DAILY_OBSERVATION_SEQUENCE = 'daily_observation_id_seq'
+
+# Kept in step with sql/schema.sql so the loader can create the table on first use
+DAILY_OBSERVATIONS_DDL = [
+    f"CREATE SEQUENCE IF NOT EXISTS {DAILY_OBSERVATION_SEQUENCE} START 1",
+    f"""
+    CREATE TABLE IF NOT EXISTS daily_observations (
+        daily_observation_id INTEGER NOT NULL PRIMARY KEY
+            DEFAULT nextval('{DAILY_OBSERVATION_SEQUENCE}'),
+        site_parameter_id INTEGER NOT NULL,    -- Foreign key to site_parameter table
+        read_dt DATE NOT NULL,                 -- Date of the observation
+        value DECIMAL(10, 3) NOT NULL,         -- Observation value
+        create_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                   -- Creation timestamp
+        update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,                   -- Last update timestamp
+        UNIQUE (site_parameter_id, read_dt)    -- One value per site-parameter and day
+    )
+    """,
+]
+
+# (site_cd, parameter_cd) -> site_parameter_id for every configured site-parameter
+_SITE_PARAMETER_KEYS_SQL = """
+    SELECT s.site_cd, p.parameter_cd, sp.site_parameter_id
+    FROM site_parameter AS sp
+    INNER JOIN site AS s ON s.site_id = sp.site_id
+    INNER JOIN parameter AS p ON p.parameter_id = sp.parameter_id
+"""
+
+
+def ensure_daily_observations_table(con: duckdb.DuckDBPyConnection) -> None:
+    """
+    Create daily_observations and its id sequence if they do not exist yet. A table from
+    an older schema, without the (site_parameter_id, read_dt) key the upsert relies on,
+    is rebuilt with its rows, keeping the latest row of each key.
+    """
+    for ddl in DAILY_OBSERVATIONS_DDL:
+        con.execute(ddl)
+
+    keyed = con.execute(
+        "SELECT count(*) FROM duckdb_constraints()"
+        " WHERE table_name = 'daily_observations' AND constraint_type = 'UNIQUE'"
+    ).fetchone()[0]
+    if keyed:
+        return
+
+    logging.info("Rebuilding daily_observations with a (site_parameter_id, read_dt) key")
+    next_id = con.execute(
+        "SELECT coalesce(max(daily_observation_id), 0) + 1 FROM daily_observations"
+    ).fetchone()[0]
+    con.execute("ALTER TABLE daily_observations RENAME TO daily_observations_old")
+    con.execute(f"DROP SEQUENCE {DAILY_OBSERVATION_SEQUENCE}")
+    con.execute(f"CREATE SEQUENCE {DAILY_OBSERVATION_SEQUENCE} START {next_id}")
+    con.execute(DAILY_OBSERVATIONS_DDL[1])
+    con.execute("""
+        INSERT INTO daily_observations BY NAME
+        SELECT * FROM daily_observations_old
+        QUALIFY row_number() OVER (
+            PARTITION BY site_parameter_id, read_dt ORDER BY update_ts DESC
+        ) = 1
+    """)
+    con.execute("DROP TABLE daily_observations_old")
+
+
+def DailyObservationsLoader(
+        data: Union[pa.Table, pd.DataFrame],
+        db_path: Path = DEFAULT_DB_PATH,
+        date_column: str = 'read_dt',
+        value_column: str = 'value'
+        ) -> int:
+    """
+    Upsert a batch of daily values into daily_observations.
+
+    Site and parameter codes are resolved to site_parameter_id with one join against
+    the metadata tables, new rows take their id from a sequence, and the whole batch
+    is written by a single INSERT ... ON CONFLICT. Existing days are only rewritten when
+    their value changed. Rows whose site-parameter is not configured are skipped with
+    a warning; duplicate days within the batch keep one of their values.
+
+    Parameters:
+        data            : Daily values with site_cd, parameter_cd, a date and a value,
+                          e.g. daily ResampleTransformer output
+        db_path         : DuckDB file holding the metadata and daily_observations tables
+        date_column     : Column holding the local date of each value
+        value_column    : Column holding the value
+    Returns:
+        int: Number of rows inserted or updated.
+    """
+    with connect_duckdb(db_path) as con:
+        ensure_daily_observations_table(con)
+        con.register('daily_input', data)
+        con.execute("BEGIN TRANSACTION")
+        try:
+            con.execute(f"""
+                CREATE OR REPLACE TEMP TABLE daily_batch AS
+                SELECT
+                    CAST(d.site_cd AS VARCHAR) AS site_cd,
+                    CAST(d.parameter_cd AS VARCHAR) AS parameter_cd,
+                    CAST(d."{date_column}" AS DATE) AS read_dt,
+                    CAST(any_value(d."{value_column}") AS DECIMAL(10, 3)) AS value
+                FROM daily_input AS d
+                WHERE d."{value_column}" IS NOT NULL
+                    AND NOT isnan(CAST(d."{value_column}" AS DOUBLE))
+                GROUP BY ALL
+            """)
+            unresolved = con.execute(f"""
+                SELECT count(*), list(DISTINCT b.site_cd || '/' || b.parameter_cd)[:5]
+                FROM daily_batch AS b
+                ANTI JOIN ({_SITE_PARAMETER_KEYS_SQL}) AS k USING (site_cd, parameter_cd)
+            """).fetchone()
+            if unresolved[0]:
+                logging.warning(
+                    f"Skipping {unresolved[0]} daily values without a site_parameter,"
+                    f" e.g. {unresolved[1]}"
+                )
+
+            written = con.execute(f"""
+                INSERT INTO daily_observations (site_parameter_id, read_dt, value)
+                SELECT k.site_parameter_id, b.read_dt, b.value
+                FROM daily_batch AS b
+                INNER JOIN ({_SITE_PARAMETER_KEYS_SQL}) AS k USING (site_cd, parameter_cd)
+                ON CONFLICT (site_parameter_id, read_dt) DO UPDATE
+                SET value = excluded.value, update_ts = now()
+                WHERE daily_observations.value IS DISTINCT FROM excluded.value
+            """).fetchone()[0]
+
+            con.execute("DROP TABLE daily_batch")
+            con.execute("COMMIT")
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+        finally:
+            con.unregister('daily_input')
+
+    logging.info(f"Upserted {written} daily observations")
+    return written
+
+
+def daily_high_water_marks(db_path: Path = DEFAULT_DB_PATH) -> Dict[Tuple[str, str], dt.date]:
+    """
+    Latest date in daily_observations of every (site_cd, parameter_cd) series.
+
+    Parameters:
+        db_path         : DuckDB file holding the metadata and daily_observations tables
+    Returns:
+        Dict[Tuple[str, str], dt.date]: Latest read_dt by site and parameter code.
+    """
+    with connect_duckdb(db_path) as con:
+        ensure_daily_observations_table(con)
+        rows = con.execute(f"""
+            SELECT k.site_cd, k.parameter_cd, max(d.read_dt)
+            FROM daily_observations AS d
+            INNER JOIN ({_SITE_PARAMETER_KEYS_SQL}) AS k USING (site_parameter_id)
+            GROUP BY k.site_cd, k.parameter_cd
+        """).fetchall()
+    return {(site_code, parameter_code): read_dt for site_code, parameter_code, read_dt in rows}
@@ -0,0 +1,221 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+import duckdb
+import pandas as pd
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb
+from src.etl.scheduler import FetchTask
+from src.utils.helpers import join_codes
+
+RUN_LEDGER_TABLE = 'run_ledger'
+
+# Kept in step with sql/schema.sql so a run can create the table on first use
+RUN_LEDGER_DDL = f"""
+CREATE TABLE IF NOT EXISTS {RUN_LEDGER_TABLE} (
+    run_id TEXT NOT NULL,                  -- Load the unit belongs to, e.g. 'initial_load_<ts>'
+    unit_key TEXT NOT NULL,                -- service|site|parameter|start|end of the fetch task
+    service_cd TEXT,                       -- Request service, e.g. 'iv', 'dv', 'DY'
+    site_cd TEXT NOT NULL,                 -- Site code(s) of the unit, comma separated for batches
+    parameter_cd TEXT,                     -- Parameter code(s) of the unit, comma separated
+    start_dt DATE,                         -- First date of the request window
+    end_dt DATE,                           -- Last date of the request window
+    status_cd TEXT NOT NULL,               -- 'pending', 'done' or 'failed'
+    partition_paths TEXT[],                -- Partition files holding the unit, relative to the lake
+    error_tx TEXT,                         -- Why the unit failed
+    update_ts TIMESTAMP DEFAULT CURRENT_TIMESTAMP,   -- Last status change
+    PRIMARY KEY (run_id, unit_key)
+)
+"""
+
+
+def ensure_run_ledger_table(con: duckdb.DuckDBPyConnection) -> None:
+    """Create the run_ledger table if it does not exist yet."""
+    con.execute(RUN_LEDGER_DDL)
+
+
+def unit_key(task: FetchTask) -> str:
+    """Key of a fetch task in the ledger; the same task planned again gets the same key."""
+    return '|'.join(join_codes(field) or '' for field in (
+        task.service_code, task.site_code, task.parameter_code, task.start_date, task.end_date
+    ))
+
+
+def latest_run_id(prefix: str, db_path: Path = DEFAULT_DB_PATH) -> Optional[str]:
+    """
+    Most recently started run in the ledger whose id starts with ``prefix``.
+
+    Parameters:
+        prefix          : Start of the run id, e.g. 'initial_load'
+        db_path         : DuckDB file holding the run_ledger table
+    Returns:
+        Optional[str]: The run id, None when the ledger has no such run.
+    """
+    with connect_duckdb(db_path) as con:
+        ensure_run_ledger_table(con)
+        row = con.execute(f"""
+            SELECT run_id FROM {RUN_LEDGER_TABLE}
+            WHERE starts_with(run_id, ?)
+            GROUP BY run_id
+            ORDER BY min(update_ts) DESC, run_id DESC
+            LIMIT 1
+        """, [prefix]).fetchone()
+    return row[0] if row else None
+
+
+class RunLedger:
+    """
+    Persistent record of the units of work of one load, so an interrupted load can be
+    resumed where it stopped. A unit is one fetch task: a site (or batch of sites), its
+    parameters and a request window.
+
+    Units are planned as 'pending', become 'done' once their data is on disk and in the
+    partition manifest, and 'failed' when their request gave up. Resuming a run skips
+    its done units and redoes everything else; loads merge, so redoing a unit whose data
+    was partly written is safe.
+
+    Parameters:
+        run_id (str): Identifier of the load, kept when the load is resumed.
+        datalake_root (Path): Datalake root that partition paths are recorded relative to.
+        db_path (Path): DuckDB file holding the run_ledger table.
+    """
+
+    def __init__(
+            self,
+            run_id: str,
+            datalake_root: Union[str, Path],
+            db_path: Path = DEFAULT_DB_PATH
+            ):
+        self.run_id = run_id
+        self.db_path = db_path
+        self.datalake_root = Path(datalake_root)
+
+    def plan(self, tasks: Iterable[FetchTask]) -> List[FetchTask]:
+        """
+        Record the tasks of a load as pending units, keeping the status of units already
+        in the ledger, and return the tasks that are not done yet.
+
+        Parameters:
+            tasks           : Every task of the load, in fetch order
+        Returns:
+            List[FetchTask]: The tasks still to run, in the same order.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return []
+        units = pd.DataFrame({
+            'unit_key': [unit_key(task) for task in tasks],
+            'service_cd': [task.service_code for task in tasks],
+            'site_cd': [join_codes(task.site_code) for task in tasks],
+            'parameter_cd': [join_codes(task.parameter_code) for task in tasks],
+            'start_dt': pd.to_datetime([task.start_date for task in tasks]).date,
+            'end_dt': pd.to_datetime([task.end_date for task in tasks]).date,
+        })
+
+        with connect_duckdb(self.db_path) as con:
+            ensure_run_ledger_table(con)
+            con.register('planned_units', units)
+            con.execute(f"""
+                INSERT INTO {RUN_LEDGER_TABLE}
+                    (run_id, unit_key, service_cd, site_cd, parameter_cd, start_dt, end_dt,
+                     status_cd)
+                SELECT DISTINCT ON (unit_key) ?, unit_key, service_cd, site_cd, parameter_cd,
+                    start_dt, end_dt, 'pending'
+                FROM planned_units
+                ON CONFLICT DO NOTHING
+            """, [self.run_id])
+            done = {row[0] for row in con.execute(f"""
+                SELECT l.unit_key FROM {RUN_LEDGER_TABLE} AS l
+                SEMI JOIN planned_units AS p USING (unit_key)
+                WHERE l.run_id = ? AND l.status_cd = 'done'
+            """, [self.run_id]).fetchall()}
+            con.unregister('planned_units')
+
+        if done:
+            logging.info(
+                f"Run {self.run_id}: {len(done)} of {len(tasks)} units already done, skipping them"
+            )
+        return [task for task in tasks if unit_key(task) not in done]
+
+    def mark_done(
+            self,
+            tasks: Iterable[FetchTask],
+            partitions: Optional[Dict[str, List[Path]]] = None
+            ) -> None:
+        """
+        Mark units done, with the partition files holding their data.
+
+        Parameters:
+            tasks           : Units whose data is on disk
+            partitions      : Partition files by unit_key, for units that wrote any
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return
+        rows = []
+        for task in tasks:
+            key = unit_key(task)
+            paths = [
+                Path(path).resolve().relative_to(self.datalake_root.resolve()).as_posix()
+                for path in (partitions or {}).get(key, [])
+            ]
+            rows.append((key, paths or None))
+        self._update(
+            "status_cd = 'done', partition_paths = u.partition_paths, error_tx = NULL",
+            pd.DataFrame(rows, columns=['unit_key', 'partition_paths'])
+        )
+
+    def mark_failed(self, task: FetchTask, error: str) -> None:
+        """Mark a unit failed; a resumed run tries it again."""
+        self._update(
+            "status_cd = 'failed', error_tx = u.error_tx",
+            pd.DataFrame([(unit_key(task), error)], columns=['unit_key', 'error_tx'])
+        )
+
+    def _update(self, assignments: str, units: pd.DataFrame) -> None:
+        with connect_duckdb(self.db_path) as con:
+            ensure_run_ledger_table(con)
+            con.register('unit_updates', units)
+            con.execute(f"""
+                UPDATE {RUN_LEDGER_TABLE} AS l
+                SET {assignments}, update_ts = now()
+                FROM unit_updates AS u
+                WHERE l.run_id = ? AND l.unit_key = u.unit_key
+            """, [self.run_id])
+            con.unregister('unit_updates')
+
+    def checkpoint(
+            self,
+            results: Iterable[Tuple[FetchTask, Optional[pd.DataFrame]]],
+            failed: Optional[Iterable] = None
+            ) -> Iterator[Tuple[FetchTask, Optional[pd.DataFrame]]]:
+        """
+        Pass fetch results to a loader that writes each result before asking for the next
+        (e.g. HDBLoader, NWISDailyLoader), marking a unit done once the loader has moved
+        past it. Units whose request gave up, i.e. are in ``failed`` (a DeadLetterQueue),
+        are marked failed instead. A unit the loader raised on stays pending.
+        """
+        previous = None
+        for task, df in results:
+            if previous is not None:
+                self._settle(previous, failed)
+            yield task, df
+            previous = (task, df)
+        if previous is not None:
+            self._settle(previous, failed)
+
+    def _settle(self, result: Tuple[FetchTask, Optional[pd.DataFrame]], failed) -> None:
+        task, df = result
+        if df is None and failed is not None and task in failed:
+            self.mark_failed(task, 'Request failed after retries')
+        else:
+            self.mark_done([task])
+
+    def progress(self) -> Dict[str, int]:
+        """Number of units of the run by status."""
+        with connect_duckdb(self.db_path) as con:
+            ensure_run_ledger_table(con)
+            return dict(con.execute(
+                f"SELECT status_cd, count(*) FROM {RUN_LEDGER_TABLE}"
+                " WHERE run_id = ? GROUP BY status_cd",
+                [self.run_id]
+            ).fetchall())
@@ -0,0 +1,107 @@
+import logging
+from pathlib import Path
+from typing import Iterable, List, Optional
+import duckdb
+import pandas as pd
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb
+
+RUN_METRICS_TABLE = 'run_metrics'
+
+# Kept in step with sql/schema.sql so a run can create the table on first use
+RUN_METRICS_DDL = f"""
+CREATE TABLE IF NOT EXISTS {RUN_METRICS_TABLE} (
+    run_id TEXT NOT NULL,                  -- Run of the measurement, e.g. 'initial_load_<ts>'
+    stage_cd TEXT NOT NULL,                -- 'extract', 'transform', 'load', 'aggregates', 'views'
+    service_cd TEXT,                       -- Request service, e.g. 'iv', 'dv', 'DY', 'forecast'
+    site_cd TEXT,                          -- Site code(s) of the unit, comma separated for batches
+    parameter_cd TEXT,                     -- Parameter code(s) of the unit, comma separated
+    start_dt DATE,                         -- First date of the request window
+    end_dt DATE,                           -- Last date of the request window
+    start_ts TIMESTAMP NOT NULL,           -- When the stage started (UTC)
+    elapsed_sec DOUBLE NOT NULL,           -- Wall time of the stage in seconds
+    row_cnt BIGINT,                        -- Rows received, transformed or loaded
+    byte_cnt BIGINT,                       -- Bytes received, transformed or written
+    retry_cnt INTEGER,                     -- Request retries
+    peak_rss_byte_cnt BIGINT,              -- Peak resident memory of the process during the stage
+    status_cd TEXT NOT NULL,               -- 'ok' or 'failed'
+    error_tx TEXT                          -- Error of a failed stage
+)
+"""
+
+# Columns of a run_metrics row, in table order
+RUN_METRICS_COLUMNS = [
+    'run_id', 'stage_cd', 'service_cd', 'site_cd', 'parameter_cd', 'start_dt', 'end_dt',
+    'start_ts', 'elapsed_sec', 'row_cnt', 'byte_cnt', 'retry_cnt', 'peak_rss_byte_cnt',
+    'status_cd', 'error_tx'
+]
+
+
+def ensure_run_metrics_table(con: duckdb.DuckDBPyConnection) -> None:
+    """Create the run_metrics table if it does not exist yet."""
+    con.execute(RUN_METRICS_DDL)
+
+
+def write_run_metrics(records: Iterable[dict], db_path: Path = DEFAULT_DB_PATH) -> int:
+    """
+    Append stage measurements to run_metrics.
+
+    Parameters:
+        records         : Rows keyed by RUN_METRICS_COLUMNS, e.g. RunMetrics.records
+        db_path         : DuckDB file holding the run_metrics table
+    Returns:
+        int: Number of rows written.
+    """
+    df = pd.DataFrame(list(records), columns=RUN_METRICS_COLUMNS)
+    if df.empty:
+        return 0
+    df['start_ts'] = pd.to_datetime(df['start_ts'])
+    for column in ('start_dt', 'end_dt'):
+        df[column] = pd.to_datetime(df[column]).dt.date
+
+    with connect_duckdb(db_path) as con:
+        ensure_run_metrics_table(con)
+        con.register('metrics_input', df)
+        con.execute(f"INSERT INTO {RUN_METRICS_TABLE} BY NAME SELECT * FROM metrics_input")
+        con.unregister('metrics_input')
+
+    logging.info(f"Recorded {len(df)} stage measurements in {RUN_METRICS_TABLE}")
+    return len(df)
+
+
+def site_throughput(
+        db_path: Path = DEFAULT_DB_PATH,
+        stage_cd: Optional[str] = None,
+        run_ids: Optional[List[str]] = None
+        ) -> pd.DataFrame:
+    """
+    Seconds, rows and rows per second of every (run, stage, site), slowest first, to
+    trend throughput across runs and find the sites that dominate a run.
+
+    Parameters:
+        db_path         : DuckDB file holding the run_metrics table
+        stage_cd        : Only this stage, None for all
+        run_ids         : Only these runs, None for all
+    Returns:
+        pd.DataFrame: run_id, stage_cd, site_cd, unit_cnt, elapsed_sec, row_cnt,
+                      byte_cnt, retry_cnt, rows_per_sec and failed_cnt.
+    """
+    with connect_duckdb(db_path) as con:
+        ensure_run_metrics_table(con)
+        return con.execute(f"""
+            SELECT
+                run_id,
+                stage_cd,
+                site_cd,
+                count(*) AS unit_cnt,
+                sum(elapsed_sec) AS elapsed_sec,
+                sum(row_cnt) AS row_cnt,
+                sum(byte_cnt) AS byte_cnt,
+                sum(retry_cnt) AS retry_cnt,
+                sum(row_cnt) / nullif(sum(elapsed_sec), 0) AS rows_per_sec,
+                count(*) FILTER (WHERE status_cd = 'failed') AS failed_cnt
+            FROM {RUN_METRICS_TABLE}
+            WHERE (CAST(? AS TEXT) IS NULL OR stage_cd = ?)
+                AND (CAST(? AS TEXT[]) IS NULL OR list_contains(?, run_id))
+            GROUP BY run_id, stage_cd, site_cd
+            ORDER BY elapsed_sec DESC
+        """, [stage_cd, stage_cd, run_ids, run_ids]).df()
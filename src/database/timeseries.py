@@ -0,0 +1,262 @@
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple, Union
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.manifest import manifest_covers, manifest_files
+from src.etl.loaders import DEFAULT_DATALAKE_PATH
+from src.utils.helpers import TimeLike, to_utc
+
+# Rows per batch handed out by the streaming readers
+DEFAULT_BATCH_ROWS = 1_000_000
+
+# Columns returned by read_timeseries, in order
+TIMESERIES_RESULT_SCHEMA = pa.schema([
+    ('site_cd', pa.string()),
+    ('parameter_cd', pa.string()),
+    ('read_ts', pa.timestamp('ns')),
+    ('value', pa.float64()),
+    ('approval_status', pa.string())
+])
+
+
+def read_timeseries(
+        sites: Union[str, List[str]],
+        parameters: Optional[Union[str, List[str]]] = None,
+        start: Optional[TimeLike] = None,
+        end: Optional[TimeLike] = None,
+        approval: Optional[str] = None,
+        tz: Optional[str] = None,
+        as_pandas: bool = False,
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        con: Optional[duckdb.DuckDBPyConnection] = None,
+        tier: str = 'timeseries_iv'
+        ) -> Union[pa.Table, pd.DataFrame]:
+    """
+    Read readings of a datalake tier, ``timeseries_iv`` by default, back from the lake.
+
+    Only the partition files that can hold matching rows are opened: the partition
+    manifest is consulted for sites, parameters and time range, or without a manifest
+    the site and year directory keys are pruned. The remaining predicates are pushed
+    into the parquet scan, where row-group statistics on the parameter/time sort order
+    skip everything else. Time zones are converted on the result rows only.
+
+    Parameters:
+        sites           : Site number(s)
+        parameters      : Parameter code(s), None for all
+        start           : Earliest reading, inclusive
+        end             : Latest reading, exclusive
+        approval        : Only rows with this approval status, 'A' or 'P'
+        tz              : Time zone of read_ts in the result and of naive start/end,
+                          None for naive UTC as stored
+        as_pandas       : Return a DataFrame instead of an Arrow table
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the partition manifest, None to prune on
+                          the hive directory keys instead
+        con             : Open connection to ``db_path`` to reuse across calls; opening
+                          the file dominates the cost of a point query
+        tier            : Datalake tier, e.g. 'timeseries_hdb' for HDB series
+    Returns:
+        pa.Table or pd.DataFrame: Readings ordered by site, parameter and read_ts.
+    """
+    own_connection = con is None
+    con = con or _connect(db_path)
+    try:
+        query = _timeseries_query(
+            con, sites, parameters, start, end, approval, tz, datalake_root,
+            use_manifest=manifest_covers(con, datalake_root, tier, _as_list(sites)),
+            tier=tier
+        )
+        if query is None:
+            table = TIMESERIES_RESULT_SCHEMA.empty_table()
+        else:
+            sql, params = query
+            table = con.execute(
+                f"{sql} ORDER BY site_cd, parameter_cd, read_ts", params
+            ).arrow().cast(TIMESERIES_RESULT_SCHEMA)
+    finally:
+        if own_connection:
+            con.close()
+
+    table = table.cast(_result_schema(tz))
+    return table.to_pandas() if as_pandas else table
+
+
+def iter_timeseries(
+        sites: Union[str, List[str]],
+        parameters: Optional[Union[str, List[str]]] = None,
+        start: Optional[TimeLike] = None,
+        end: Optional[TimeLike] = None,
+        approval: Optional[str] = None,
+        tz: Optional[str] = None,
+        as_pandas: bool = False,
+        batch_size: int = DEFAULT_BATCH_ROWS,
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        con: Optional[duckdb.DuckDBPyConnection] = None,
+        tier: str = 'timeseries_iv'
+        ) -> Iterator[Union[pa.RecordBatch, pd.DataFrame]]:
+    """
+    Stream readings of a datalake tier in batches of at most ``batch_size`` rows, with the
+    same filters and pruning as ``read_timeseries``. Memory use is bounded by the batch
+    size, not by the length of the history.
+
+    Batches follow partition file order, site then year, and within a file parameter
+    then read_ts; there is no global sort, which would hold the whole result in memory.
+
+    Parameters:
+        sites           : Site number(s)
+        parameters      : Parameter code(s), None for all
+        start           : Earliest reading, inclusive
+        end             : Latest reading, exclusive
+        approval        : Only rows with this approval status, 'A' or 'P'
+        tz              : Time zone of read_ts in the batches and of naive start/end
+        as_pandas       : Yield DataFrames instead of Arrow record batches
+        batch_size      : Maximum rows per batch
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the partition manifest, None to prune on
+                          the hive directory keys instead
+        con             : Open connection to ``db_path`` to reuse across calls
+        tier            : Datalake tier
+    Returns:
+        Iterator[pa.RecordBatch or pd.DataFrame]: One item per batch.
+    """
+    own_connection = con is None
+    con = con or _connect(db_path)
+    try:
+        query = _timeseries_query(
+            con, sites, parameters, start, end, approval, tz, datalake_root,
+            use_manifest=manifest_covers(con, datalake_root, tier, _as_list(sites)),
+            tier=tier
+        )
+        if query is None:
+            return
+        schema = _result_schema(tz)
+        for batch in stream_query(*query, batch_size=batch_size, con=con):
+            batch = batch.cast(TIMESERIES_RESULT_SCHEMA).cast(schema)
+            yield batch.to_pandas() if as_pandas else batch
+    finally:
+        if own_connection:
+            con.close()
+
+
+def stream_query(
+        sql: str,
+        params: Optional[list] = None,
+        batch_size: int = DEFAULT_BATCH_ROWS,
+        as_pandas: bool = False,
+        con: Optional[duckdb.DuckDBPyConnection] = None
+        ) -> Iterator[Union[pa.RecordBatch, pd.DataFrame]]:
+    """
+    Run any query, e.g. over ``read_parquet`` of lake files, and yield its result in
+    batches instead of materializing it. The query runs on ``con`` or on a private
+    in-memory connection that is closed when the iterator is exhausted or closed.
+
+    Parameters:
+        sql             : Query to run
+        params          : Query parameters
+        batch_size      : Maximum rows per batch
+        as_pandas       : Yield DataFrames instead of Arrow record batches
+        con             : Connection to run the query on
+    Returns:
+        Iterator[pa.RecordBatch or pd.DataFrame]: One item per batch.
+    """
+    own_connection = con is None
+    con = con or duckdb.connect()
+    try:
+        reader = con.execute(sql, params or []).fetch_record_batch(batch_size)
+        for batch in reader:
+            if batch.num_rows:
+                yield batch.to_pandas() if as_pandas else batch
+    finally:
+        if own_connection:
+            con.close()
+
+
+def _timeseries_query(
+        con: duckdb.DuckDBPyConnection,
+        sites: Union[str, List[str]],
+        parameters: Optional[Union[str, List[str]]],
+        start: Optional[TimeLike],
+        end: Optional[TimeLike],
+        approval: Optional[str],
+        tz: Optional[str],
+        datalake_root: Union[str, Path],
+        use_manifest: bool,
+        tier: str = 'timeseries_iv'
+        ) -> Optional[Tuple[str, list]]:
+    """Unordered SELECT and parameters for a timeseries read, None when no file matches."""
+    sites = _as_list(sites)
+    if isinstance(parameters, str):
+        parameters = [parameters]
+    start_ts = to_utc(start, tz)
+    end_ts = to_utc(end, tz)
+
+    filters = ["site_cd IN (" + ", ".join("?" for _ in sites) + ")"]
+    params: list = list(sites)
+    if parameters is not None:
+        filters.append("parameter_cd IN (" + ", ".join("?" for _ in parameters) + ")")
+        params.extend(parameters)
+    if start_ts is not None:
+        filters.append("read_ts >= ?")
+        params.append(start_ts)
+    if end_ts is not None:
+        filters.append("read_ts < ?")
+        params.append(end_ts)
+    if approval is not None:
+        filters.append("approval_status = ?")
+        params.append(approval)
+
+    if use_manifest:
+        files = manifest_files(
+            con, datalake_root, tier, site_codes=sites, parameter_codes=parameters,
+            start_ts=start_ts, end_ts=end_ts
+        )
+        if not files:
+            return None
+        source = "read_parquet(?, hive_partitioning = false)"
+        params = [files] + params
+    else:
+        # Same predicates on the typed directory keys, so DuckDB skips whole partitions
+        tier_path = Path(datalake_root) / tier
+        if not any(tier_path.glob('site=*/year=*/*.parquet')):
+            return None
+        source = (
+            "read_parquet(?, hive_partitioning = true,"
+            " hive_types = {'site': VARCHAR, 'year': BIGINT})"
+        )
+        filters.insert(0, "site IN (" + ", ".join("?" for _ in sites) + ")")
+        params = [(tier_path / 'site=*' / 'year=*' / '*.parquet').as_posix()] + sites + params
+        if start_ts is not None:
+            filters.append(f"year >= {start_ts.year}")
+        if end_ts is not None:
+            filters.append(f"year <= {end_ts.year}")
+
+    sql = (
+        "SELECT site_cd, parameter_cd, read_ts, value, approval_status"
+        f" FROM {source} WHERE {' AND '.join(filters)}"
+    )
+    return sql, params
+
+
+def _connect(db_path: Optional[Path]) -> duckdb.DuckDBPyConnection:
+    """Read-only connection to the manifest database, or in-memory without one."""
+    if db_path is not None and Path(db_path).exists():
+        return duckdb.connect(str(db_path), read_only=True)
+    return duckdb.connect()
+
+
+def _as_list(codes: Union[str, List[str]]) -> List[str]:
+    """Codes as a list; a single code may be passed as a string."""
+    return [codes] if isinstance(codes, str) else list(codes)
+
+
+def _result_schema(tz: Optional[str]) -> pa.Schema:
+    """Result schema with read_ts labelled in ``tz``. Arrow keeps zoned timestamps in UTC,
+    so casting to it only relabels the column."""
+    if tz is None:
+        return TIMESERIES_RESULT_SCHEMA
+    column = TIMESERIES_RESULT_SCHEMA.get_field_index('read_ts')
+    return TIMESERIES_RESULT_SCHEMA.set(column, pa.field('read_ts', pa.timestamp('ns', tz=tz)))
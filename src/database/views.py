@@ -0,0 +1,57 @@
+import logging
+from pathlib import Path
+from string import Template
+from typing import List, Union
+import duckdb
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb
+
+VIEWS_FILE = Path(__file__).resolve().parents[2] / 'sql' / 'views.sql'
+
+
+def render_views(
+        datalake_root: Union[str, Path],
+        views_file: Union[str, Path] = VIEWS_FILE
+        ) -> List[str]:
+    """
+    View definitions of a views file with ``${datalake_root}`` bound to a datalake root.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake the views read
+        views_file      : Templated .sql file of CREATE VIEW statements
+    Returns:
+        List[str]: One rendered statement per view.
+    """
+    with open(views_file, 'r') as file:
+        template = Template(file.read())
+    sql_script = template.substitute(datalake_root=Path(datalake_root).resolve().as_posix())
+    return [stmt.strip() for stmt in sql_script.split(';') if stmt.strip()]
+
+
+def create_views(
+        datalake_root: Union[str, Path],
+        db_path: Path = DEFAULT_DB_PATH,
+        views_file: Union[str, Path] = VIEWS_FILE
+        ) -> int:
+    """
+    Create or replace the views of ``sql/views.sql`` against the given datalake root.
+
+    DuckDB binds ``read_parquet`` when a view is created, so a view over a datalake tier
+    that has no files yet is skipped with a warning; run this again after the first load.
+
+    Parameters:
+        datalake_root   : Root directory of the datalake the views read
+        db_path         : DuckDB file to create the views in
+        views_file      : Templated .sql file of CREATE VIEW statements
+    Returns:
+        int: Number of views created.
+    """
+    created = 0
+    with connect_duckdb(db_path) as con:
+        for stmt in render_views(datalake_root, views_file):
+            try:
+                con.execute(stmt)
+                created += 1
+            except duckdb.IOException as e:
+                view_name = stmt.split(' AS', 1)[0].split()[-1]
+                logging.warning(f"Skipped view {view_name}, its datalake files are missing: {e}")
+    return created
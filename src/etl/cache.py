@@ -0,0 +1,212 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Tuple, Union
+import pandas as pd
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv is optional
+
+# Default location of the raw response cache (can be overridden)
+ENV_DATA_PATH = os.getenv('DATA_STORAGE_PATH')
+if ENV_DATA_PATH:
+    DEFAULT_CACHE_PATH = Path(ENV_DATA_PATH) / 'cache' / 'raw_responses'
+else:
+    DEFAULT_CACHE_PATH = Path(__file__).resolve().parents[1] / 'data' / 'cache' / 'raw_responses'
+
+INDEX_FILE = 'index.json'
+INDEX_WRITE_INTERVAL = 100  # Puts between index writes; call flush() when a run ends
+
+
+class ResponseCache:
+    """
+    Content-addressed on-disk cache of raw extractor responses.
+
+    Responses are stored as zstd-compressed parquet files keyed by
+    (service, site, parameter, window). Windows whose readings are all approved ('A')
+    are immutable and kept until evicted; provisional or empty windows expire after
+    ``provisional_ttl`` seconds. When the cache grows past ``max_bytes`` the least
+    recently used entries are evicted. Safe to share between fetch threads.
+
+    Parameters:
+        root (Path): Cache directory.
+        max_bytes (int): Size budget for cached files.
+        provisional_ttl (float): Lifetime in seconds of provisional and empty windows.
+    """
+
+    def __init__(
+            self,
+            root: Union[str, Path] = DEFAULT_CACHE_PATH,
+            max_bytes: int = 5 * 1024 ** 3,
+            provisional_ttl: float = 12 * 3600
+            ):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.provisional_ttl = provisional_ttl
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._index = self._read_index()
+        self._bytes = sum(entry['bytes'] for entry in self._index.values())
+        self._unsaved = 0
+        self._evict()
+
+    @staticmethod
+    def make_key(
+            service_code: str,
+            site_code,
+            parameter_code,
+            start_date: Optional[str],
+            end_date: Optional[str]
+            ) -> str:
+        """Hash a request into a cache key. Site and parameter lists are order-insensitive."""
+        if isinstance(site_code, (list, tuple)):
+            site_code = ','.join(sorted(site_code))
+        if isinstance(parameter_code, (list, tuple)):
+            parameter_code = ','.join(sorted(parameter_code))
+        raw = '|'.join(str(part) for part in (
+            service_code, site_code, parameter_code, start_date, end_date
+        ))
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Tuple[bool, Optional[pd.DataFrame]]:
+        """
+        Look up a cached response.
+
+        Returns:
+            Tuple[bool, Optional[pd.DataFrame]]: (found, data). ``data`` is None for a
+            cached empty response.
+        """
+        with self._lock:
+            entry = self._index.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return False, None
+            self.hits += 1
+            entry['accessed'] = time.time()
+
+        if entry['empty']:
+            return True, None
+        try:
+            return True, pd.read_parquet(self._path(key))
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cache entry {key}: {e}")
+            with self._lock:
+                self._remove(key)
+                self.hits -= 1
+                self.misses += 1
+            return False, None
+
+    def put(self, key: str, df: Optional[pd.DataFrame]) -> None:
+        """Store a response. ``None`` or an empty frame is cached as an empty response."""
+        empty = df is None or df.empty
+        approved = not empty and _is_approved(df)
+        size = 0
+
+        if not empty:
+            path = self._path(key)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+            df.to_parquet(tmp_path, compression='zstd')
+            os.replace(tmp_path, path)
+            size = path.stat().st_size
+
+        now = time.time()
+        with self._lock:
+            self._remove(key, keep_file=not empty)
+            self._bytes += size
+            self._index[key] = {
+                'bytes': size,
+                'created': now,
+                'accessed': now,
+                'approved': approved,
+                'empty': empty
+            }
+            self._evict()
+            self._unsaved += 1
+            if self._unsaved >= INDEX_WRITE_INTERVAL:
+                self._write_index()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size of the cache."""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._index),
+                'bytes': self._bytes
+            }
+
+    def flush(self) -> None:
+        """Persist the index, including access times recorded by cache hits."""
+        with self._lock:
+            self._write_index()
+
+    def _expired(self, entry: dict) -> bool:
+        return not entry['approved'] and time.time() - entry['created'] > self.provisional_ttl
+
+    def _evict(self) -> None:
+        """Drop least recently used entries until the cache fits its size budget."""
+        if self._bytes <= self.max_bytes:
+            return
+        for key in sorted(self._index, key=lambda k: self._index[k]['accessed']):
+            if self._bytes <= self.max_bytes:
+                break
+            self._remove(key)
+            self.evictions += 1
+
+    def _remove(self, key: str, keep_file: bool = False) -> None:
+        entry = self._index.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry['bytes']
+        if not keep_file:
+            self._path(key).unlink(missing_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.parquet"
+
+    def _read_index(self) -> dict:
+        index_path = self.root / INDEX_FILE
+        if not index_path.exists():
+            return {}
+        try:
+            with open(index_path, 'r') as file:
+                return json.load(file)
+        except Exception as e:
+            logging.warning(f"Cache index {index_path} is unreadable, starting empty: {e}")
+            return {}
+
+    def _write_index(self) -> None:
+        self._unsaved = 0
+        index_path = self.root / INDEX_FILE
+        tmp_path = index_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as file:
+            json.dump(self._index, file)
+        os.replace(tmp_path, index_path)
+
+
+def _is_approved(df: pd.DataFrame) -> bool:
+    """True when every qualification code in a raw NWIS response is approved ('A')."""
+    code_cols = [col for col in df.columns if col.endswith('cd')]
+    if not code_cols:
+        return False
+    for col in code_cols:
+        codes = df[col].dropna().astype(str)
+        if not codes.str.startswith('A').all():
+            return False
+    return True
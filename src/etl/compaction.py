@@ -0,0 +1,215 @@
+import logging
+import shutil
+import time
+from pathlib import Path
+from typing import List, Optional, Union
+import duckdb
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.manifest import mark_manifest_stale, remove_from_manifest
+from src.etl.loaders import (
+    DEFAULT_DATALAKE_PATH,
+    TIMESERIES_SELECT,
+    WRITE_PROFILES,
+    DataLakeLoader,
+    default_profile
+)
+
+# All rows of a set of files, one per reading: approved beats
+# provisional, then the most recently modified file wins
+_DEDUPE_SQL = (
+    f"SELECT {TIMESERIES_SELECT}"
+    " FROM read_parquet(?, filename = true, hive_partitioning = false, union_by_name = true)"
+    " QUALIFY row_number() OVER ("
+    "  PARTITION BY site_cd, parameter_cd, read_ts"
+    "  ORDER BY starts_with(coalesce(approval_status, ''), 'A') DESC,"
+    "   list_position(?, filename) DESC"
+    " ) = 1"
+)
+
+
+def needs_compaction(partition_path: Path, profile: Optional[str] = None) -> bool:
+    """
+    True when a partition directory holds anything but a single ``data.parquet`` in the
+    current layout: several files, or a file whose codec, row-group size or encoding
+    predates the partition's write profile, or whose row groups overlap in
+    (parameter_cd, read_ts) because it was not written in sort order.
+    """
+    files = list(partition_path.glob('*.parquet'))
+    if len(files) != 1 or files[0].name != 'data.parquet':
+        return bool(files)
+
+    year = int(partition_path.name.split('=', 1)[1])
+    expected = WRITE_PROFILES[profile or default_profile(year)]
+    metadata = pq.ParquetFile(files[0]).metadata
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    if 'read_ts' not in names:
+        return True
+    read_ts_column = names.index('read_ts')
+
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        column = row_group.column(read_ts_column)
+        if (
+            row_group.num_rows > expected.row_group_size
+            or column.compression != expected.compression.upper()
+            or (expected.parquet_version == 'V2' and 'DELTA_BINARY_PACKED' not in column.encodings)
+        ):
+            return True
+    return not row_groups_sorted(metadata)
+
+
+def row_groups_sorted(metadata: pq.FileMetaData) -> bool:
+    """
+    Whether the row groups of a parquet file follow each other in (parameter_cd, read_ts)
+    order according to their min/max statistics. Overlaps hidden inside a row group that
+    spans several parameters cannot be seen from the statistics and are not detected.
+    """
+    names = [metadata.schema.column(i).name for i in range(metadata.num_columns)]
+    if 'parameter_cd' not in names or 'read_ts' not in names:
+        return True
+
+    bounds = []
+    for i in range(metadata.num_row_groups):
+        row_group = metadata.row_group(i)
+        parameter = row_group.column(names.index('parameter_cd')).statistics
+        read_ts = row_group.column(names.index('read_ts')).statistics
+        if parameter is None or read_ts is None or not (
+            parameter.has_min_max and read_ts.has_min_max
+        ):
+            return True
+        bounds.append((parameter.min, parameter.max, read_ts.min, read_ts.max))
+
+    for previous, following in zip(bounds, bounds[1:]):
+        if previous[1] > following[0]:
+            return False
+        # Times are comparable when both groups hold only the parameter they share
+        if len({*previous[:2], *following[:2]}) == 1 and previous[3] > following[2]:
+            return False
+    return True
+
+
+def compact_partition(
+        partition_path: Path,
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        profile: Optional[str] = None,
+        db_path: Optional[Path] = DEFAULT_DB_PATH
+        ) -> int:
+    """
+    Rewrite every parquet file of one ``site=X/year=Y`` partition as a single sorted
+    ``data.parquet`` in the partition's write profile.
+
+    Overlapping rows are deduplicated the same way the loader does. The new file replaces
+    ``data.parquet`` atomically, after which the other files are deleted; until they are
+    gone a reader may briefly see their rows twice, never a partial file. Rows filed
+    under the wrong year are upserted into their own partition.
+
+    Parameters:
+        partition_path  : Partition directory, e.g. <root>/timeseries_iv/site=X/year=Y
+        datalake_root   : Root directory for the datalake
+        profile         : Write profile, None to choose by year
+        db_path         : DuckDB file holding the partition manifest, None to skip it
+    Returns:
+        int: Number of files removed from the partition.
+    """
+    site_code = partition_path.parent.name.split('=', 1)[1]
+    year = int(partition_path.name.split('=', 1)[1])
+    files = sorted(partition_path.glob('*.parquet'), key=lambda path: path.stat().st_mtime)
+    if not files:
+        return 0
+    file_names = [path.as_posix() for path in files]
+
+    with duckdb.connect() as con:
+        rows = con.execute(_DEDUPE_SQL, [file_names, file_names]).arrow()
+
+    is_year = pc.equal(rows['year'], year)
+    in_year = rows.filter(is_year)
+    misplaced = rows.num_rows - in_year.num_rows
+    if in_year.num_rows:
+        DataLakeLoader(
+            in_year, site_code, datalake_root, merge=False, db_path=db_path, profile=profile
+        )
+    if misplaced:
+        logging.warning(f"Moving {misplaced} rows of site {site_code} out of {partition_path}")
+        DataLakeLoader(
+            rows.filter(pc.invert(is_year)), site_code, datalake_root, db_path=db_path
+        )
+
+    removed = [path for path in files if path.name != 'data.parquet' or not in_year.num_rows]
+    for path in removed:
+        path.unlink(missing_ok=True)
+    if db_path is not None and removed:
+        try:
+            remove_from_manifest(removed, datalake_root, db_path)
+        except Exception as e:
+            mark_manifest_stale(removed, datalake_root)
+            logging.error(f"Removed files of site {site_code} marked stale in the manifest: {e}")
+    if not any(partition_path.iterdir()):
+        partition_path.rmdir()
+    return len(removed)
+
+
+def remove_stale_staging(
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        tier: str = 'timeseries_iv',
+        max_age_hours: float = 24
+        ) -> int:
+    """
+    Delete loader staging directories left behind by killed runs. Directories younger
+    than ``max_age_hours`` may belong to a running load and are kept.
+    """
+    cutoff = time.time() - max_age_hours * 3600
+    removed = 0
+    for staging_path in (Path(datalake_root) / tier).glob('site=*/.staging-*'):
+        if staging_path.stat().st_mtime < cutoff:
+            shutil.rmtree(staging_path, ignore_errors=True)
+            removed += 1
+    return removed
+
+
+def LakeCompactor(
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        site_codes: Optional[List[str]] = None,
+        profile: Optional[str] = None,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        dry_run: bool = False,
+        staging_max_age_hours: float = 24
+        ) -> dict:
+    """
+    Compact every ``timeseries_iv`` partition that needs it.
+
+    Parameters:
+        datalake_root           : Root directory for the datalake
+        site_codes              : Only compact these sites
+        profile                 : Write profile for every partition, None to choose by year
+        db_path                 : DuckDB file holding the partition manifest, None to skip it
+        dry_run                 : Only report what would be compacted
+        staging_max_age_hours   : Age after which leftover staging directories are deleted
+    Returns:
+        dict: Counts of partitions compacted, files removed and staging directories removed.
+    """
+    tier_path = Path(datalake_root) / 'timeseries_iv'
+    partitions = sorted(tier_path.glob('site=*/year=*'))
+    if site_codes is not None:
+        wanted = {f"site={site_code}" for site_code in site_codes}
+        partitions = [path for path in partitions if path.parent.name in wanted]
+
+    report = {'partitions_checked': len(partitions), 'partitions_compacted': 0,
+              'files_removed': 0, 'staging_removed': 0}
+    for partition_path in partitions:
+        if not partition_path.is_dir() or not needs_compaction(partition_path, profile):
+            continue
+        report['partitions_compacted'] += 1
+        if dry_run:
+            logging.info(f"Would compact {partition_path}")
+            continue
+        report['files_removed'] += compact_partition(
+            partition_path, datalake_root, profile, db_path
+        )
+
+    if not dry_run:
+        report['staging_removed'] = remove_stale_staging(
+            datalake_root, max_age_hours=staging_max_age_hours
+        )
+    return report
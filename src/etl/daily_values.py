@@ -0,0 +1,147 @@
+import datetime as dt
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.observations import DailyObservationsLoader
+from src.etl.extractors import iter_time_windows
+from src.etl.metrics import RunMetrics
+from src.etl.scheduler import FetchTask
+from src.etl.transformers import NWISDailyTransformer
+
+# First date requested for a series with no daily values yet
+DV_START_DATE = '1900-01-01'
+
+
+def daily_fetch_tasks(
+        series: Dict[str, List[str]],
+        end_date: str,
+        marks: Optional[Dict[Tuple[str, str], dt.date]] = None,
+        batch_size: int = 25,
+        window_years: int = 25,
+        lookback_days: int = 120,
+        start_date: str = DV_START_DATE
+        ) -> List[FetchTask]:
+    """
+    Plan multi-site NWIS 'dv' requests for a set of site-parameter series.
+
+    Without ``marks`` every series is requested from ``start_date``. With them, each
+    series starts ``lookback_days`` before its own latest daily value, so recently revised
+    provisional values are fetched again. Series without daily values (e.g. 00010, or no
+    published daily mean), and series that stopped more than ``lookback_days`` before the
+    newest of their site, only join the site's revision window, which still catches a
+    series that starts reporting. Sites without any daily value are skipped once a load
+    has run, and sites without parameters always are. Series sharing a start are requested
+    ``batch_size`` sites at a time with the union of their parameters, split into
+    ``window_years`` windows.
+
+    Parameters:
+        series          : Parameter codes by site code
+        end_date        : Last date to request (YYYY-MM-DD)
+        marks           : Latest loaded date by (site, parameter), None for a full load
+        batch_size      : Sites per request
+        window_years    : Calendar years per request
+        lookback_days   : Days before the latest loaded date to request again
+        start_date      : First date of a full load
+    Returns:
+        List[FetchTask]: 'dv' tasks whose site_code is a list of site codes.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+
+    lookback = dt.timedelta(days=lookback_days)
+    starts: Dict[str, Dict[str, List[str]]] = {}
+    skipped = []
+    for site_code, parameter_codes in sorted(series.items()):
+        if not parameter_codes:
+            continue
+        site_marks = {code: (marks or {}).get((site_code, code)) for code in parameter_codes}
+        latest = max((mark for mark in site_marks.values() if mark is not None), default=None)
+        if not marks:
+            series_starts = {code: start_date for code in parameter_codes}
+        elif latest is None:
+            skipped.append(site_code)
+            continue
+        else:
+            series_starts = {
+                code: ((mark if mark is not None and mark >= latest - lookback else latest)
+                       - lookback).isoformat()
+                for code, mark in site_marks.items()
+            }
+        for code, series_start in series_starts.items():
+            starts.setdefault(series_start, {}).setdefault(site_code, []).append(code)
+    if skipped:
+        logging.info(
+            f"Skipping {len(skipped)} sites without daily values; run initial_load.py to"
+            " load the history of newly configured sites"
+        )
+
+    tasks = []
+    for site_start, site_series in sorted(starts.items()):
+        site_codes = sorted(site_series)
+        for i in range(0, len(site_codes), batch_size):
+            batch = site_codes[i:i + batch_size]
+            parameter_codes = sorted({code for site in batch for code in site_series[site]})
+            for window_start, window_end in iter_time_windows(site_start, end_date, window_years):
+                tasks.append(FetchTask(
+                    site_code=batch,
+                    parameter_code=parameter_codes,
+                    start_date=window_start,
+                    end_date=window_end,
+                    service_code='dv'
+                ))
+    return tasks
+
+
+def NWISDailyLoader(
+        results: Iterable[Tuple[FetchTask, Optional[pd.DataFrame]]],
+        series: Dict[str, List[str]],
+        db_path: Path = DEFAULT_DB_PATH,
+        metrics: Optional[RunMetrics] = None
+        ) -> dict:
+    """
+    Transform multi-site 'dv' responses and upsert them into daily_observations.
+
+    Parameter lists of a batch are the union over its sites, so values of series that
+    are not configured for a site are dropped here rather than left to the loader.
+
+    Parameters:
+        results         : (task, raw response) pairs, e.g. from fetch_concurrently
+        series          : Parameter codes by site code, as passed to daily_fetch_tasks
+        db_path         : DuckDB file holding the metadata and daily_observations tables
+        metrics         : Collector of the run's transform and load measurements
+    Returns:
+        dict: Numbers of responses with data, daily values received and rows written.
+    """
+    metrics = metrics or RunMetrics()
+    configured = pa.array(
+        [f"{site_code}/{code}" for site_code, codes in series.items() for code in codes],
+        pa.string()
+    )
+    report = {'responses': 0, 'values': 0, 'rows_written': 0}
+    for task, df in results:
+        if df is None or df.empty:
+            continue
+        with metrics.stage('transform', task) as metric:
+            table = NWISDailyTransformer(df, task.parameter_code)
+            key = pc.binary_join_element_wise(
+                table['site_cd'].cast(pa.string()), table['parameter_cd'].cast(pa.string()), '/'
+            )
+            table = table.filter(pc.is_in(key, value_set=configured))
+            metric.rows, metric.bytes = table.num_rows, table.nbytes
+        if not table.num_rows:
+            continue
+
+        report['responses'] += 1
+        report['values'] += table.num_rows
+        with metrics.stage('load', task) as metric:
+            metric.rows = DailyObservationsLoader(table, db_path)
+        report['rows_written'] += metric.rows
+        logging.info(
+            f"Loaded {table.num_rows} daily values for {len(task.site_code)} sites,"
+            f" {task.start_date} to {task.end_date}"
+        )
+    return report
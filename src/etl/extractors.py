@@ -1,38 +1,100 @@
-
 from collections import namedtuple
-# from typing import List
+import datetime as dt
+import glob
+import io
 import logging
-from typing import Optional
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import urlparse
+import duckdb
 import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
 import dataretrieval.nwis as nwis
-import src.database.connection as db
+from dataretrieval.utils import NoSitesError
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.manifest import MANIFEST_TABLE, manifest_covers
+from src.etl.cache import ResponseCache
+
+# Latest reading and earliest still-provisional reading of one series in the lake
+HighWaterMark = namedtuple(
+    'HighWaterMark', ['site_code', 'parameter_code', 'max_read_ts', 'min_provisional_ts']
+    )
+
+# NWIS statistic requested from the daily-values service: the daily mean
+NWIS_DV_STAT_CODE = '00003'
+
+# Reclamation HDB web service and database server (can be overridden, e.g. with a local
+# fake server). Series are addressed by site-datatype id (SDI), see usbr_site_parameter.
+HDB_URL = os.getenv('HDB_URL', 'https://www.usbr.gov/pn-bin/hdb/hdb.pl')
+HDB_SERVER = os.getenv('HDB_SERVER', 'uchdb2')
+HDB_HOST = urlparse(HDB_URL).netloc
+
+# NOAA CBRFC deterministic forecast export (can be overridden). A local directory holding
+# one <site>.csv per forecast point is read instead of the service, e.g. fixture files.
+CBRFC_URL = os.getenv('CBRFC_URL', 'https://www.cbrfc.noaa.gov/dbdata/station/flowgraph/csv')
+CBRFC_HOST = urlparse(CBRFC_URL).netloc or 'local'
+
+_HTTP_SESSIONS: Dict[str, requests.Session] = {}
+_HTTP_SESSIONS_LOCK = threading.Lock()
 
 
 def NWISExtractor(
-        site_code: str,
-        parameter_code: Optional[str] = None,
+        site_code: Union[str, List[str]],
+        parameter_code: Optional[Union[str, List[str]]] = None,
         start_date: Optional[str] = None,
         end_date: Optional[str] = None,
-        service_code: str = 'iv'
+        service_code: str = 'iv',
+        cache: Optional[ResponseCache] = None,
+        raise_errors: bool = False
         ) -> Optional[pd.DataFrame]:
     """
-    Fetch data from NWIS for a given site and parameter code.
-    Logs an error if the request fails.
+    Fetch data from NWIS for a given site and parameter code, or a list of parameter codes
+    to get every parameter of the site in one wide response. A list of site codes fetches
+    several sites in one call; daily values ('dv') are small enough to batch that way,
+    and only their daily mean is requested.
+    Logs an error if the request fails, or re-raises it when ``raise_errors`` is True
+    so a retry layer can act on it. A "no sites/data" response is not an error.
+
+    When a ResponseCache is given, cached responses (including cached empty windows)
+    are returned without a request, and successful responses are added to the cache.
     """
+    if cache is not None:
+        key = ResponseCache.make_key(service_code, site_code, parameter_code, start_date, end_date)
+        found, df = cache.get(key)
+        if found:
+            return df
+
+    if isinstance(parameter_code, tuple):
+        parameter_code = list(parameter_code)  # dataretrieval only joins lists
+    if isinstance(site_code, tuple):
+        site_code = list(site_code)
+    query = {'statCd': NWIS_DV_STAT_CODE} if service_code == 'dv' else {}
+
     try:
         df = nwis.get_record(
             sites=site_code,
             service=service_code,
             start=start_date,
             end=end_date,
-            parameterCd=parameter_code
+            parameterCd=parameter_code,
+            **query
         )
+    except NoSitesError:
+        df = pd.DataFrame()
     except Exception as e:
+        if raise_errors:
+            raise
         logging.error(
             f"Error fetching data for site {site_code} and parameter {parameter_code}: {e}"
             )
         return None
 
+    if cache is not None:
+        cache.put(key, df)
+
     if df.empty:
         logging.warning(
             f"No data returned for site {site_code} and parameter {parameter_code}."
@@ -41,27 +103,244 @@ def NWISExtractor(
 
     return df
 
-"""
-# Figure out the best integration for update dates
-def fetch_approval_status(site_cd: str) -> Optional[list]:
-    # Create a named tuple for site information
-    ApprovalStatus = namedtuple(
-        'ApprovalStatus', ['parameter_code', 'max_approval_date']
-        )
+
+def get_http_session(host: str, pool_size: int = 8) -> requests.Session:
+    """
+    Return the process-wide HTTP session for a host, creating it on first use.
+    Its connection pool keeps up to ``pool_size`` connections alive, so fetch threads
+    reuse TCP/TLS connections instead of opening one per request.
+    """
+    with _HTTP_SESSIONS_LOCK:
+        session = _HTTP_SESSIONS.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            _HTTP_SESSIONS[host] = session
+        return session
+
+
+def HDBExtractor(
+        site_code: Union[str, List[str]],
+        parameter_code: Optional[Union[str, List[str]]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        service_code: str = 'DY',
+        session: Optional[requests.Session] = None,
+        base_url: str = HDB_URL,
+        server: str = HDB_SERVER,
+        timeout: float = 120,
+        raise_errors: bool = False
+        ) -> Optional[pd.DataFrame]:
+    """
+    Fetch one window of several HDB series in a single JSON request.
+
+    Argument names match FetchTask so HDB tasks run through fetch_concurrently and
+    ResilientFetcher like NWIS ones: ``site_code`` holds the site-datatype ids (SDIs),
+    which already identify the parameter, and ``service_code`` the HDB time step.
+    The response is parsed series by series straight into long columns; values and
+    times are left as text for HDBTransformer to convert in one vectorized pass.
+    Logs an error if the request fails, or re-raises it when ``raise_errors`` is True.
+
+    Parameters:
+        site_code (str or List[str]): HDB site-datatype id(s).
+        parameter_code: Unused, SDIs identify the datatype.
+        start_date (str): First date of the window (YYYY-MM-DD).
+        end_date (str): Last date of the window, inclusive (YYYY-MM-DD).
+        service_code (str): HDB time step, e.g. 'DY' or 'HR'.
+        session (requests.Session): Session to send the request on. Defaults to the
+                                    pooled session of the HDB host.
+        base_url (str): HDB web service URL.
+        server (str): HDB database server, e.g. 'uchdb2'.
+        timeout (float): Seconds to wait for the response.
+        raise_errors (bool): Re-raise request and parse errors.
+    Returns:
+        pd.DataFrame: Columns ['sdi', 'datetime', 'value'], or None without data.
+    """
+    sdis = [site_code] if isinstance(site_code, str) else list(site_code)
+    query = {
+        'svr': server,
+        'sdi': ','.join(sdis),
+        'tstp': service_code,
+        't1': f"{start_date}T00:00",
+        't2': f"{end_date}T23:59",
+        'table': 'R',
+        'mrid': 0,
+        'format': 'json',
+    }
+
+    try:
+        session = session or get_http_session(urlparse(base_url).netloc)
+        response = session.get(base_url, params=query, timeout=timeout)
+        response.raise_for_status()
+        series_list = response.json().get('Series') or []
+    except Exception as e:
+        if raise_errors:
+            raise
+        logging.error(f"Error fetching HDB data for SDIs {query['sdi']}: {e}")
+        return None
+
+    columns = {'sdi': [], 'datetime': [], 'value': []}
+    for series in series_list:
+        points = series.get('Data') or []
+        columns['sdi'] += [str(series.get('SDI'))] * len(points)
+        columns['datetime'] += [point.get('t') for point in points]
+        columns['value'] += [point.get('v') for point in points]
+
+    if not columns['sdi']:
+        logging.warning(f"No HDB data returned for SDIs {query['sdi']}.")
+        return None
+    return pd.DataFrame(columns)
+
+
+def CBRFCExtractor(
+        site_code: Union[str, List[str]],
+        parameter_code: Optional[Union[str, List[str]]] = None,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        service_code: str = 'forecast',
+        source: Union[str, Path] = CBRFC_URL,
+        session: Optional[requests.Session] = None,
+        timeout: float = 60,
+        raise_errors: bool = False
+        ) -> Optional[pd.DataFrame]:
+    """
+    Fetch the current CBRFC forecasts of several forecast points in one request.
+
+    The export is CSV with one row per point, issuance and valid time, in the columns
+    CBRFCTransformer reads (times in GMT). When ``source`` is a local directory, its
+    ``<site>.csv`` files are read instead, so the pipeline runs against fixture files.
+    Argument names match FetchTask so requests can run through ResilientFetcher;
+    forecasts have no request window, so the dates and parameter are unused.
+    Logs an error if the request fails, or re-raises it when ``raise_errors`` is True.
+
+    Parameters:
+        site_code (str or List[str]): CBRFC forecast point id(s), e.g. 'CAMC2'.
+        parameter_code: Unused.
+        start_date: Unused.
+        end_date: Unused.
+        service_code (str): Unused, tags forecast tasks.
+        source (str or Path): Export URL, or a directory of <site>.csv files.
+        session (requests.Session): Session to send the request on. Defaults to the
+                                    pooled session of the CBRFC host.
+        timeout (float): Seconds to wait for the response.
+        raise_errors (bool): Re-raise request and parse errors.
+    Returns:
+        pd.DataFrame: Raw forecast rows of every point, or None without data.
+    """
+    site_codes = [site_code] if isinstance(site_code, str) else list(site_code)
+    read_options = {'dtype': {'lid': str}, 'comment': '#', 'skipinitialspace': True}
+
+    try:
+        if Path(source).is_dir():
+            frames = [
+                pd.read_csv(Path(source) / f"{code}.csv", **read_options)
+                for code in site_codes if (Path(source) / f"{code}.csv").exists()
+            ]
+            df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        else:
+            session = session or get_http_session(urlparse(str(source)).netloc)
+            response = session.get(
+                str(source), params={'id': ','.join(site_codes)}, timeout=timeout
+            )
+            response.raise_for_status()
+            df = pd.read_csv(io.StringIO(response.text), **read_options)
+    except Exception as e:
+        if raise_errors:
+            raise
+        logging.error(f"Error fetching CBRFC forecasts for {site_codes}: {e}")
+        return None
+
+    if df.empty:
+        logging.warning(f"No CBRFC forecasts returned for {site_codes}.")
+        return None
+    return df
+
+
+def iter_time_windows(
+        start_date: str,
+        end_date: str,
+        window_years: int = 1
+        ) -> Iterator[Tuple[str, str]]:
+    """
+    Split a date span into consecutive request windows aligned to calendar years,
+    so each window lines up with the year= partitions of the datalake.
+
+    Parameters:
+        start_date (str): First date of the span (YYYY-MM-DD).
+        end_date (str): Last date of the span, inclusive (YYYY-MM-DD).
+        window_years (int): Number of calendar years per window.
+    Yields:
+        Tuple[str, str]: Inclusive (start, end) dates of each window.
+    """
+    if window_years < 1:
+        raise ValueError("window_years must be at least 1.")
+
+    start = dt.date.fromisoformat(start_date)
+    end = dt.date.fromisoformat(end_date)
+    while start <= end:
+        window_end = min(dt.date(start.year + window_years - 1, 12, 31), end)
+        yield start.isoformat(), window_end.isoformat()
+        start = window_end + dt.timedelta(days=1)
+
+
+def fetch_high_water_marks(
+        datalake_root: Union[str, Path],
+        db_path: Optional[Path] = DEFAULT_DB_PATH
+        ) -> List[tuple]:
+    """
+    Compute per site/parameter high-water marks of the timeseries_iv tier.
+
+    Provisional ('P') readings can still be revised by USGS, so the update window for a
+    series starts at its earliest provisional reading, or at its latest reading when
+    everything on disk is approved.
+
+    The marks come from the per-parameter statistics of the partition manifest. The
+    parquet files are only scanned when the manifest cannot be trusted for the tier:
+    no database or table, files marked stale, or sites on disk without manifest rows.
+
+    Parameters:
+        datalake_root (str or Path): Root directory of the datalake.
+        db_path (Path): DuckDB file holding the partition manifest, None to always scan.
+    Returns:
+        List[HighWaterMark]: One entry per site/parameter found in the lake.
+    """
+    tier_path = Path(datalake_root) / 'timeseries_iv'
+    site_codes = [path.name.split('=', 1)[1] for path in tier_path.glob('site=*')]
+    if not site_codes:
+        logging.warning(f"No timeseries_iv files found under {datalake_root}.")
+        return []
+
+    if db_path is not None and Path(db_path).exists():
+        with duckdb.connect(str(db_path), read_only=True) as con:
+            if manifest_covers(con, datalake_root, 'timeseries_iv', site_codes):
+                result = con.execute(f"""
+                    SELECT site_cd, stats.parameter_cd, max(stats.max_read_ts),
+                           min(stats.min_provisional_ts)
+                    FROM (
+                        SELECT site_cd, unnest(parameter_stats) AS stats
+                        FROM {MANIFEST_TABLE}
+                        WHERE tier_cd = 'timeseries_iv'
+                    )
+                    GROUP BY site_cd, stats.parameter_cd
+                    ORDER BY site_cd, stats.parameter_cd
+                """).fetchall()
+                return [HighWaterMark(*row) for row in result]
+
+    pattern = tier_path / 'site=*' / 'year=*' / '*.parquet'
+    if not glob.glob(str(pattern)):
+        logging.warning(f"No timeseries_iv files found under {datalake_root}.")
+        return []
 
     query = (
-        "SELECT parameter_cd, strftime(max(datetime_utc), '%Y-%m-%d') AS date"
-        " FROM vw_nwis_iv_local"
-        f" WHERE site_cd = '{site_cd}'"
-        " AND approval_status = 'A'"
+        "SELECT site_cd, parameter_cd, max(read_ts) AS max_read_ts,"
+        " min(read_ts) FILTER (WHERE approval_status = 'P') AS min_provisional_ts"
+        f" FROM read_parquet('{pattern.as_posix()}')"
         " GROUP BY site_cd, parameter_cd"
+        " ORDER BY site_cd, parameter_cd"
     )
-
-    with db.connect_duckdb() as con:
+    with duckdb.connect() as con:
         result = con.execute(query).fetchall()
-    if result:
-        # Return a list of ApprovalStatus namedtuples for all results
-        return [ApprovalStatus(approval[0], approval[1]) for approval in result]
-    else:
-        return None
-"""
\ No newline at end of file
+
+    return [HighWaterMark(*row) for row in result]
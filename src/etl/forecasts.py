@@ -0,0 +1,184 @@
+import logging
+import os
+import shutil
+import uuid
+from pathlib import Path
+from typing import Iterable, List, Optional, Tuple, Union
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.forecasts import FORECAST_TIER, update_forecast_index
+from src.etl.loaders import DEFAULT_DATALAKE_PATH, WRITE_PROFILES
+from src.etl.metrics import RunMetrics, file_bytes
+from src.etl.scheduler import FetchTask
+from src.etl.transformers import CBRFCTransformer
+from src.utils.helpers import copy_options
+
+
+def cbrfc_fetch_tasks(site_codes: Iterable[str], batch_size: int = 20) -> List[FetchTask]:
+    """
+    Plan batched CBRFC requests: ``batch_size`` forecast points per request, so the 18
+    points in site_list.cbrfc_sites are fetched in one call.
+
+    Parameters:
+        site_codes      : CBRFC forecast points
+        batch_size      : Forecast points per request
+    Returns:
+        List[FetchTask]: 'forecast' tasks whose site_code is a list of forecast points.
+    """
+    if batch_size < 1:
+        raise ValueError("batch_size must be at least 1.")
+    site_codes = sorted(site_codes)
+    return [
+        FetchTask(site_code=site_codes[i:i + batch_size], service_code='forecast')
+        for i in range(0, len(site_codes), batch_size)
+    ]
+
+
+def CBRFCLoader(
+        results: Iterable[Tuple[FetchTask, Optional[pd.DataFrame]]],
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        metrics: Optional[RunMetrics] = None
+        ) -> dict:
+    """
+    Transform batched CBRFC responses and write them to the ``forecast_cbrfc`` tier.
+
+    Parameters:
+        results         : (task, raw response) pairs, e.g. from fetch_concurrently
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the forecast index, None to skip it
+        metrics         : Collector of the run's transform and load measurements
+    Returns:
+        dict: Numbers of responses with data, forecast values received and files written.
+    """
+    metrics = metrics or RunMetrics()
+    report = {'responses': 0, 'values': 0, 'files_written': 0}
+    for task, df in results:
+        if df is None or df.empty:
+            continue
+        with metrics.stage('transform', task) as metric:
+            table = CBRFCTransformer(df)
+            metric.rows, metric.bytes = table.num_rows, table.nbytes
+        if not table.num_rows:
+            continue
+        report['responses'] += 1
+        report['values'] += table.num_rows
+        with metrics.stage('load', task) as metric:
+            written = ForecastLakeLoader(table, datalake_root, db_path)
+            metric.rows, metric.bytes = table.num_rows, file_bytes(written)
+        report['files_written'] += len(written)
+    return report
+
+
+def ForecastLakeLoader(
+        data: Union[pa.Table, pd.DataFrame],
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        tier: str = FORECAST_TIER
+        ) -> List[Path]:
+    """
+    Write transformed forecasts to the datalake, one file per issuance date and site:
+    ``<tier>/issue_dt=<yyyy-mm-dd>/site=<cd>/data.parquet``.
+
+    A new issuance only ever adds files, so daily re-issues never rewrite the history.
+    When a site is issued more than once a day, the newest issuance of the day replaces
+    the older one; an issuance that is not newer than the stored one is skipped, so
+    re-running a load is a no-op. Written files are recorded in the forecast index,
+    which the readers use to find the latest issuance without listing the tier.
+
+    Parameters:
+        data            : Transformed forecasts (CBRFC_FORECAST_SCHEMA)
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the forecast index, None to skip it
+        tier            : Datalake tier directory
+    Returns:
+        List[Path]: The forecast files written.
+    """
+    if len(data) == 0:
+        logging.warning("No forecasts to write.")
+        return []
+
+    tier_path = Path(datalake_root) / tier
+    staging_path = tier_path / f".staging-{uuid.uuid4().hex}"
+    tier_path.mkdir(parents=True, exist_ok=True)
+
+    written = []
+    try:
+        with duckdb.connect() as con:
+            con.register("new_data", data)
+            # Newest issuance of each site and day, one value per parameter and valid time
+            con.execute("""
+                CREATE TEMP TABLE issued AS
+                SELECT
+                    CAST(site_cd AS VARCHAR) AS site_cd,
+                    CAST(issue_ts AS TIMESTAMP_NS) AS issue_ts,
+                    CAST(valid_ts AS TIMESTAMP_NS) AS valid_ts,
+                    CAST(parameter_cd AS VARCHAR) AS parameter_cd,
+                    CAST(value AS DOUBLE) AS value,
+                    CAST(issue_dt AS DATE) AS issue_dt
+                FROM new_data
+                QUALIFY issue_ts = max(issue_ts) OVER (PARTITION BY site_cd, issue_dt)
+                    AND row_number() OVER (
+                        PARTITION BY site_cd, issue_dt, parameter_cd, valid_ts
+                    ) = 1
+            """)
+
+            partitions = con.execute(
+                "SELECT issue_dt, site_cd, max(issue_ts) FROM issued GROUP BY ALL"
+            ).fetchall()
+            stale = []
+            for issue_dt, site_code, issue_ts in partitions:
+                partition_path = tier_path / f"issue_dt={issue_dt}" / f"site={site_code}"
+                file_path = partition_path / "data.parquet"
+                if file_path.exists() and con.execute(
+                    "SELECT max(issue_ts) >= ? FROM read_parquet(?)",
+                    [issue_ts, file_path.as_posix()]
+                ).fetchone()[0]:
+                    stale.append((issue_dt, site_code))
+            if stale:
+                con.execute(
+                    "DELETE FROM issued"
+                    " WHERE list_contains(?, struct_pack(d := issue_dt, s := site_cd))",
+                    [[{'d': issue_dt, 's': site_code} for issue_dt, site_code in stale]]
+                )
+            if len(stale) == len(partitions):
+                logging.info("No new forecast issuances to write.")
+                return []
+
+            # One ordered COPY per file, since a partitioned COPY does not keep the order
+            for issue_dt, site_code, _ in partitions:
+                if (issue_dt, site_code) in stale:
+                    continue
+                partition_path = staging_path / f"issue_dt={issue_dt}" / f"site={site_code}"
+                partition_path.mkdir(parents=True)
+                con.execute(
+                    "COPY (SELECT site_cd, issue_ts, valid_ts, parameter_cd, value FROM issued"
+                    " WHERE issue_dt = ? AND site_cd = ? ORDER BY parameter_cd, valid_ts)"
+                    f" TO '{(partition_path / 'data.parquet').as_posix()}'"
+                    f" ({copy_options(WRITE_PROFILES['archive'])})",
+                    [issue_dt, site_code]
+                )
+
+        for staged_file in sorted(staging_path.glob("issue_dt=*/site=*/*.parquet")):
+            partition_path = tier_path / staged_file.parent.parent.name / staged_file.parent.name
+            partition_path.mkdir(parents=True, exist_ok=True)
+            file_path = partition_path / "data.parquet"
+            os.replace(staged_file, file_path)
+            written.append(file_path)
+    except Exception as e:
+        logging.error(f"Error writing forecasts: {e}")
+        raise
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+    logging.info(f"{len(written)} forecast files written to {tier_path}")
+
+    if db_path is not None and written:
+        try:
+            update_forecast_index(written, datalake_root, db_path)
+        except Exception as e:
+            # The forecasts are safely written; the index can be rebuilt from the files
+            logging.warning(f"Forecast index not updated: {e}")
+    return written
@@ -0,0 +1,140 @@
+import logging
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import pandas as pd
+import pyarrow.compute as pc
+from src.database.connection import DEFAULT_DB_PATH, connect_duckdb
+from src.etl.extractors import iter_time_windows
+from src.etl.loaders import DEFAULT_DATALAKE_PATH, DataLakeLoader
+from src.etl.metrics import RunMetrics, file_bytes
+from src.etl.scheduler import FetchTask
+from src.etl.transformers import HDBTransformer
+
+# Datalake tier of HDB series, laid out like timeseries_iv: site=<cd>/year=<yyyy>
+HDB_TIER = 'timeseries_hdb'
+
+# SDI -> (site_cd, parameter_cd) of every configured HDB series
+_HDB_SERIES_SQL = """
+    SELECT u.usbr_site_parameter_cd, s.site_cd, p.parameter_cd
+    FROM usbr_site_parameter AS u
+    INNER JOIN site_parameter AS sp ON sp.site_parameter_id = u.site_parameter_id
+    INNER JOIN site AS s ON s.site_id = sp.site_id
+    INNER JOIN parameter AS p ON p.parameter_id = sp.parameter_id
+    INNER JOIN source AS src ON src.source_id = s.source_id
+    WHERE src.source_cd = 'HDB'
+    ORDER BY s.site_cd, p.parameter_cd
+"""
+
+
+def fetch_hdb_series(db_path: Path = DEFAULT_DB_PATH) -> Dict[str, Tuple[str, str]]:
+    """
+    Site-datatype ids (SDIs) of the configured HDB series.
+
+    Parameters:
+        db_path         : DuckDB file holding the metadata tables
+    Returns:
+        Dict[str, Tuple[str, str]]: (site_cd, parameter_cd) by SDI.
+    """
+    with connect_duckdb(db_path) as con:
+        rows = con.execute(_HDB_SERIES_SQL).fetchall()
+    return {str(sdi): (site_code, parameter_code) for sdi, site_code, parameter_code in rows}
+
+
+def hdb_fetch_tasks(
+        series: Dict[str, Tuple[str, str]],
+        start_date: str,
+        end_date: str,
+        sites_per_request: int = 5,
+        window_years: int = 10,
+        time_step: str = 'DY'
+        ) -> List[FetchTask]:
+    """
+    Plan batched HDB requests: every SDI of ``sites_per_request`` sites goes into one
+    request, and long spans are paged into ``window_years`` calendar-year windows.
+
+    The defaults suit the reservoir sites in site_list.bor_sites: ten sites with about
+    a dozen daily series each are fetched in two requests per decade, each response a
+    few megabytes of JSON. Windows follow calendar years, so every window writes whole
+    year partitions. Tasks are ordered by batch, then window.
+
+    Parameters:
+        series          : (site_cd, parameter_cd) by SDI, e.g. from fetch_hdb_series
+        start_date      : First date to request (YYYY-MM-DD)
+        end_date        : Last date to request (YYYY-MM-DD)
+        sites_per_request : Sites whose SDIs share one request
+        window_years    : Calendar years per request
+        time_step       : HDB time step, e.g. 'DY'
+    Returns:
+        List[FetchTask]: Tasks whose site_code is a list of SDIs.
+    """
+    if sites_per_request < 1:
+        raise ValueError("sites_per_request must be at least 1.")
+
+    sdis_by_site = {}
+    for sdi, (site_code, _) in sorted(series.items(), key=lambda item: (item[1], item[0])):
+        sdis_by_site.setdefault(site_code, []).append(sdi)
+    site_codes = sorted(sdis_by_site)
+
+    tasks = []
+    for i in range(0, len(site_codes), sites_per_request):
+        sdis = [sdi for site in site_codes[i:i + sites_per_request] for sdi in sdis_by_site[site]]
+        for window_start, window_end in iter_time_windows(start_date, end_date, window_years):
+            tasks.append(FetchTask(
+                site_code=sdis,
+                parameter_code=None,
+                start_date=window_start,
+                end_date=window_end,
+                service_code=time_step
+            ))
+    return tasks
+
+
+def HDBLoader(
+        results: Iterable[Tuple[FetchTask, Optional[pd.DataFrame]]],
+        series: Dict[str, Tuple[str, str]],
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        metrics: Optional[RunMetrics] = None
+        ) -> dict:
+    """
+    Transform batched HDB responses and write them to the ``timeseries_hdb`` tier.
+
+    Each response is split by site and upserted into that site's year partitions, so
+    re-running a window rewrites nothing unless HDB revised a value.
+
+    Parameters:
+        results         : (task, raw response) pairs, e.g. from fetch_concurrently
+        series          : (site_cd, parameter_cd) by SDI, as passed to hdb_fetch_tasks
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the partition manifest, None to skip it
+        metrics         : Collector of the run's transform and load measurements
+    Returns:
+        dict: Numbers of responses with data, values received and partitions written.
+    """
+    metrics = metrics or RunMetrics()
+    report = {'responses': 0, 'values': 0, 'partitions_written': 0}
+    for task, df in results:
+        if df is None or df.empty:
+            continue
+        with metrics.stage('transform', task) as metric:
+            table = HDBTransformer(df, series)
+            metric.rows, metric.bytes = table.num_rows, table.nbytes
+        if not table.num_rows:
+            continue
+
+        report['responses'] += 1
+        report['values'] += table.num_rows
+        site_column = table['site_cd'].cast('string')
+        for site_code in pc.unique(site_column).to_pylist():
+            site_table = table.filter(pc.equal(site_column, site_code))
+            with metrics.stage('load', task, site_code=site_code) as metric:
+                written = DataLakeLoader(
+                    site_table, site_code, datalake_root, db_path=db_path, tier=HDB_TIER
+                )
+                metric.rows, metric.bytes = site_table.num_rows, file_bytes(written)
+            report['partitions_written'] += len(written)
+        logging.info(
+            f"Loaded {table.num_rows} HDB values for {len(task.site_code)} SDIs,"
+            f" {task.start_date} to {task.end_date}"
+        )
+    return report
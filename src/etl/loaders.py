@@ -1,9 +1,18 @@
+import datetime as dt
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 import os
 import logging
+import shutil
+import uuid
+from collections import namedtuple
 from pathlib import Path
 import duckdb
-from typing import Union
+from typing import Callable, Iterable, List, Optional, Union
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.manifest import record_partitions
+from src.utils.helpers import copy_options
 
 try:
     from dotenv import load_dotenv
@@ -18,54 +27,280 @@ if ENV_DATA_PATH:
 else:
     DEFAULT_DATALAKE_PATH = Path(__file__).resolve().parents[1] / 'data' / 'hydrology_datalake'
 
+# Column order and types of every timeseries_iv parquet file
+TIMESERIES_COLUMNS = ['site_cd', 'read_ts', 'parameter_cd', 'value', 'approval_status', 'year']
+TIMESERIES_SORT = "parameter_cd, read_ts"
+TIMESERIES_SELECT = (
+    "CAST(site_cd AS VARCHAR) AS site_cd,"
+    " CAST(read_ts AS TIMESTAMP_NS) AS read_ts,"
+    " CAST(parameter_cd AS VARCHAR) AS parameter_cd,"
+    " CAST(value AS DOUBLE) AS value,"
+    " CAST(approval_status AS VARCHAR) AS approval_status,"
+    " CAST(year AS BIGINT) AS year"
+)
+
+
+# Parquet write settings. 'archive' trades write time for the smallest files and suits
+# closed years; 'hot' writes fast and suits partitions that are rewritten every day.
+ParquetProfile = namedtuple(
+    'ParquetProfile', ['compression', 'compression_level', 'row_group_size', 'parquet_version']
+)
+WRITE_PROFILES = {
+    'archive': ParquetProfile('zstd', 9, 30720, 'V2'),
+    'hot': ParquetProfile('snappy', None, 30720, 'V2'),
+}
+
 
 def DataLakeLoader(
-        df: pd.DataFrame,
+        data: Union[pa.Table, pd.DataFrame],
         site_code: str,
-        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH
-        ) -> None:
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        merge: bool = True,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        profile: Optional[str] = None,
+        tier: str = 'timeseries_iv'
+        ) -> List[Path]:
     """
     Write transformed USGS IV data to partitioned parquet files in the datalake.
 
+    New rows are upserted into the year partitions they fall in: existing and new rows are
+    deduplicated on (site_cd, parameter_cd, read_ts), an approved ('A') reading supersedes a
+    provisional one, and otherwise the new reading wins. Only partitions whose content
+    changes are rewritten. Each partition is written to a staging directory with its own
+    ordered ``COPY`` and then atomically renamed over ``data.parquet``, so an
+    interrupted run never leaves a truncated file and re-running a load is a no-op.
+    Written files are then recorded in the partition manifest of the DuckDB file.
+
+    Rows are sorted by parameter, then time, so row-group min/max statistics let readers
+    skip row groups on parameter and time-range filters. Low-cardinality strings are
+    dictionary encoded by DuckDB. Compression follows ``WRITE_PROFILES``; by default the
+    current (and any later) year is written 'hot' and closed years 'archive'.
+
     Parameters:
-        df              : Transformed DataFrame with columns including
-                          ['site', 'datetime', 'parameter', 'value', 'approval_status', 'year']
-        site            : USGS site number
+        data            : Transformed Arrow table (NWIS_IV_SCHEMA) or DataFrame with columns
+                          ['site_cd', 'read_ts', 'parameter_cd', 'value', 'approval_status', 'year']
+        site_code       : USGS site number
         datalake_root   : Root directory for the datalake
+        merge           : Merge with the existing partitions. If False they are replaced.
+        db_path         : DuckDB file holding the partition manifest, None to skip it
+        profile         : Key of WRITE_PROFILES used for every year, None to choose by year
+        tier            : Datalake tier directory, e.g. 'timeseries_hdb' for HDB series
+    Returns:
+        List[Path]: The partition files written.
     """
-    if df.empty:
+    if len(data) == 0:
         logging.warning(f"No data to write for site {site_code}.")
-        return
-
-    # Sort data by datetime for performance and compression
-    df_sorted = df.sort_values(by='read_ts')
-
-    # Partition by year and site and write to parquet
-    for year, group in df_sorted.groupby('year'):
-        datalake_path = Path(datalake_root) / "timeseries_iv" / f"site={site_code}" / f"year={year}"
-        datalake_path.mkdir(parents=True, exist_ok=True)
-        file_path = datalake_path / "data.parquet"
-        try:
-            group = group.copy()
-
-            # Strip timezone from datetime if present
-            if isinstance(group["read_ts"].dtype, pd.DatetimeTZDtype):
-                group["read_ts"] = group["read_ts"].dt.tz_localize(None)
-
-            # Ensure correct data types
-            group = group.astype({
-                "site_cd": "string",
-                "read_ts": "datetime64[ns]",
-                "parameter_cd": "string",
-                "value": "float64",
-                "approval_status": "string",
-                "year": "int64"
-            })
-
-            duckdb.register("temp_df", group)
-            duckdb.sql(f"COPY temp_df TO '{file_path}' (FORMAT PARQUET)")
-            duckdb.unregister("temp_df")
-            logging.info(f"{len(group)} rows → {file_path}")
-        except Exception as e:
-            logging.error(f"Error writing data for site {site_code} and year {year}: {e}")
-            raise
+        return []
+
+    table = _to_arrow(data)
+    site_path = Path(datalake_root) / tier / f"site={site_code}"
+    staging_path = site_path / f".staging-{uuid.uuid4().hex}"
+    site_path.mkdir(parents=True, exist_ok=True)
+
+    existing_files = []
+    if merge:
+        years = sorted(pc.unique(table['year']).to_pylist())
+        existing_files = [
+            file_path.as_posix()
+            for file_path in (site_path / f"year={year}" / "data.parquet" for year in years)
+            if file_path.exists()
+        ]
+
+    written = []
+    try:
+        with duckdb.connect() as con:
+            con.register("new_data", table)
+            if existing_files:
+                changed_years = _merge_partitions(con, existing_files)
+            else:
+                con.execute(f"CREATE TEMP TABLE merged AS SELECT {TIMESERIES_SELECT} FROM new_data")
+                changed_years = [row[0] for row in con.execute(
+                    "SELECT DISTINCT year FROM merged ORDER BY year"
+                ).fetchall()]
+
+            if not changed_years:
+                logging.info(f"No changed partitions for site {site_code}.")
+                return []
+
+            # One COPY per year: a partitioned COPY does not keep the ORDER BY within its
+            # files, and the sort order is what makes the row-group statistics selective
+            for profile_name, profile_years in _years_by_profile(changed_years, profile).items():
+                for year in profile_years:
+                    year_path = staging_path / f"year={year}"
+                    year_path.mkdir(parents=True)
+                    con.execute(
+                        f"COPY (SELECT * FROM merged WHERE year = ? ORDER BY {TIMESERIES_SORT})"
+                        f" TO '{(year_path / 'data.parquet').as_posix()}'"
+                        f" ({copy_options(WRITE_PROFILES[profile_name])})",
+                        [year]
+                    )
+
+        for staged_file in sorted(staging_path.glob("year=*/*.parquet")):
+            datalake_path = site_path / staged_file.parent.name
+            datalake_path.mkdir(parents=True, exist_ok=True)
+            file_path = datalake_path / "data.parquet"
+            os.replace(staged_file, file_path)
+            written.append(file_path)
+            logging.info(f"{datalake_path.name} → {file_path}")
+    except Exception as e:
+        logging.error(f"Error writing data for site {site_code}: {e}")
+        raise
+    finally:
+        shutil.rmtree(staging_path, ignore_errors=True)
+
+    logging.info(f"{table.num_rows} rows → {len(written)} partitions for site {site_code}")
+
+    if db_path is not None:
+        # On failure the files are marked stale, so readers never trust a partial manifest
+        record_partitions(written, datalake_root, db_path, site_code)
+    return written
+
+
+def _merge_partitions(con: duckdb.DuckDBPyConnection, existing_files: List[str]) -> List[int]:
+    """
+    Upsert the registered ``new_data`` into the rows of ``existing_files``.
+
+    Creates the temp table ``merged`` holding the full contents of every touched year and
+    returns the years whose contents differ from what is on disk.
+    """
+    con.execute(
+        f"CREATE TEMP TABLE existing AS SELECT {TIMESERIES_SELECT}"
+        " FROM read_parquet(?, hive_partitioning = false)",
+        [existing_files]
+    )
+    con.execute(
+        "CREATE TEMP TABLE candidates AS"
+        " SELECT *, false AS is_new FROM existing"
+        f" UNION ALL SELECT {TIMESERIES_SELECT}, true AS is_new FROM new_data"
+    )
+    # One row per reading: approved beats provisional, then new beats existing
+    con.execute(
+        "CREATE TEMP TABLE winners AS SELECT * FROM candidates"
+        " QUALIFY row_number() OVER ("
+        "  PARTITION BY site_cd, parameter_cd, read_ts"
+        "  ORDER BY starts_with(coalesce(approval_status, ''), 'A') DESC, is_new DESC"
+        " ) = 1"
+    )
+    con.execute(f"CREATE TEMP TABLE merged AS SELECT {TIMESERIES_SELECT} FROM winners")
+
+    # Every existing reading either survives or is superseded by a new one, so a year
+    # changes exactly when some winning new reading is not already on disk
+    changed = con.execute(
+        "SELECT DISTINCT w.year FROM winners AS w"
+        " WHERE w.is_new AND NOT EXISTS ("
+        "  SELECT 1 FROM existing AS e"
+        "  WHERE e.parameter_cd = w.parameter_cd AND e.read_ts = w.read_ts"
+        "   AND e.value IS NOT DISTINCT FROM w.value"
+        "   AND e.approval_status IS NOT DISTINCT FROM w.approval_status"
+        " )"
+        " ORDER BY w.year"
+    ).fetchall()
+    return [row[0] for row in changed]
+
+
+def StreamingDataLakeLoader(
+        frames: Iterable[Union[pa.Table, pd.DataFrame]],
+        site_code: str,
+        datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+        db_path: Optional[Path] = DEFAULT_DB_PATH,
+        tier: str = 'timeseries_iv',
+        on_flush: Optional[Callable[[List[Path], int], None]] = None
+        ) -> List[Path]:
+    """
+    Write a time-ordered stream of transformed frames for one site to the datalake.
+
+    Each frame is typically one request window. Because NWIS request windows follow local
+    dates while partitions follow UTC years, a window can spill a few hours into the next
+    year. The newest year seen so far is therefore held back until a later frame moves
+    past it (or the stream ends), and every earlier year is written as soon as it is complete.
+    Peak memory is about one window plus one year.
+
+    Parameters:
+        frames          : Transformed tables or DataFrames in chronological order
+        site_code       : USGS site number
+        datalake_root   : Root directory for the datalake
+        db_path         : DuckDB file holding the partition manifest, None to skip it
+        tier            : Datalake tier directory
+        on_flush        : Called whenever complete years are written before the stream ends,
+                          with the files written and the last complete year, e.g. to
+                          checkpoint the windows now on disk. The files are recorded in
+                          the manifest first.
+    Returns:
+        List[Path]: The partition files written.
+    """
+    pending = None
+    written = []
+    unrecorded = []
+
+    def record_manifest():
+        if db_path is not None and unrecorded:
+            record_partitions(unrecorded, datalake_root, db_path, site_code)
+        unrecorded.clear()
+
+    for frame in frames:
+        if frame is None or len(frame) == 0:
+            continue
+        frame = _to_arrow(frame)
+        pending = frame if pending is None else pa.concat_tables([pending, frame])
+
+        latest_year = pc.max(pending['year'])
+        complete = pc.less(pending['year'], latest_year)
+        if pc.any(complete).as_py():
+            files = DataLakeLoader(
+                pending.filter(complete), site_code, datalake_root, db_path=None, tier=tier
+            )
+            written += files
+            unrecorded += files
+            pending = pending.filter(pc.invert(complete))
+            if on_flush is not None:
+                record_manifest()
+                on_flush(files, latest_year.as_py() - 1)
+
+    if pending is not None and pending.num_rows:
+        files = DataLakeLoader(pending, site_code, datalake_root, db_path=None, tier=tier)
+        written += files
+        unrecorded += files
+
+    # One manifest update per stream rather than per year, unless checkpointing
+    record_manifest()
+    return written
+
+
+def default_profile(year: int) -> str:
+    """Write profile for a partition year: 'hot' from the current UTC year on, else 'archive'."""
+    return 'hot' if year >= dt.datetime.now(dt.timezone.utc).year else 'archive'
+
+
+def _years_by_profile(years: List[int], profile: Optional[str] = None) -> dict:
+    """Group partition years by the write profile used for them."""
+    if profile is not None:
+        if profile not in WRITE_PROFILES:
+            raise ValueError(
+                f"Unknown write profile '{profile}'. Use one of {list(WRITE_PROFILES)}"
+            )
+        return {profile: list(years)}
+
+    groups = {}
+    for year in years:
+        groups.setdefault(default_profile(year), []).append(year)
+    return groups
+
+
+def _to_arrow(data: Union[pa.Table, pd.DataFrame]) -> pa.Table:
+    """
+    Return the timeseries columns as an Arrow table with read_ts as naive UTC.
+    DataFrames are converted without an intermediate pandas copy.
+    """
+    if isinstance(data, pd.DataFrame):
+        data = pa.Table.from_pandas(data[TIMESERIES_COLUMNS], preserve_index=False)
+    else:
+        data = data.select(TIMESERIES_COLUMNS)
+
+    read_ts = data.schema.field('read_ts').type
+    if pa.types.is_timestamp(read_ts) and read_ts.tz is not None:
+        # Dropping the zone keeps the underlying UTC instants
+        index = data.schema.get_field_index('read_ts')
+        data = data.set_column(
+            index, 'read_ts', data['read_ts'].cast(pa.timestamp(read_ts.unit))
+        )
+    return data
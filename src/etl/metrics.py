@@ -0,0 +1,295 @@
+import datetime as dt
+import json
+import logging
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+import pandas as pd
+from src.database.connection import DEFAULT_DB_PATH
+from src.database.run_metrics import RUN_METRICS_COLUMNS, write_run_metrics
+from src.etl.scheduler import FetchTask
+from src.utils.helpers import join_codes
+
+try:
+    import resource
+except ImportError:
+    resource = None  # Not available on Windows; peak memory is then not recorded
+
+
+def current_rss() -> Optional[int]:
+    """
+    Resident set size of this process in bytes. Falls back to the lifetime peak from
+    getrusage where /proc is not available, and to None where neither is.
+    """
+    try:
+        with open('/proc/self/statm', 'r') as file:
+            return int(file.read().split()[1]) * resource.getpagesize()
+    except (OSError, AttributeError):
+        if resource is None:
+            return None
+        scale = 1 if sys.platform == 'darwin' else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def file_bytes(paths: Iterable[Path]) -> int:
+    """Total size of the files a stage wrote."""
+    return sum(Path(path).stat().st_size for path in paths)
+
+
+class StageMetric:
+    """
+    Measurement of one unit of work in one stage. The stage fills in ``rows`` and
+    ``bytes``; the collector fills in the time, peak memory and status.
+    """
+
+    def __init__(
+            self,
+            run_id: str,
+            stage: str,
+            task: Optional[FetchTask] = None,
+            site_code=None,
+            parameter_code=None
+            ):
+        self.run_id = run_id
+        self.stage = stage
+        task = task or FetchTask(None, service_code=None)
+        self.service_code = task.service_code
+        self.site_code = join_codes(site_code if site_code is not None else task.site_code)
+        self.parameter_code = join_codes(
+            parameter_code if parameter_code is not None else task.parameter_code
+        )
+        self.start_date = task.start_date
+        self.end_date = task.end_date
+        self.start_ts = dt.datetime.now(dt.timezone.utc).replace(tzinfo=None)
+        self.seconds = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.retries = 0
+        self.peak_rss = None
+        self.status = 'ok'
+        self.error = None
+        self._excluded = 0.0
+
+    def sample(self, rss: Optional[int]) -> None:
+        if rss is not None and (self.peak_rss is None or rss > self.peak_rss):
+            self.peak_rss = rss
+
+    def consume(self, frames: Iterable) -> Iterator:
+        """
+        Pass a stream of frames into this stage, counting their rows. Time spent
+        producing the frames (waiting on requests, transforming) belongs to the stages
+        upstream and is left out of this one.
+        """
+        frames = iter(frames)
+        while True:
+            start = time.perf_counter()
+            try:
+                frame = next(frames)
+            except StopIteration:
+                return
+            finally:
+                self._excluded += time.perf_counter() - start
+            if frame is not None:
+                self.rows += len(frame)
+            yield frame
+
+    def as_dict(self) -> dict:
+        return dict(zip(RUN_METRICS_COLUMNS, [
+            self.run_id, self.stage, self.service_code, self.site_code, self.parameter_code,
+            self.start_date, self.end_date, self.start_ts.isoformat(), round(self.seconds, 6),
+            self.rows, self.bytes, self.retries, self.peak_rss, self.status, self.error
+        ]))
+
+
+class RunMetrics:
+    """
+    Collect per-stage wall time, rows, bytes, retries and peak memory of an ETL run.
+
+    Every finished measurement is appended to a JSON-lines file as it happens, so a
+    crashed run still leaves its metrics behind, and ``persist`` copies the run into the
+    ``run_metrics`` table. Peak memory is sampled by one background thread while any
+    stage is open; stages that overlap (requests in flight while a site is loaded)
+    share the samples taken during their overlap.
+
+    Parameters:
+        run_id (str): Identifier of the run, e.g. the stem of its log file.
+        jsonl_path (Path): JSON-lines file the measurements are appended to, None for none.
+        sample_interval (float): Seconds between memory samples.
+    """
+
+    def __init__(
+            self,
+            run_id: Optional[str] = None,
+            jsonl_path: Optional[Union[str, Path]] = None,
+            sample_interval: float = 0.05
+            ):
+        self.run_id = run_id or f"run_{dt.datetime.now():%Y-%m-%d_%H-%M-%S}"
+        self.jsonl_path = Path(jsonl_path) if jsonl_path is not None else None
+        self.sample_interval = sample_interval
+        self.records: List[dict] = []
+
+        self._persisted = 0
+        self._active = set()
+        self._sampler = None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(
+            self,
+            stage: str,
+            task: Optional[FetchTask] = None,
+            site_code=None,
+            parameter_code=None
+            ) -> Iterator[StageMetric]:
+        """
+        Measure one unit of work: a fetch task, a site and parameter, or the part of a
+        fetch task for one site. An exception marks the measurement failed and is re-raised.
+        """
+        metric = StageMetric(self.run_id, stage, task, site_code, parameter_code)
+        metric.sample(current_rss())
+        with self._lock:
+            self._active.add(metric)
+            if self._sampler is None:
+                self._sampler = threading.Thread(
+                    target=self._sample, name='run-metrics', daemon=True
+                )
+                self._sampler.start()
+
+        start = time.perf_counter()
+        try:
+            yield metric
+        except Exception as e:
+            metric.status = 'failed'
+            metric.error = str(e)
+            raise
+        finally:
+            metric.seconds = max(0.0, time.perf_counter() - start - metric._excluded)
+            metric.sample(current_rss())
+            with self._lock:
+                self._active.discard(metric)
+            self._record(metric)
+
+    def instrument(self, fetch_fn: Callable[..., Optional[pd.DataFrame]]) -> Callable:
+        """
+        Wrap an extractor so every request is recorded as an 'extract' measurement.
+        Retries and give-ups are read from a ResilientFetcher; drop-in ``fetch_fn`` for
+        ``fetch_concurrently``.
+        """
+        def fetch(**task_fields) -> Optional[pd.DataFrame]:
+            with self.stage('extract', FetchTask(**task_fields)) as metric:
+                df = fetch_fn(**task_fields)
+                metric.retries = getattr(fetch_fn, 'last_retries', 0)
+                if getattr(fetch_fn, 'last_failed', False):
+                    metric.status = 'failed'
+                if df is not None:
+                    metric.rows = len(df)
+                    metric.bytes = int(df.memory_usage(deep=True).sum())
+                return df
+        return fetch
+
+    def _sample(self) -> None:
+        while True:
+            with self._lock:
+                if not self._active:
+                    self._sampler = None
+                    return
+                active = list(self._active)
+            rss = current_rss()
+            for metric in active:
+                metric.sample(rss)
+            time.sleep(self.sample_interval)
+
+    def _record(self, metric: StageMetric) -> None:
+        self.merge([metric.as_dict()])
+
+    def merge(self, records: Iterable[dict]) -> None:
+        """
+        Add measurements taken elsewhere, e.g. by worker processes. Their peak memory
+        is that of the process that took them.
+        """
+        records = list(records)
+        if not records:
+            return
+        with self._lock:
+            self.records.extend(records)
+            if self.jsonl_path is not None:
+                try:
+                    self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+                    with open(self.jsonl_path, 'a', encoding='utf-8') as file:
+                        file.writelines(json.dumps(record) + '\n' for record in records)
+                except OSError as e:
+                    logging.warning(f"Could not append run metrics to {self.jsonl_path}: {e}")
+
+    def summary(self) -> List[dict]:
+        """
+        Totals by stage, in the order stages first finished. Extract seconds add up the
+        time of concurrent requests, so they can exceed the run's wall time.
+        """
+        stages = {}
+        for record in self.records:
+            totals = stages.setdefault(record['stage_cd'], {
+                'stage': record['stage_cd'], 'units': 0, 'seconds': 0.0, 'rows': 0, 'bytes': 0,
+                'retries': 0, 'failed': 0, 'peak_rss_bytes': None
+            })
+            totals['units'] += 1
+            totals['seconds'] += record['elapsed_sec']
+            totals['rows'] += record['row_cnt'] or 0
+            totals['bytes'] += record['byte_cnt'] or 0
+            totals['retries'] += record['retry_cnt'] or 0
+            totals['failed'] += record['status_cd'] == 'failed'
+            if record['peak_rss_byte_cnt'] is not None:
+                totals['peak_rss_bytes'] = max(totals['peak_rss_bytes'] or 0,
+                                               record['peak_rss_byte_cnt'])
+        for totals in stages.values():
+            totals['rows_per_second'] = (
+                totals['rows'] / totals['seconds'] if totals['seconds'] else None
+            )
+        return list(stages.values())
+
+    def slowest_sites(self, n: int = 5) -> List[tuple]:
+        """The ``n`` sites with the most seconds over every stage, as (site_cd, seconds)."""
+        seconds = {}
+        for record in self.records:
+            if record['site_cd'] is not None:
+                seconds[record['site_cd']] = (
+                    seconds.get(record['site_cd'], 0.0) + record['elapsed_sec']
+                )
+        return sorted(seconds.items(), key=lambda item: item[1], reverse=True)[:n]
+
+    def log_summary(self) -> None:
+        """Log the per-stage totals and the slowest sites."""
+        for totals in self.summary():
+            rate = totals['rows_per_second']
+            peak = totals['peak_rss_bytes']
+            logging.info(
+                f"⏱️ {totals['stage']}: {totals['units']} units, {totals['seconds']:,.1f}s,"
+                f" {totals['rows']:,} rows ({f'{rate:,.0f}' if rate else '-'} rows/s),"
+                f" {totals['bytes'] / 1024 ** 2:,.1f} MB, {totals['retries']} retries,"
+                f" {totals['failed']} failed,"
+                f" peak RSS {f'{peak / 1024 ** 2:,.0f} MB' if peak else 'n/a'}"
+            )
+        for site_code, seconds in self.slowest_sites():
+            logging.info(f"🐢 Slowest site {site_code}: {seconds:,.1f}s over all stages")
+
+    def persist(self, db_path: Path = DEFAULT_DB_PATH) -> int:
+        """
+        Write the measurements not yet persisted to the run_metrics table.
+
+        Parameters:
+            db_path (Path): DuckDB file holding the run_metrics table.
+        Returns:
+            int: Number of rows written.
+        """
+        with self._lock:
+            records = self.records[self._persisted:]
+            self._persisted = len(self.records)
+        try:
+            return write_run_metrics(records, db_path)
+        except Exception as e:
+            logging.warning(f"Run metrics not persisted, they remain in {self.jsonl_path}: {e}")
+            with self._lock:
+                self._persisted -= len(records)
+            return 0
@@ -0,0 +1,250 @@
+import logging
+import multiprocessing
+import queue
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Union
+import pandas as pd
+from src.etl.loaders import DEFAULT_DATALAKE_PATH, StreamingDataLakeLoader
+from src.etl.metrics import RunMetrics, file_bytes
+from src.etl.scheduler import FetchTask
+from src.etl.transformers import NWISMultiTransformer
+
+
+def _receive(inbox):
+    """Next message for a worker; stops the worker if the coordinating process died."""
+    while True:
+        try:
+            return inbox.get(timeout=1.0)
+        except queue.Empty:
+            if not multiprocessing.parent_process().is_alive():
+                raise SystemExit(1)
+
+
+def _transform_load_worker(
+        inbox,
+        outbox,
+        datalake_root: Path,
+        tier: str,
+        run_id: str
+        ) -> None:
+    """
+    Worker process: transform the windows of one site after another and stream them
+    into the site's year partitions. The coordinator owns the DuckDB file, so partition
+    files are reported back instead of being recorded in the manifest here.
+
+    Messages in: ('window', site, task, raw frame or None), ('end', site), None to stop.
+    Messages out: ('window', site, task, error, metrics), ('flush', site, files, year),
+    ('site', site, files, rows, error, metrics).
+    """
+    metrics = RunMetrics(run_id)
+    sent = 0
+
+    def new_records() -> List[dict]:
+        nonlocal sent
+        records, sent = metrics.records[sent:], len(metrics.records)
+        return records
+
+    while True:
+        message = _receive(inbox)
+        if message is None:
+            return
+        site_code = message[1]
+        flushed = set()
+
+        def windows(message):
+            while message[0] != 'end':
+                _, _, task, raw_data = message
+                frame, error = None, None
+                if raw_data is not None:
+                    try:
+                        with metrics.stage('transform', task) as metric:
+                            frame = NWISMultiTransformer(
+                                raw_data, site_code, task.parameter_code
+                            )
+                            metric.rows, metric.bytes = frame.num_rows, frame.nbytes
+                    except Exception as e:
+                        error = str(e)
+                outbox.put(('window', site_code, task, error, new_records()))
+                if frame is not None:
+                    yield frame
+                message = _receive(inbox)
+
+        def on_flush(files, through_year):
+            flushed.update(files)
+            outbox.put(('flush', site_code, files, through_year))
+
+        stream = windows(message)
+        try:
+            with metrics.stage('load', site_code=site_code) as metric:
+                written = StreamingDataLakeLoader(
+                    metric.consume(stream), site_code, datalake_root,
+                    db_path=None, tier=tier, on_flush=on_flush
+                )
+                metric.bytes = file_bytes(written)
+            outbox.put((
+                'site', site_code, [path for path in written if path not in flushed],
+                metric.rows, None, new_records()
+            ))
+        except Exception as e:
+            # Read the rest of the site's windows so the next site starts in step
+            for _ in stream:
+                pass
+            outbox.put(('site', site_code, [], 0, str(e), new_records()))
+
+
+class TransformLoadPool:
+    """
+    Pool of worker processes that transform raw NWIS 'iv' windows and write them to the
+    datalake, so a CPU-bound backfill uses more than one core.
+
+    Each site is pinned to one worker (a lane) for its whole stream, so the year a window
+    spills into is never written by two processes at once. ``schedule`` interleaves the
+    tasks of one site per lane, so consecutive fetch results go to different workers.
+    Raw frames travel pickled through the worker queues: converting their text columns
+    to Arrow would cost this process more than pickling them. Workers report transform
+    and load measurements, partition flushes and finished sites through ``events``; the
+    caller records files in the manifest and the ledger, since only one process may
+    write the DuckDB file.
+
+    Parameters:
+        processes (int): Worker processes.
+        datalake_root (Path): Root directory for the datalake.
+        tier (str): Datalake tier directory.
+        run_id (str): Run id the workers' measurements are recorded under.
+        queue_size (int): Windows buffered per worker before ``submit`` blocks.
+    """
+
+    def __init__(
+            self,
+            processes: int,
+            datalake_root: Union[str, Path] = DEFAULT_DATALAKE_PATH,
+            tier: str = 'timeseries_iv',
+            run_id: Optional[str] = None,
+            queue_size: int = 2
+            ):
+        if processes < 1:
+            raise ValueError("processes must be at least 1.")
+        # Spawn rather than fork: the fetch threads of the parent may hold locks
+        context = multiprocessing.get_context('spawn')
+        self.outbox = context.Queue()
+        self.inboxes = [context.Queue(maxsize=queue_size) for _ in range(processes)]
+        self.workers = [
+            context.Process(
+                target=_transform_load_worker,
+                args=(inbox, self.outbox, Path(datalake_root), tier, run_id),
+                name=f"transform-load-{i}",
+                daemon=True
+            )
+            for i, inbox in enumerate(self.inboxes)
+        ]
+        for worker in self.workers:
+            worker.start()
+
+        self._lanes: Dict[str, int] = {}
+        self._remaining: Dict[str, int] = {}
+        self._open_sites = set()
+
+    def schedule(self, site_tasks: Dict[str, List[FetchTask]]) -> Iterator[FetchTask]:
+        """
+        Yield the tasks of every site, one site per lane at a time, taking one task from
+        each busy lane in turn. Each site's tasks keep their order.
+
+        Parameters:
+            site_tasks      : Tasks of every site, in window order
+        Yields:
+            FetchTask: Tasks in the order their results should be submitted.
+        """
+        waiting = [(site_code, tasks) for site_code, tasks in site_tasks.items() if tasks]
+        lanes = [None] * len(self.workers)
+        while waiting or any(lanes):
+            for lane, current in enumerate(lanes):
+                if current is None and waiting:
+                    site_code, tasks = waiting.pop(0)
+                    self._lanes[site_code] = lane
+                    self._remaining[site_code] = len(tasks)
+                    self._open_sites.add(site_code)
+                    current = lanes[lane] = iter(tasks)
+                if current is None:
+                    continue
+                task = next(current, None)
+                if task is None:
+                    lanes[lane] = None
+                    continue
+                yield task
+
+    def submit(self, task: FetchTask, raw_data: Optional[pd.DataFrame]) -> None:
+        """Hand one fetched window (None or empty for no data) to its site's worker."""
+        if raw_data is not None and raw_data.empty:
+            raw_data = None
+        self._put(task.site_code, ('window', task.site_code, task, raw_data))
+        self._advance(task.site_code)
+
+    def skip(self, task: FetchTask) -> None:
+        """Account for a scheduled task whose request failed and is not submitted."""
+        self._advance(task.site_code)
+
+    def _advance(self, site_code: str) -> None:
+        self._remaining[site_code] -= 1
+        if not self._remaining[site_code]:
+            self._put(site_code, ('end', site_code))
+
+    def _put(self, site_code: str, message) -> None:
+        inbox = self.inboxes[self._lanes[site_code]]
+        while True:
+            try:
+                inbox.put(message, timeout=1.0)
+                return
+            except queue.Full:
+                self._check_workers()
+
+    def _check_workers(self) -> None:
+        for worker in self.workers:
+            if not worker.is_alive() and worker.exitcode not in (0, None):
+                raise RuntimeError(f"Worker {worker.name} died with exit code {worker.exitcode}")
+
+    def events(self, wait: bool = False) -> Iterator[tuple]:
+        """
+        Yield the messages the workers have sent. With ``wait``, keep yielding until
+        every scheduled site has finished.
+        """
+        while True:
+            try:
+                event = self.outbox.get(timeout=1.0) if wait and self._open_sites else \
+                    self.outbox.get_nowait()
+            except queue.Empty:
+                if wait and self._open_sites:
+                    self._check_workers()
+                    continue
+                return
+            if event[0] == 'site':
+                self._open_sites.discard(event[1])
+            yield event
+
+    def close(self, wait: bool = True) -> None:
+        """
+        Stop the workers once they have finished their queued windows, or at once when
+        not waiting, e.g. after an error left a site unfinished.
+        """
+        for inbox, worker in zip(self.inboxes, self.workers):
+            if wait and worker.is_alive():
+                try:
+                    inbox.put(None, timeout=5.0)
+                except queue.Full:
+                    pass
+        for worker in self.workers:
+            worker.join(timeout=30.0 if wait else 0)
+            if worker.is_alive():
+                if wait:
+                    logging.warning(f"Terminating worker {worker.name}")
+                worker.terminate()
+                worker.join()
+        # Windows still queued for a dead worker must not keep this process from exiting
+        for inbox in self.inboxes:
+            inbox.cancel_join_thread()
+            inbox.close()
+
+    def __enter__(self) -> 'TransformLoadPool':
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close(wait=exc_type is None)
@@ -0,0 +1,158 @@
+from typing import Union
+import duckdb
+import pandas as pd
+import pyarrow as pa
+from src.database.aggregates import LOCAL_TIME_ZONE
+
+RESAMPLE_FREQUENCIES = ('hour', 'day')
+
+# Buckets of every series in one pass. Readings are first reduced to one row per series
+# and reporting interval, then each distinct interval is placed in its bucket once, so the
+# costly time zone arithmetic runs per interval of the timeline, not per reading.
+# read_ts is naive UTC and the session time zone is UTC, so casts between TIMESTAMP and
+# TIMESTAMPTZ never shift a reading. Hours are cut in UTC, so the repeated local hour in
+# autumn stays two buckets; days are cut at local midnight and last 23, 24 or 25 hours.
+# Buckets between a series' first and last reading that hold no reading are emitted
+# with zero coverage, so gaps of whole hours or days are flagged too.
+_RESAMPLE_SQL = """
+WITH slots AS (
+    SELECT
+        CAST(site_cd AS VARCHAR) AS site_cd,
+        CAST(parameter_cd AS VARCHAR) AS parameter_cd,
+        epoch_us(CAST(read_ts AS TIMESTAMP)) // ($interval_minutes * 60000000) AS slot,
+        max(CAST(approval_status AS VARCHAR)) AS approval_status,
+        sum(value) AS value_sum,
+        min(value) AS min_value,
+        max(value) AS max_value,
+        count(*) AS reading_cnt
+    FROM series
+    WHERE value IS NOT NULL AND NOT isnan(value)
+    GROUP BY ALL
+),
+slot_bucket AS (
+    SELECT
+        slot,
+        CASE WHEN $freq = 'hour'
+            THEN date_trunc('hour', slot_ts)
+            ELSE CAST(timezone($tz, CAST(CAST(timezone($tz, CAST(slot_ts AS TIMESTAMPTZ))
+                AS DATE) AS TIMESTAMP)) AS TIMESTAMP)
+        END AS bucket_start_utc
+    FROM (
+        SELECT DISTINCT slot, make_timestamp(slot * $interval_minutes * 60000000) AS slot_ts
+        FROM slots
+    )
+),
+grouped AS (
+    SELECT
+        s.site_cd,
+        s.parameter_cd,
+        b.bucket_start_utc,
+        max(s.approval_status) AS approval_status,
+        sum(s.value_sum) / sum(s.reading_cnt) AS mean_value,
+        min(s.min_value) AS min_value,
+        max(s.max_value) AS max_value,
+        sum(s.reading_cnt) AS reading_cnt,
+        count(*) AS interval_cnt
+    FROM slots AS s
+    INNER JOIN slot_bucket AS b USING (slot)
+    GROUP BY s.site_cd, s.parameter_cd, b.bucket_start_utc
+),
+series_bucket AS (
+    -- Every bucket from the first to the last of each series, with or without readings
+    SELECT
+        site_cd,
+        parameter_cd,
+        unnest(CASE WHEN $freq = 'hour'
+            THEN generate_series(first_bucket, last_bucket, INTERVAL 1 HOUR)
+            ELSE list_transform(
+                generate_series(
+                    CAST(CAST(timezone($tz, CAST(first_bucket AS TIMESTAMPTZ)) AS DATE)
+                        AS TIMESTAMP),
+                    CAST(CAST(timezone($tz, CAST(last_bucket AS TIMESTAMPTZ)) AS DATE)
+                        AS TIMESTAMP),
+                    INTERVAL 1 DAY
+                ),
+                local_midnight -> CAST(timezone($tz, local_midnight) AS TIMESTAMP)
+            )
+        END) AS bucket_start_utc
+    FROM (
+        SELECT
+            site_cd,
+            parameter_cd,
+            min(bucket_start_utc) AS first_bucket,
+            max(bucket_start_utc) AS last_bucket
+        FROM grouped
+        GROUP BY site_cd, parameter_cd
+    )
+),
+bucket AS (
+    SELECT
+        bucket_start_utc,
+        CAST(timezone($tz, CAST(bucket_start_utc AS TIMESTAMPTZ)) AS TIMESTAMP)
+            AS bucket_start_local,
+        CASE WHEN $freq = 'hour'
+            THEN bucket_start_utc + INTERVAL 1 HOUR
+            ELSE CAST(timezone($tz, CAST(CAST(timezone($tz, CAST(bucket_start_utc
+                AS TIMESTAMPTZ)) AS DATE) + 1 AS TIMESTAMP)) AS TIMESTAMP)
+        END AS bucket_end_utc
+    FROM (SELECT DISTINCT bucket_start_utc FROM series_bucket)
+)
+SELECT
+    s.site_cd,
+    s.parameter_cd,
+    s.bucket_start_utc,
+    b.bucket_start_local,
+    g.approval_status,
+    g.mean_value,
+    g.min_value,
+    g.max_value,
+    CAST(coalesce(g.reading_cnt, 0) AS BIGINT) AS reading_cnt,
+    CAST(
+        (epoch(b.bucket_end_utc) - epoch(s.bucket_start_utc)) // ($interval_minutes * 60)
+        AS BIGINT
+    ) AS expected_cnt,
+    least(coalesce(g.interval_cnt, 0) / expected_cnt, 1.0) AS coverage_fraction,
+    greatest(expected_cnt - coalesce(g.interval_cnt, 0), 0) AS missing_cnt,
+    coalesce(g.interval_cnt, 0) < expected_cnt AS gap_flag
+FROM series_bucket AS s
+INNER JOIN bucket AS b USING (bucket_start_utc)
+LEFT JOIN grouped AS g USING (site_cd, parameter_cd, bucket_start_utc)
+ORDER BY s.site_cd, s.parameter_cd, s.bucket_start_utc
+"""
+
+
+def ResampleTransformer(
+        data: Union[pa.Table, pa.RecordBatchReader, pd.DataFrame],
+        freq: str = 'day',
+        tz: str = LOCAL_TIME_ZONE,
+        interval_minutes: int = 15
+        ) -> pa.Table:
+    """
+    Resample instantaneous readings of any number of series to hourly or daily buckets.
+
+    Every (site, parameter) series is aggregated in a single DuckDB pass. A bucket's
+    coverage is the share of its ``interval_minutes`` slots holding at least one
+    reading; local days that DST shortens or lengthens expect 92 or 100 slots of
+    15 minutes rather than 96. Buckets without any reading between the first and last
+    reading of a series are returned with no values, zero coverage and the gap flag set.
+
+    Parameters:
+        data                : Readings with site_cd, parameter_cd, read_ts (naive UTC or
+                              zoned), value and approval_status, e.g. from read_timeseries
+        freq                : 'hour' for UTC hours, 'day' for local days in ``tz``
+        tz                  : Time zone of the local day boundaries and bucket_start_local
+        interval_minutes    : Reporting interval the coverage is measured against
+    Returns:
+        pa.Table: One row per series and bucket with mean/min/max values, reading count,
+                  expected slots, coverage fraction, missing slots and a gap flag. The
+                  approval status is 'P' when any reading in the bucket is provisional.
+    """
+    if freq not in RESAMPLE_FREQUENCIES:
+        raise ValueError(f"freq must be one of {RESAMPLE_FREQUENCIES}, got {freq!r}")
+
+    with duckdb.connect() as con:
+        con.execute("SET TimeZone = 'UTC'")
+        con.register('series', data)
+        return con.execute(
+            _RESAMPLE_SQL, {'freq': freq, 'tz': tz, 'interval_minutes': interval_minutes}
+        ).arrow()
@@ -0,0 +1,345 @@
+import datetime as dt
+import json
+import logging
+import os
+import random
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import pandas as pd
+import requests
+from src.etl.cache import ResponseCache
+from src.etl.scheduler import NWIS_HOST, FetchTask, RateLimiter
+
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    pass  # dotenv is optional
+
+# Default location of the dead-letter file (can be overridden)
+ENV_DATA_PATH = os.getenv('DATA_STORAGE_PATH')
+if ENV_DATA_PATH:
+    DEFAULT_DEAD_LETTER_PATH = Path(ENV_DATA_PATH) / 'dead_letter' / 'nwis.jsonl'
+else:
+    DEFAULT_DEAD_LETTER_PATH = (
+        Path(__file__).resolve().parents[1] / 'data' / 'dead_letter' / 'nwis.jsonl'
+    )
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when a request is refused because the host's circuit is open."""
+
+
+class RetryPolicy:
+    """
+    Exponential backoff with full jitter.
+
+    Parameters:
+        max_attempts (int): Attempts per request, including the first.
+        base_delay (float): Delay cap in seconds before the first retry.
+        max_delay (float): Upper bound on any single delay in seconds.
+    """
+
+    def __init__(self, max_attempts: int = 5, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def delay(self, attempt: int) -> float:
+        """Seconds to wait before retry number ``attempt`` (1-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+
+
+class RetryBudget:
+    """
+    Run-wide cap on retries, so a failing upstream cannot multiply a run's traffic.
+
+    Parameters:
+        max_retries (int): Retries allowed across every request in the run.
+    """
+
+    def __init__(self, max_retries: int = 500):
+        self.max_retries = max_retries
+        self.spent = 0
+        self._lock = threading.Lock()
+
+    def try_spend(self) -> bool:
+        """Reserve one retry. Returns False once the budget is exhausted."""
+        with self._lock:
+            if self.spent >= self.max_retries:
+                return False
+            self.spent += 1
+            return True
+
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failures the circuit opens and requests are
+    refused for ``reset_timeout`` seconds. The circuit then lets a single trial request
+    through; success closes it again, failure re-opens it.
+
+    Parameters:
+        failure_threshold (int): Consecutive failures that open the circuit.
+        reset_timeout (float): Seconds to stay open before allowing a trial request.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 60.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """True if a request may be sent now."""
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.failures >= self.failure_threshold:
+                if self.opened_at is None:
+                    logging.warning(
+                        f"Circuit opened after {self.failures} consecutive failures;"
+                        f" pausing requests for {self.reset_timeout:.0f}s"
+                    )
+                self.opened_at = time.monotonic()
+
+
+_CIRCUIT_BREAKERS: Dict[str, CircuitBreaker] = {}
+_CIRCUIT_BREAKERS_LOCK = threading.Lock()
+
+
+def get_circuit_breaker(
+        host: str,
+        failure_threshold: int = 5,
+        reset_timeout: float = 60.0
+        ) -> CircuitBreaker:
+    """Return the process-wide circuit breaker for a host, creating it on first use."""
+    with _CIRCUIT_BREAKERS_LOCK:
+        breaker = _CIRCUIT_BREAKERS.get(host)
+        if breaker is None:
+            breaker = CircuitBreaker(failure_threshold, reset_timeout)
+            _CIRCUIT_BREAKERS[host] = breaker
+        return breaker
+
+
+class DeadLetterQueue:
+    """
+    JSON-lines record of fetch tasks that failed after every retry.
+    A later ``--retry-failed`` run reads the tasks back and re-drives them.
+
+    Parameters:
+        path (Path): JSON-lines file holding the failed tasks.
+    """
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_DEAD_LETTER_PATH):
+        self.path = Path(path)
+        self.count = 0
+        self._added = []
+        self._lock = threading.Lock()
+
+    def __contains__(self, task: FetchTask) -> bool:
+        """Whether the task was added by this process, i.e. failed during this run."""
+        with self._lock:
+            return task in self._added
+
+    def add(self, task: FetchTask, error: Exception) -> None:
+        """Append a failed task with the error that ended it."""
+        record = dict(task._asdict())
+        record['error_tx'] = f"{type(error).__name__}: {error}"
+        record['failed_ts'] = dt.datetime.now().isoformat(timespec='seconds')
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(record) + '\n')
+            self.count += 1
+            self._added.append(task)
+
+    def load(self) -> List[FetchTask]:
+        """Read the failed tasks, dropping duplicates while keeping file order."""
+        if not self.path.exists():
+            return []
+        tasks = []
+        with open(self.path, 'r', encoding='utf-8') as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                task = FetchTask(
+                    site_code=record['site_code'],
+                    parameter_code=record.get('parameter_code'),
+                    start_date=record.get('start_date'),
+                    end_date=record.get('end_date'),
+                    service_code=record.get('service_code', 'iv')
+                )
+                if task not in tasks:
+                    tasks.append(task)
+        return tasks
+
+    def take(self) -> List[FetchTask]:
+        """
+        Load the failed tasks and start a fresh file. The previous file is kept
+        as ``<name>.replayed`` so nothing is lost if the re-drive itself dies.
+        """
+        with self._lock:
+            tasks = self.load()
+            if self.path.exists():
+                os.replace(self.path, self.path.with_suffix(self.path.suffix + '.replayed'))
+        return tasks
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Decide whether a failed request is worth retrying.
+
+    dataretrieval raises ValueError for 400/404/414 responses, which will fail the same
+    way every time, and so will HTTP 4xx responses other than 429 (e.g. an unknown HDB
+    SDI). Network errors, 5xx responses and unparseable bodies (e.g. an HTML 503 page,
+    which surfaces as a JSONDecodeError) are transient.
+    """
+    response = getattr(error, 'response', None)
+    if isinstance(error, requests.HTTPError) and response is not None:
+        return not 400 <= response.status_code < 500 or response.status_code == 429
+    if isinstance(error, (CircuitOpenError, json.JSONDecodeError, requests.RequestException)):
+        return True
+    if isinstance(error, (ValueError, TypeError)):
+        return False
+    return True
+
+
+class ResilientFetcher:
+    """
+    Wrap an extractor with retries, a per-host circuit breaker, a run-wide retry
+    budget and a dead-letter queue. Drop-in ``fetch_fn`` for ``fetch_concurrently``.
+
+    The wrapped extractor must raise on failure (e.g. ``NWISExtractor`` with
+    ``raise_errors=True``) so failures can be told apart from empty responses.
+    With a response cache, cached windows are returned before the circuit breaker and
+    rate limiter are consulted, so re-running over cached history is not throttled.
+
+    Parameters:
+        fetch_fn (Callable): Extractor called with the FetchTask fields as keywords.
+        policy (RetryPolicy): Backoff policy.
+        budget (RetryBudget): Shared retry budget for the run.
+        dead_letter (DeadLetterQueue): Where exhausted tasks are recorded.
+        host (str): Host key for the circuit breaker.
+        rate_limiter (RateLimiter): Optional limiter applied to every attempt.
+        cache (ResponseCache): Optional cache looked up before any request and filled
+                               with every successful response.
+    """
+
+    def __init__(
+            self,
+            fetch_fn: Callable[..., Optional[pd.DataFrame]],
+            policy: Optional[RetryPolicy] = None,
+            budget: Optional[RetryBudget] = None,
+            dead_letter: Optional[DeadLetterQueue] = None,
+            host: str = NWIS_HOST,
+            rate_limiter: Optional[RateLimiter] = None,
+            cache: Optional[ResponseCache] = None
+            ):
+        self.fetch_fn = fetch_fn
+        self.policy = policy or RetryPolicy()
+        self.budget = budget or RetryBudget()
+        self.dead_letter = dead_letter or DeadLetterQueue()
+        self.breaker = get_circuit_breaker(host)
+        self.rate_limiter = rate_limiter
+        self.cache = cache
+
+        self.retries = 0
+        self.failures = 0
+        self._lock = threading.Lock()
+        # Outcome of the latest call made by each worker thread
+        self._last_call = threading.local()
+
+    @property
+    def last_retries(self) -> int:
+        """Retries spent by the latest call of the calling thread."""
+        return getattr(self._last_call, 'retries', 0)
+
+    @property
+    def last_failed(self) -> bool:
+        """Whether the latest call of the calling thread gave up on its task."""
+        return getattr(self._last_call, 'failed', False)
+
+    def __call__(self, **task_fields) -> Optional[pd.DataFrame]:
+        task = FetchTask(**task_fields)
+        attempt = 0
+        self._last_call.retries = 0
+        self._last_call.failed = False
+
+        if self.cache is not None:
+            key = ResponseCache.make_key(
+                task.service_code, task.site_code, task.parameter_code,
+                task.start_date, task.end_date
+            )
+            found, df = self.cache.get(key)
+            if found:
+                return df
+
+        while True:
+            attempt += 1
+            try:
+                if not self.breaker.allow():
+                    raise CircuitOpenError(f"Circuit open for site {task.site_code}")
+                if self.rate_limiter is not None:
+                    self.rate_limiter.acquire()
+                df = self.fetch_fn(**task_fields)
+                self.breaker.record_success()
+                if self.cache is not None:
+                    self.cache.put(key, df)
+                return df
+
+            except Exception as error:
+                retryable = is_retryable(error)
+                # A request the host rejects as invalid says nothing about its health
+                if retryable and not isinstance(error, CircuitOpenError):
+                    self.breaker.record_failure()
+
+                retry = (
+                    retryable
+                    and attempt < self.policy.max_attempts
+                    and self.budget.try_spend()
+                )
+                if not retry:
+                    logging.error(
+                        f"Giving up on site {task.site_code}, parameter {task.parameter_code},"
+                        f" window {task.start_date} to {task.end_date}"
+                        f" after {attempt} attempt(s): {error}"
+                    )
+                    self.dead_letter.add(task, error)
+                    self._last_call.failed = True
+                    with self._lock:
+                        self.failures += 1
+                    return None
+
+                delay = self.policy.delay(attempt)
+                if isinstance(error, CircuitOpenError):
+                    delay = max(delay, self.breaker.reset_timeout / 2)
+                logging.warning(
+                    f"Attempt {attempt} failed for site {task.site_code},"
+                    f" parameter {task.parameter_code}: {error}. Retrying in {delay:.1f}s"
+                )
+                self._last_call.retries += 1
+                with self._lock:
+                    self.retries += 1
+                time.sleep(delay)
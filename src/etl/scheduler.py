@@ -0,0 +1,138 @@
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+import time
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+import pandas as pd
+from src.etl.extractors import NWISExtractor
+
+# Host serving the NWIS water services used by dataretrieval
+NWIS_HOST = 'waterservices.usgs.gov'
+
+# One unit of work for the scheduler. Field names match the NWISExtractor signature
+# so a task can be splatted straight into any extractor-compatible callable.
+FetchTask = namedtuple(
+    'FetchTask',
+    ['site_code', 'parameter_code', 'start_date', 'end_date', 'service_code'],
+    defaults=[None, None, None, 'iv']
+    )
+
+
+class RateLimiter:
+    """
+    Token-bucket rate limiter shared by every worker talking to the same host.
+
+    Parameters:
+        rate (float): Sustained requests per second.
+        burst (int): Number of requests allowed back-to-back before throttling.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError("rate must be greater than zero.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def set_rate(self, rate: float, burst: int = 1) -> None:
+        """Change the sustained rate and burst; requests already waiting keep their slot."""
+        if rate <= 0:
+            raise ValueError("rate must be greater than zero.")
+        with self._lock:
+            self.rate = rate
+            self.burst = max(1, burst)
+            self._tokens = min(self._tokens, float(self.burst))
+
+    def acquire(self) -> None:
+        """Block until the caller may issue one request."""
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future slot, so waiting threads queue up fairly
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+
+
+_RATE_LIMITERS: Dict[str, RateLimiter] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+def get_rate_limiter(host: str, rate: float, burst: int = 1) -> RateLimiter:
+    """
+    Return the process-wide rate limiter for a host, creating it on first use.
+    Every scheduler hitting the same host shares one budget; asking for a different
+    rate or burst changes it for all of them.
+    """
+    with _RATE_LIMITERS_LOCK:
+        limiter = _RATE_LIMITERS.get(host)
+        if limiter is None:
+            limiter = RateLimiter(rate, burst)
+            _RATE_LIMITERS[host] = limiter
+        elif limiter.rate != rate or limiter.burst != max(1, burst):
+            logging.info(f"Rate limit for {host} changed from {limiter.rate} to {rate} req/s")
+            limiter.set_rate(rate, burst)
+        return limiter
+
+
+def fetch_concurrently(
+        tasks: Iterable[FetchTask],
+        fetch_fn: Callable[..., Optional[pd.DataFrame]] = NWISExtractor,
+        max_workers: int = 4,
+        requests_per_second: Optional[float] = None,
+        host: str = NWIS_HOST
+        ) -> Iterator[Tuple[FetchTask, Optional[pd.DataFrame]]]:
+    """
+    Fan fetch tasks out over a thread pool and yield results in submission order.
+
+    At most ``2 * max_workers`` requests are in flight or buffered at any time, so
+    memory stays bounded while the consumer transforms and loads earlier results.
+
+    Parameters:
+        tasks (Iterable[FetchTask]): Requests to issue, in the order results are wanted.
+        fetch_fn (Callable): Extractor called as ``fetch_fn(**task._asdict())``.
+                             Defaults to NWISExtractor; swap in a stub for testing.
+        max_workers (int): Number of concurrent requests.
+        requests_per_second (float): Optional per-host rate limit.
+        host (str): Host key used to share the rate limit across schedulers.
+    Yields:
+        Tuple[FetchTask, Optional[pd.DataFrame]]: Each task with its raw result.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1.")
+
+    limiter = get_rate_limiter(host, requests_per_second) if requests_per_second else None
+
+    def run(task: FetchTask) -> Optional[pd.DataFrame]:
+        if limiter is not None:
+            limiter.acquire()
+        try:
+            return fetch_fn(**task._asdict())
+        except Exception as e:
+            logging.error(
+                f"Error fetching data for site {task.site_code}"
+                f" and parameter {task.parameter_code}: {e}"
+                )
+            return None
+
+    window = max_workers * 2
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='nwis-fetch') as pool:
+        try:
+            for task in tasks:
+                pending.append((task, pool.submit(run, task)))
+                if len(pending) >= window:
+                    done_task, future = pending.popleft()
+                    yield done_task, future.result()
+            while pending:
+                done_task, future = pending.popleft()
+                yield done_task, future.result()
+        finally:
+            # Consumer stopped early: drop anything that has not started yet
+            for _, future in pending:
+                future.cancel()
@@ -1,5 +1,47 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import logging
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+# Fixed Arrow schema of transformed NWIS 'iv' data. Repeated strings are dictionary
+# encoded and read_ts is naive UTC, matching the parquet files in the datalake.
+NWIS_IV_SCHEMA = pa.schema([
+    ('site_cd', pa.dictionary(pa.int8(), pa.string())),
+    ('read_ts', pa.timestamp('ns')),
+    ('parameter_cd', pa.dictionary(pa.int8(), pa.string())),
+    ('value', pa.float64()),
+    ('approval_status', pa.dictionary(pa.int8(), pa.string())),
+    ('year', pa.int64()),
+])
+
+# Fixed Arrow schema of transformed NWIS 'dv' data, in the shape DailyObservationsLoader
+# takes. read_dt is the local calendar date NWIS reports the daily mean for.
+NWIS_DV_SCHEMA = pa.schema([
+    ('site_cd', pa.dictionary(pa.int16(), pa.string())),
+    ('parameter_cd', pa.dictionary(pa.int8(), pa.string())),
+    ('read_dt', pa.date32()),
+    ('value', pa.float64()),
+    ('approval_status', pa.dictionary(pa.int8(), pa.string())),
+])
+
+# HDB reports times in Mountain Standard Time all year round
+HDB_TIME_ZONE = 'Etc/GMT+7'
+HDB_TIME_FORMAT = '%m/%d/%Y %I:%M:%S %p'
+
+# Fixed Arrow schema of transformed CBRFC forecasts. Times are naive UTC; issue_dt is the
+# UTC date of the issuance and keys the forecast_cbrfc partitions with site_cd.
+CBRFC_FORECAST_SCHEMA = pa.schema([
+    ('site_cd', pa.dictionary(pa.int8(), pa.string())),
+    ('issue_ts', pa.timestamp('ns')),
+    ('valid_ts', pa.timestamp('ns')),
+    ('parameter_cd', pa.dictionary(pa.int8(), pa.string())),
+    ('value', pa.float64()),
+    ('issue_dt', pa.date32()),
+])
+
+# Value columns of the CBRFC export and the NWIS parameter each one forecasts
+CBRFC_VALUE_COLUMNS = {'flow_cfs': '00060'}
 
 
 def NWISTransformer(df: pd.DataFrame, site_code: str, parameter_code: str) -> pd.DataFrame:
@@ -74,3 +116,338 @@ def NWISTransformer(df: pd.DataFrame, site_code: str, parameter_code: str) -> pd
     df_clean = df_clean.dropna(subset=required_fields)
 
     return df_clean
+
+
+def NWISMultiTransformer(
+        df: pd.DataFrame,
+        site_code: str,
+        parameter_codes: Optional[Union[str, Iterable[str]]] = None
+        ) -> pa.Table:
+    """
+    Transform a wide multi-parameter NWIS 'iv' response into the standard long format
+    in one vectorized pass.
+
+    The raw frame holds one value column and one '_cd' qualifier column per parameter.
+    Values and qualifiers are stacked column by column with numpy, and the repeated
+    string columns are built as dictionary arrays, so no per-parameter frames, concat
+    or string slicing over every row are needed. The numeric arrays are handed to
+    Arrow without copying.
+
+    Parameters:
+        df: Raw dataframe from nwis.get_record() for one site and several parameterCd
+        site_code: USGS site number
+        parameter_codes: Parameter code(s) to keep. Defaults to every parameter in df.
+    Returns:
+        A pyarrow Table with the NWIS_IV_SCHEMA columns:
+        ['site_cd', 'read_ts', 'parameter_cd', 'value', 'approval_status', 'year']
+    """
+    if df is None or df.empty:
+        logging.warning(f"No data to transform for site {site_code}.")
+        return NWIS_IV_SCHEMA.empty_table()
+
+    # Datetime is the index in the raw data (second level for multi-site requests)
+    if 'datetime' in df.columns:
+        read_ts = pd.DatetimeIndex(df['datetime'])
+    elif 'datetime' in (df.index.names or []):
+        read_ts = pd.DatetimeIndex(df.index.get_level_values('datetime'))
+    else:
+        logging.error(f"Missing 'datetime' column in data for site {site_code}.")
+        raise ValueError("Missing 'datetime' column.")
+    if read_ts.tz is not None:
+        read_ts = read_ts.tz_convert('UTC').tz_localize(None)
+
+    # Pair every value column with its qualifier column, keeping one series per parameter
+    if isinstance(parameter_codes, str):
+        parameter_codes = [parameter_codes]
+    wanted = set(parameter_codes) if parameter_codes is not None else None
+    value_cols = {}
+    for col in df.columns:
+        if col in ('site_no', 'datetime') or col.endswith('cd'):
+            continue
+        parameter_code = col.split('_')[0]
+        if wanted is not None and parameter_code not in wanted:
+            continue
+        if parameter_code in value_cols:
+            logging.warning(
+                f"Ignoring extra series '{col}' for site {site_code}"
+                f" and parameter {parameter_code}."
+            )
+            continue
+        value_cols[parameter_code] = col
+
+    if not value_cols:
+        logging.warning(f"No parameter columns to transform for site {site_code}.")
+        return NWIS_IV_SCHEMA.empty_table()
+
+    parameters = list(value_cols)
+    n_rows = len(df)
+
+    values = np.concatenate([
+        pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64')
+        for col in value_cols.values()
+    ])
+    status_codes, status_categories = _stack_approval_codes(
+        [df.get(f"{col}_cd") for col in value_cols.values()], n_rows
+    )
+    parameter_idx = np.repeat(np.arange(len(parameters), dtype='int8'), n_rows)
+    timestamps = np.tile(read_ts.to_numpy(dtype='datetime64[ns]'), len(parameters))
+
+    # Drop bad rows (missing value or datetime) once, on the stacked arrays
+    keep = ~np.isnan(values) & ~np.isnat(timestamps)
+    values = values[keep]
+    timestamps = timestamps[keep]
+    parameter_idx = parameter_idx[keep]
+    status_codes = status_codes[keep]
+
+    return pa.Table.from_arrays([
+        pa.DictionaryArray.from_arrays(np.zeros(len(values), dtype='int8'), [site_code]),
+        pa.array(timestamps),
+        pa.DictionaryArray.from_arrays(parameter_idx, parameters),
+        pa.array(values),
+        pa.DictionaryArray.from_arrays(
+            pa.array(status_codes, mask=status_codes < 0), pa.array(status_categories, pa.string())
+        ),
+        pa.array(timestamps.astype('datetime64[Y]').astype('int64') + 1970),
+    ], schema=NWIS_IV_SCHEMA)
+
+
+def NWISDailyTransformer(
+        df: pd.DataFrame,
+        parameter_codes: Optional[Union[str, Iterable[str]]] = None
+        ) -> pa.Table:
+    """
+    Transform a wide NWIS 'dv' response for one or many sites into the long
+    daily_observations shape in one vectorized pass.
+
+    Every value column (one per parameter, statistic and method) is stacked with its
+    qualifier column. A site missing a parameter only has empty cells in that column,
+    which are dropped. When a parameter has several method columns, the first column
+    holding a value wins for each site and day.
+
+    Parameters:
+        df: Raw dataframe from nwis.get_record(service='dv'), single or multi-site
+        parameter_codes: Parameter code(s) to keep. Defaults to every parameter in df.
+    Returns:
+        A pyarrow Table with the NWIS_DV_SCHEMA columns:
+        ['site_cd', 'parameter_cd', 'read_dt', 'value', 'approval_status']
+    """
+    if df is None or df.empty:
+        logging.warning("No daily data to transform.")
+        return NWIS_DV_SCHEMA.empty_table()
+
+    # Multi-site responses index on (site_no, datetime), single-site ones on datetime
+    index_names = df.index.names or []
+    if 'datetime' not in index_names or ('site_no' not in df.columns
+                                         and 'site_no' not in index_names):
+        logging.error("Missing 'site_no' or 'datetime' in daily data.")
+        raise ValueError("Missing 'site_no' or 'datetime'.")
+    read_ts = pd.DatetimeIndex(df.index.get_level_values('datetime'))
+    if read_ts.tz is not None:
+        read_ts = read_ts.tz_convert('UTC').tz_localize(None)
+    site_nos = (
+        df.index.get_level_values('site_no') if 'site_no' in index_names else df['site_no']
+    )
+    site_categorical = pd.Categorical(site_nos)
+
+    if isinstance(parameter_codes, str):
+        parameter_codes = [parameter_codes]
+    wanted = set(parameter_codes) if parameter_codes is not None else None
+    value_cols = [
+        col for col in df.columns
+        if col not in ('site_no', 'datetime') and not col.endswith('cd')
+        and (wanted is None or col.split('_')[0] in wanted)
+    ]
+    if not value_cols:
+        logging.warning("No parameter columns to transform in daily data.")
+        return NWIS_DV_SCHEMA.empty_table()
+
+    parameters = list(dict.fromkeys(col.split('_')[0] for col in value_cols))
+    n_rows = len(df)
+
+    values = np.concatenate([
+        pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64') for col in value_cols
+    ])
+    status_codes, status_categories = _stack_approval_codes(
+        [df.get(f"{col}_cd") for col in value_cols], n_rows
+    )
+    parameter_idx = np.repeat(
+        np.array([parameters.index(col.split('_')[0]) for col in value_cols], dtype='int8'),
+        n_rows
+    )
+    site_idx = np.tile(site_categorical.codes.astype('int16'), len(value_cols))
+    dates = np.tile(read_ts.to_numpy(dtype='datetime64[D]'), len(value_cols))
+
+    # Drop empty cells, then keep the first column's value of each site, parameter and day
+    keep = ~np.isnan(values) & ~np.isnat(dates) & (site_idx >= 0)
+    keep[keep] = ~pd.DataFrame({
+        'site': site_idx[keep], 'parameter': parameter_idx[keep], 'date': dates[keep]
+    }).duplicated().to_numpy()
+
+    return pa.Table.from_arrays([
+        pa.DictionaryArray.from_arrays(
+            site_idx[keep], pa.array(site_categorical.categories.astype(str), pa.string())
+        ),
+        pa.DictionaryArray.from_arrays(parameter_idx[keep], parameters),
+        pa.array(dates[keep], pa.date32()),
+        pa.array(values[keep]),
+        pa.DictionaryArray.from_arrays(
+            pa.array(status_codes[keep], mask=status_codes[keep] < 0),
+            pa.array(status_categories, pa.string())
+        ),
+    ], schema=NWIS_DV_SCHEMA)
+
+
+def HDBTransformer(
+        df: pd.DataFrame,
+        series: Dict[str, Tuple[str, str]],
+        time_zone: str = HDB_TIME_ZONE
+        ) -> pa.Table:
+    """
+    Transform a long HDBExtractor response for several site-datatype ids (SDIs) into
+    the standard lake format in one vectorized pass.
+
+    Each SDI is mapped to its (site_cd, parameter_cd) with an integer lookup over the
+    distinct SDIs. Each distinct time string is parsed once and shifted from the HDB
+    time zone to naive UTC. HDB has no approval flags, so approval_status is left missing.
+
+    Parameters:
+        df: Raw dataframe from HDBExtractor with columns ['sdi', 'datetime', 'value']
+        series: (site_cd, parameter_cd) by SDI, from usbr_site_parameter
+        time_zone: Time zone of the HDB timestamps
+    Returns:
+        A pyarrow Table with the NWIS_IV_SCHEMA columns:
+        ['site_cd', 'read_ts', 'parameter_cd', 'value', 'approval_status', 'year']
+    """
+    if df is None or df.empty:
+        logging.warning("No HDB data to transform.")
+        return NWIS_IV_SCHEMA.empty_table()
+
+    sdi_categorical = pd.Categorical(df['sdi'].astype(str))
+    unknown = [sdi for sdi in sdi_categorical.categories if sdi not in series]
+    if unknown:
+        logging.warning(f"Dropping HDB data of SDIs without a site parameter: {unknown}")
+        if len(unknown) == len(sdi_categorical.categories):
+            return NWIS_IV_SCHEMA.empty_table()
+
+    sites = sorted({series[sdi][0] for sdi in sdi_categorical.categories if sdi in series})
+    parameters = sorted({series[sdi][1] for sdi in sdi_categorical.categories if sdi in series})
+    site_lookup = np.array([
+        sites.index(series[sdi][0]) if sdi in series else -1
+        for sdi in sdi_categorical.categories
+    ] + [-1], dtype='int8')
+    parameter_lookup = np.array([
+        parameters.index(series[sdi][1]) if sdi in series else -1
+        for sdi in sdi_categorical.categories
+    ] + [-1], dtype='int8')
+    site_idx = site_lookup[sdi_categorical.codes]
+    parameter_idx = parameter_lookup[sdi_categorical.codes]
+
+    # Series of one response share their timestamps, so only distinct strings are parsed
+    time_categorical = pd.Categorical(df['datetime'])
+    read_ts = pd.DatetimeIndex(pd.to_datetime(
+        time_categorical.categories, format=HDB_TIME_FORMAT, errors='coerce'
+    )).tz_localize(time_zone, ambiguous='NaT', nonexistent='NaT')
+    read_ts = read_ts.tz_convert('UTC').tz_localize(None).to_numpy(dtype='datetime64[ns]')
+    timestamps = np.append(read_ts, np.datetime64('NaT', 'ns'))[time_categorical.codes]
+    values = pd.to_numeric(
+        df['value'].astype(str).str.replace(',', '', regex=False), errors='coerce'
+    ).to_numpy(dtype='float64')
+
+    # Drop missing values, unparseable times and unmapped SDIs
+    keep = ~np.isnan(values) & ~np.isnat(timestamps) & (site_idx >= 0)
+    timestamps = timestamps[keep]
+
+    return pa.Table.from_arrays([
+        pa.DictionaryArray.from_arrays(site_idx[keep], sites),
+        pa.array(timestamps),
+        pa.DictionaryArray.from_arrays(parameter_idx[keep], parameters),
+        pa.array(values[keep]),
+        pa.nulls(len(timestamps), NWIS_IV_SCHEMA.field('approval_status').type),
+        pa.array(timestamps.astype('datetime64[Y]').astype('int64') + 1970),
+    ], schema=NWIS_IV_SCHEMA)
+
+
+def CBRFCTransformer(df: pd.DataFrame) -> pa.Table:
+    """
+    Transform a raw CBRFC forecast export for several forecast points into the long
+    forecast format in one vectorized pass.
+
+    The export has the columns ['lid', 'issue_time', 'valid_time'] plus one value
+    column per forecast variable (CBRFC_VALUE_COLUMNS), which are stacked under the NWIS
+    parameter code they forecast. Every distinct time string is parsed once.
+
+    Parameters:
+        df: Raw dataframe from CBRFCExtractor
+    Returns:
+        A pyarrow Table with the CBRFC_FORECAST_SCHEMA columns:
+        ['site_cd', 'issue_ts', 'valid_ts', 'parameter_cd', 'value', 'issue_dt']
+    """
+    if df is None or df.empty:
+        logging.warning("No CBRFC forecasts to transform.")
+        return CBRFC_FORECAST_SCHEMA.empty_table()
+
+    missing = [col for col in ('lid', 'issue_time', 'valid_time') if col not in df.columns]
+    value_cols = [col for col in CBRFC_VALUE_COLUMNS if col in df.columns]
+    if missing or not value_cols:
+        logging.error(
+            f"CBRFC forecasts are missing columns {missing or list(CBRFC_VALUE_COLUMNS)}."
+        )
+        raise ValueError("Missing CBRFC forecast columns.")
+
+    def parse_times(column) -> np.ndarray:
+        categorical = pd.Categorical(column.astype(str))
+        parsed = pd.to_datetime(categorical.categories, format='ISO8601', errors='coerce')
+        return np.append(parsed.to_numpy(dtype='datetime64[ns]'),
+                         np.datetime64('NaT', 'ns'))[categorical.codes]
+
+    n_rows = len(df)
+    site_categorical = pd.Categorical(df['lid'].astype(str).str.strip().str.upper())
+    issue_ts = np.tile(parse_times(df['issue_time']), len(value_cols))
+    valid_ts = np.tile(parse_times(df['valid_time']), len(value_cols))
+    site_idx = np.tile(site_categorical.codes.astype('int8'), len(value_cols))
+    parameters = [CBRFC_VALUE_COLUMNS[col] for col in value_cols]
+    parameter_idx = np.repeat(np.arange(len(parameters), dtype='int8'), n_rows)
+    values = np.concatenate([
+        pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64') for col in value_cols
+    ])
+
+    # Drop missing values and unparseable times
+    keep = ~np.isnan(values) & ~np.isnat(issue_ts) & ~np.isnat(valid_ts) & (site_idx >= 0)
+    issue_ts = issue_ts[keep]
+
+    return pa.Table.from_arrays([
+        pa.DictionaryArray.from_arrays(
+            site_idx[keep], pa.array(site_categorical.categories.astype(str), pa.string())
+        ),
+        pa.array(issue_ts),
+        pa.array(valid_ts[keep]),
+        pa.DictionaryArray.from_arrays(parameter_idx[keep], parameters),
+        pa.array(values[keep]),
+        pa.array(issue_ts.astype('datetime64[D]'), pa.date32()),
+    ], schema=CBRFC_FORECAST_SCHEMA)
+
+
+def _stack_approval_codes(code_columns, n_rows: int):
+    """
+    Stack NWIS qualifier columns (e.g. 'A', 'P', 'A, e') into one array of categorical
+    codes for the approval status, i.e. the first character of each qualifier.
+
+    Only the distinct qualifiers of each column are sliced; rows are mapped with an
+    integer lookup. Missing qualifier columns and values become missing statuses (-1).
+    """
+    statuses = []
+    stacked = []
+    for column in code_columns:
+        if column is None:
+            stacked.append(np.full(n_rows, -1, dtype='int8'))
+            continue
+        categorical = pd.Categorical(column)
+        first_chars = categorical.categories.astype(str).str[0]
+        lookup = np.empty(len(first_chars) + 1, dtype='int8')
+        lookup[-1] = -1  # categorical code -1 (missing) indexes the last slot
+        for i, status in enumerate(first_chars):
+            if status not in statuses:
+                statuses.append(status)
+            lookup[i] = statuses.index(status)
+        stacked.append(lookup[categorical.codes])
+    return np.concatenate(stacked), statuses
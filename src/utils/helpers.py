@@ -0,0 +1,60 @@
+import datetime as dt
+from typing import TYPE_CHECKING, List, Optional, Union
+import pandas as pd
+
+if TYPE_CHECKING:
+    from src.etl.loaders import ParquetProfile
+
+TimeLike = Union[str, dt.datetime, dt.date, pd.Timestamp]
+
+
+def join_codes(value: Optional[Union[str, List[str]]]) -> Optional[str]:
+    """
+    Site or parameter code(s) of a unit of work as one text value.
+
+    Parameters:
+        value           : Code, list of codes of a batched request, or None
+    Returns:
+        str: The codes joined with commas, or None.
+    """
+    if value is None or isinstance(value, str):
+        return value
+    return ','.join(str(code) for code in value)
+
+
+def to_utc(value: Optional[TimeLike], tz: Optional[str] = None) -> Optional[dt.datetime]:
+    """
+    Naive UTC datetime of a time bound, as timestamps are stored in the lake.
+
+    Parameters:
+        value           : Time bound, or None
+        tz              : Time zone of a naive ``value``, None for UTC
+    Returns:
+        dt.datetime: The bound in naive UTC, or None.
+    """
+    if value is None:
+        return None
+    timestamp = pd.Timestamp(value)
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.tz_localize(tz or 'UTC')
+    return timestamp.tz_convert('UTC').tz_localize(None).to_pydatetime()
+
+
+def copy_options(profile: 'ParquetProfile') -> str:
+    """
+    DuckDB ``COPY ... TO`` options for a parquet write profile.
+
+    Parameters:
+        profile         : Write profile, e.g. one of loaders.WRITE_PROFILES
+    Returns:
+        str: Comma-separated COPY options.
+    """
+    options = [
+        "FORMAT PARQUET",
+        f"COMPRESSION {profile.compression}",
+        f"ROW_GROUP_SIZE {profile.row_group_size}",
+        f"PARQUET_VERSION {profile.parquet_version}",
+    ]
+    if profile.compression_level is not None:
+        options.append(f"COMPRESSION_LEVEL {profile.compression_level}")
+    return ", ".join(options)
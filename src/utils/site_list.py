@@ -54,6 +54,21 @@ cbrfc_sites = [
     "BMDC2",   # Blue Mesa Reservoir, CO (Gunnison River)
 ]
 
+# USGS gauge observing each CBRFC forecast point, for forecast vs. observed comparisons
+cbrfc_nwis_sites = {
+    "CAMC2": "09095500",
+    "GJNC2": "09152500",
+    "DOLU1": "09180000",
+    "GRVU1": "09315000",
+    "WATU1": "09306500",
+    "DURU1": "09302000",
+    "YDLC2": "09260050",
+    "GLDA3": "09379900",
+    "GRNU1": "09106485",
+    "RURC2": "09106150",
+    "WORC2": "09041395",
+}
+
 hydrologic_areas = pd.DataFrame({
     "site_cd": [
         '09152500', '09095500', '09106150', '09106485', '09163500', '09306500',
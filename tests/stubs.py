@@ -0,0 +1,127 @@
+"""Stand-ins for upstream services, shared by the tests."""
+import datetime as dt
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import pandas as pd
+
+
+class LatencyStub:
+    """
+    Drop-in ``fetch_fn`` for ``fetch_concurrently`` that sleeps like a slow request and
+    returns a small frame naming the task, so tests can check timing and ordering.
+
+    Parameters:
+        latency (float): Seconds every call sleeps.
+        latencies (dict): Seconds by site code, overriding ``latency``.
+    """
+
+    def __init__(self, latency: float = 0.1, latencies: dict = None):
+        self.latency = latency
+        self.latencies = latencies or {}
+        self.calls = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, site_code, parameter_code=None, start_date=None, end_date=None,
+                 service_code='iv'):
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            time.sleep(self.latencies.get(site_code, self.latency))
+            return pd.DataFrame({'site_no': [site_code], 'start_date': [start_date]})
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+
+
+class FakeHDBServer:
+    """
+    Local ``hdb.pl`` answering JSON requests like the Reclamation HDB web service, with
+    one daily value per SDI and day of the requested window. Unknown SDIs get a 404 and
+    ``fail_next`` requests get an HTML 503 page. Every request and the client port of
+    its connection are recorded, so tests can count retries and pooled connections.
+
+    Use as a context manager; pass ``base_url`` to HDBExtractor explicitly, since
+    HDB_URL is only read at import.
+
+    Parameters:
+        sdis (list): Site-datatype ids the server knows.
+    """
+
+    def __init__(self, sdis):
+        self.sdis = [str(sdi) for sdi in sdis]
+        self.fail_next = 0
+        self.requests = []
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def host(self) -> str:
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}/pn-bin/hdb/hdb.pl"
+
+    def __enter__(self) -> 'FakeHDBServer':
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def respond(self, query: dict, client_port: int):
+        """Status and body of one request."""
+        with self._lock:
+            self.requests.append(query)
+            self.client_ports.add(client_port)
+            if self.fail_next:
+                self.fail_next -= 1
+                return 503, 'text/html', b'<html><body>Service Unavailable</body></html>'
+
+        sdis = query['sdi'].split(',')
+        if any(sdi not in self.sdis for sdi in sdis):
+            return 404, 'text/html', b'<html><body>Unknown SDI</body></html>'
+        first = dt.date.fromisoformat(query['t1'][:10])
+        last = dt.date.fromisoformat(query['t2'][:10])
+        days = [first + dt.timedelta(days=i) for i in range((last - first).days + 1)]
+        series = [{
+            'SDI': sdi,
+            'Data': [
+                {'t': day.strftime('%m/%d/%Y %I:%M:%S %p'), 'v': f"{int(sdi) + day.day:.2f}"}
+                for day in days
+            ]
+        } for sdi in sdis]
+        return 200, 'application/json', json.dumps({'Series': series}).encode()
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # Keep-alive, so a pooled session can reuse its connections
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                query = parse_qs(urlparse(self.path).query)
+                query = {key: values[0] for key, values in query.items()}
+                status, content_type, body = fake.respond(query, self.client_address[1])
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
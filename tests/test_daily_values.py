@@ -0,0 +1,79 @@
+import datetime as dt
+import unittest
+from src.etl.daily_values import DV_START_DATE, daily_fetch_tasks
+
+
+class DailyFetchTasksTest(unittest.TestCase):
+
+    END_DATE = '2024-06-30'
+
+    def _starts(self, tasks):
+        """First requested date of every (site, parameter) pair."""
+        starts = {}
+        for task in tasks:
+            for site_code in task.site_code:
+                for parameter_code in task.parameter_code:
+                    key = (site_code, parameter_code)
+                    starts[key] = min(starts.get(key, task.start_date), task.start_date)
+        return starts
+
+    def test_full_load_starts_every_series_at_start_date(self):
+        tasks = daily_fetch_tasks({'A': ['00060', '00065']}, self.END_DATE)
+        self.assertEqual(tasks[0].start_date, DV_START_DATE)
+        self.assertEqual(tasks[-1].end_date, self.END_DATE)
+        self.assertTrue(all(task.parameter_code == ['00060', '00065'] for task in tasks))
+
+    def test_sites_without_parameters_are_skipped(self):
+        marks = {('A', '00060'): dt.date(2024, 6, 29)}
+        for planned_marks in (None, marks):
+            tasks = daily_fetch_tasks({'A': ['00060'], 'B': []}, self.END_DATE, planned_marks)
+            self.assertTrue(tasks)
+            self.assertTrue(all(task.site_code == ['A'] for task in tasks))
+
+    def test_unmarked_series_joins_revision_window(self):
+        marks = {('A', '00060'): dt.date(2024, 6, 29)}
+        tasks = daily_fetch_tasks(
+            {'A': ['00010', '00060']}, self.END_DATE, marks, lookback_days=120
+        )
+        self.assertEqual(len(tasks), 1)
+        self.assertEqual(tasks[0].start_date, '2024-03-01')
+        self.assertEqual(tasks[0].parameter_code, ['00010', '00060'])
+
+    def test_discontinued_series_does_not_pull_site_back(self):
+        marks = {('A', '00060'): dt.date(2024, 6, 29), ('A', '00065'): dt.date(1995, 9, 30)}
+        tasks = daily_fetch_tasks({'A': ['00060', '00065']}, self.END_DATE, marks)
+        self.assertEqual(self._starts(tasks), {
+            ('A', '00060'): '2024-03-01', ('A', '00065'): '2024-03-01'
+        })
+
+    def test_series_start_before_their_own_marks(self):
+        marks = {('A', '00060'): dt.date(2024, 6, 29), ('A', '00065'): dt.date(2024, 5, 1)}
+        tasks = daily_fetch_tasks({'A': ['00060', '00065']}, self.END_DATE, marks)
+        self.assertEqual(self._starts(tasks), {
+            ('A', '00060'): '2024-03-01', ('A', '00065'): '2024-01-02'
+        })
+
+    def test_outage_keeps_gap_since_marks(self):
+        # Every series of the site stopped together: the run was missed, not the series
+        marks = {('A', '00060'): dt.date(2023, 6, 29), ('A', '00065'): dt.date(2023, 6, 1)}
+        tasks = daily_fetch_tasks({'A': ['00060', '00065']}, self.END_DATE, marks)
+        self.assertEqual(self._starts(tasks), {
+            ('A', '00060'): '2023-03-01', ('A', '00065'): '2023-02-01'
+        })
+
+    def test_sites_without_daily_values_are_skipped_after_a_load(self):
+        marks = {('A', '00060'): dt.date(2024, 6, 29)}
+        with self.assertLogs(level='INFO'):
+            tasks = daily_fetch_tasks({'A': ['00060'], 'B': ['00010']}, self.END_DATE, marks)
+        self.assertEqual({tuple(task.site_code) for task in tasks}, {('A',)})
+
+    def test_sites_sharing_a_start_are_batched(self):
+        marks = {(site, '00060'): dt.date(2024, 6, 29) for site in 'ABC'}
+        tasks = daily_fetch_tasks(
+            {site: ['00060'] for site in 'ABC'}, self.END_DATE, marks, batch_size=2
+        )
+        self.assertEqual([task.site_code for task in tasks], [['A', 'B'], ['C']])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,169 @@
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+import duckdb
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+from benchmarks.synthetic import synthetic_iv_table
+from src.database.forecasts import FORECAST_TIER, forecast_vs_observed, latest_forecast
+from src.etl.extractors import CBRFCExtractor
+from src.etl.forecasts import CBRFCLoader, ForecastLakeLoader, cbrfc_fetch_tasks
+from src.etl.loaders import DataLakeLoader
+from src.etl.transformers import CBRFC_FORECAST_SCHEMA, CBRFCTransformer
+
+FIXTURES = Path(__file__).parent / 'fixtures' / 'cbrfc'
+SITES = ['CAMC2', 'GJNC2']
+
+
+class CBRFCForecastTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+        self.db_path = Path(self.tmp.name) / 'test.duckdb'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _load(self, issuance):
+        """Fetch and load every fixture forecast point of one issuance directory."""
+        results = [
+            (task, CBRFCExtractor(**task._asdict(), source=FIXTURES / issuance))
+            for task in cbrfc_fetch_tasks(SITES)
+        ]
+        return CBRFCLoader(results, self.root, db_path=self.db_path)
+
+    def _load_observed(self, end):
+        """Hourly 09095500 discharge (CAMC2's gauge) of 2024 up to ``end``."""
+        table = synthetic_iv_table(['09095500'], ['00060'], 2024, 2024, 60)
+        table = table.filter(pc.less_equal(table['read_ts'], end))
+        DataLakeLoader(table, '09095500', self.root, db_path=self.db_path)
+        return table.to_pandas().set_index('read_ts')['value']
+
+    def _files(self):
+        return sorted((self.root / FORECAST_TIER).rglob('*.parquet'))
+
+    def test_transform(self):
+        df = CBRFCExtractor(SITES + ['NOPE1'], source=FIXTURES / 'morning')
+        self.assertEqual(len(df), 16)
+
+        table = CBRFCTransformer(df).to_pandas()
+        self.assertEqual(len(table), 15)
+        self.assertEqual(sorted(table['site_cd'].unique()), SITES)
+        self.assertEqual(set(table['parameter_cd']), {'00060'})
+        self.assertEqual(set(table['issue_ts']), {dt.datetime(2024, 1, 4, 12)})
+        self.assertEqual(set(table['issue_dt']), {dt.date(2024, 1, 4)})
+        camc2 = table[table['site_cd'] == 'CAMC2']
+        self.assertNotIn(dt.datetime(2024, 1, 5, 18), set(camc2['valid_ts']))
+
+    def test_same_day_reissue_replaces_issuance(self):
+        self._load('morning')
+        gjnc2 = self.root / FORECAST_TIER / 'issue_dt=2024-01-04' / 'site=GJNC2' / 'data.parquet'
+        gjnc2_mtime = gjnc2.stat().st_mtime_ns
+
+        report = self._load('evening')
+        self.assertEqual(report['files_written'], 1)
+        self.assertEqual(len(self._files()), 2)
+        self.assertEqual(gjnc2.stat().st_mtime_ns, gjnc2_mtime)
+
+        forecast = latest_forecast('CAMC2', datalake_root=self.root, db_path=self.db_path,
+                                   as_pandas=True)
+        self.assertEqual(set(forecast['issue_ts']), {dt.datetime(2024, 1, 4, 18)})
+        self.assertEqual(len(forecast), 8)
+
+    def test_rerun_is_noop(self):
+        self._load('morning')
+        self._load('evening')
+        mtimes = [path.stat().st_mtime_ns for path in self._files()]
+
+        for issuance in ('evening', 'morning'):
+            report = self._load(issuance)
+            self.assertEqual(report['files_written'], 0)
+        self.assertEqual([path.stat().st_mtime_ns for path in self._files()], mtimes)
+
+    def test_files_are_sorted_by_parameter_and_valid_time(self):
+        frames = []
+        for site_code in SITES:
+            for issue_ts in pd.date_range('2024-01-04 12:00', periods=3, freq='D'):
+                valid_ts = pd.date_range(issue_ts, periods=20_000, freq='h')
+                frames.append(pd.DataFrame({
+                    'site_cd': site_code,
+                    'issue_ts': issue_ts,
+                    'valid_ts': list(valid_ts) * 2,
+                    'parameter_cd': ['00065'] * len(valid_ts) + ['00060'] * len(valid_ts),
+                    'value': range(2 * len(valid_ts)),
+                    'issue_dt': issue_ts.date(),
+                }))
+        frame = pd.concat(frames).sample(frac=1, random_state=0)
+        table = pa.Table.from_pandas(frame, preserve_index=False).cast(CBRFC_FORECAST_SCHEMA)
+
+        duckdb_connect = duckdb.connect
+
+        def connect(*args, **kwargs):
+            # Several threads, as on a multi-core host, where a partitioned COPY reorders
+            con = duckdb_connect(*args, **kwargs)
+            con.execute("SET threads = 4")
+            return con
+
+        with mock.patch('duckdb.connect', connect):
+            files = ForecastLakeLoader(table, self.root, db_path=self.db_path)
+        self.assertEqual(len(files), 6)
+        for path in files:
+            rows = pq.ParquetFile(path).read().to_pandas()
+            self.assertEqual(len(rows), 40_000)
+            keys = list(zip(rows['parameter_cd'].astype(str), rows['valid_ts']))
+            self.assertEqual(keys, sorted(keys), f"{path} is not sorted")
+
+    def test_latest_forecast(self):
+        for issuance in ('morning', 'evening', 'next_day'):
+            self._load(issuance)
+
+        latest = latest_forecast(datalake_root=self.root, db_path=self.db_path,
+                                 as_pandas=True)
+        issues = latest.groupby('site_cd')['issue_ts'].unique().to_dict()
+        self.assertEqual({site: list(ts) for site, ts in issues.items()}, {
+            'CAMC2': [dt.datetime(2024, 1, 5, 12)], 'GJNC2': [dt.datetime(2024, 1, 4, 12)]
+        })
+
+        as_of = latest_forecast('CAMC2', as_of='2024-01-04 23:00', datalake_root=self.root,
+                                db_path=self.db_path, as_pandas=True)
+        self.assertEqual(set(as_of['issue_ts']), {dt.datetime(2024, 1, 4, 18)})
+
+    def test_forecast_vs_observed(self):
+        for issuance in ('morning', 'evening', 'next_day'):
+            self._load(issuance)
+        observed = self._load_observed(dt.datetime(2024, 1, 5, 6))
+
+        pairs = forecast_vs_observed(
+            'CAMC2', issued_after='2024-01-04 13:00', issued_before='2024-01-04 23:00',
+            datalake_root=self.root, db_path=self.db_path, as_pandas=True
+        )
+        self.assertEqual(len(pairs), 8)
+        self.assertEqual(set(pairs['nwis_site_cd']), {'09095500'})
+        self.assertEqual(pairs['lead_hours'].tolist(), [0, 6, 12, 18, 24, 30, 36, 42])
+        matched = pairs[pairs['observed_value'].notna()]
+        self.assertEqual(matched['valid_ts'].tolist(), [
+            dt.datetime(2024, 1, 4, 18), dt.datetime(2024, 1, 5), dt.datetime(2024, 1, 5, 6)
+        ])
+        self.assertEqual(matched['observed_value'].tolist(),
+                         observed.loc[matched['valid_ts']].tolist())
+
+    def test_future_forecast_keeps_rows_without_observations(self):
+        self._load('next_day')
+        for with_observations in (False, True):
+            if with_observations:
+                self._load_observed(dt.datetime(2024, 1, 5, 6))
+            pairs = forecast_vs_observed('CAMC2', datalake_root=self.root,
+                                         db_path=self.db_path, as_pandas=True)
+            self.assertEqual(len(pairs), 4)
+            self.assertEqual(set(pairs['issue_ts']), {dt.datetime(2024, 1, 5, 12)})
+            self.assertTrue(pairs['observed_value'].isna().all())
+            self.assertEqual(pairs['forecast_value'].tolist(), [1760, 1770, 1780, 1790])
+
+
+if __name__ == '__main__':
+    unittest.main()
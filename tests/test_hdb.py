@@ -0,0 +1,104 @@
+import tempfile
+import unittest
+from functools import partial
+from pathlib import Path
+from src.etl.extractors import HDBExtractor
+from src.etl.hdb import HDBLoader, hdb_fetch_tasks
+from src.etl.resilience import (
+    CircuitBreaker, DeadLetterQueue, ResilientFetcher, RetryBudget, RetryPolicy
+)
+from src.etl.scheduler import fetch_concurrently
+from tests.stubs import FakeHDBServer
+
+SERIES = {
+    '1001': ('09380000', '00060'),
+    '1002': ('09380000', '00062'),
+    '2001': ('09379900', '00060'),
+}
+
+
+class HDBExtractorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.server = FakeHDBServer(SERIES).__enter__()
+
+    def tearDown(self):
+        self.server.__exit__(None, None, None)
+        self.tmp.cleanup()
+
+    def _fetcher(self):
+        fetcher = ResilientFetcher(
+            partial(HDBExtractor, base_url=self.server.base_url, raise_errors=True),
+            policy=RetryPolicy(max_attempts=3, base_delay=0.0),
+            budget=RetryBudget(100),
+            dead_letter=DeadLetterQueue(Path(self.tmp.name) / 'dead_letter.jsonl'),
+            host=self.server.host
+        )
+        fetcher.breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60.0)
+        return fetcher
+
+    def _tasks(self):
+        return hdb_fetch_tasks(SERIES, '2020-01-01', '2023-12-31', sites_per_request=1,
+                               window_years=1)
+
+    def test_parses_several_series_in_one_request(self):
+        df = HDBExtractor(['1001', '2001'], start_date='2020-01-01', end_date='2020-01-31',
+                          base_url=self.server.base_url)
+        self.assertEqual(len(self.server.requests), 1)
+        self.assertEqual(df.groupby('sdi').size().to_dict(), {'1001': 31, '2001': 31})
+
+    def test_requests_reuse_pooled_connections(self):
+        for task in self._tasks():
+            HDBExtractor(**task._asdict(), base_url=self.server.base_url)
+        self.assertEqual(len(self.server.requests), 8)
+        self.assertEqual(len(self.server.client_ports), 1)
+
+        fetch = partial(HDBExtractor, base_url=self.server.base_url)
+        results = list(fetch_concurrently(self._tasks(), fetch, max_workers=2,
+                                          host=self.server.host))
+        self.assertTrue(all(df is not None for _, df in results))
+        self.assertLessEqual(len(self.server.client_ports), 3)
+
+    def test_unavailable_server_is_retried(self):
+        self.server.fail_next = 2
+        fetcher = self._fetcher()
+        df = fetcher(site_code=['1001'], start_date='2020-01-01', end_date='2020-01-10',
+                     service_code='DY')
+        self.assertEqual(len(df), 10)
+        self.assertEqual(fetcher.retries, 2)
+        self.assertEqual(len(self.server.requests), 3)
+
+    def test_unknown_sdi_is_not_retried(self):
+        fetcher = self._fetcher()
+        for _ in range(3):
+            df = fetcher(site_code=['9999'], start_date='2020-01-01', end_date='2020-01-10',
+                         service_code='DY')
+            self.assertIsNone(df)
+        self.assertEqual(len(self.server.requests), 3)
+        self.assertEqual(fetcher.retries, 0)
+        self.assertEqual(fetcher.breaker.failures, 0)
+
+    def test_reload_is_idempotent(self):
+        root = Path(self.tmp.name) / 'lake'
+        db_path = Path(self.tmp.name) / 'test.duckdb'
+        tasks = hdb_fetch_tasks(SERIES, '2020-11-01', '2021-02-28')
+        fetch = partial(HDBExtractor, base_url=self.server.base_url)
+
+        first = HDBLoader(fetch_concurrently(tasks, fetch, host=self.server.host), SERIES,
+                          root, db_path=db_path)
+        self.assertEqual(first['values'], 3 * 120)
+        self.assertEqual(first['partitions_written'], 4)
+        files = sorted(root.rglob('*.parquet'))
+        mtimes = [path.stat().st_mtime_ns for path in files]
+
+        second = HDBLoader(fetch_concurrently(tasks, fetch, host=self.server.host), SERIES,
+                           root, db_path=db_path)
+        self.assertEqual(second['values'], first['values'])
+        self.assertEqual(second['partitions_written'], 0)
+        self.assertEqual(sorted(root.rglob('*.parquet')), files)
+        self.assertEqual([path.stat().st_mtime_ns for path in files], mtimes)
+
+
+if __name__ == '__main__':
+    unittest.main()
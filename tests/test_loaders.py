@@ -0,0 +1,128 @@
+import hashlib
+import tempfile
+import unittest
+from pathlib import Path
+import pandas as pd
+import pyarrow.parquet as pq
+from benchmarks.synthetic import synthetic_iv_table
+from src.etl.compaction import needs_compaction, row_groups_sorted
+from src.etl.loaders import DataLakeLoader
+
+PARAMETERS = ['00010', '00060', '00065', '00095', '00300']
+
+
+class DataLakeLoaderSortTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_partitions_are_written_in_sort_order(self):
+        table = synthetic_iv_table(['S'], PARAMETERS, 2015, 2024, 30)
+        files = DataLakeLoader(table, 'S', self.root, db_path=None)
+        self.assertEqual(len(files), 10)
+
+        for path in files:
+            parquet_file = pq.ParquetFile(path)
+            self.assertGreater(parquet_file.metadata.num_row_groups, 1)
+            rows = parquet_file.read(columns=['parameter_cd', 'read_ts']).to_pandas()
+            keys = list(zip(rows['parameter_cd'].astype(str), rows['read_ts']))
+            self.assertEqual(keys, sorted(keys), f"{path} is not sorted")
+            self.assertTrue(row_groups_sorted(parquet_file.metadata))
+            self.assertFalse(needs_compaction(path.parent))
+
+    def test_unsorted_file_needs_compaction(self):
+        table = synthetic_iv_table(['S'], PARAMETERS[:2], 2020, 2020, 60)
+        path = self.root / 'unsorted.parquet'
+        self.root.mkdir(parents=True)
+        pq.write_table(table.sort_by([('read_ts', 'ascending')]), path, row_group_size=1000)
+        self.assertFalse(row_groups_sorted(pq.ParquetFile(path).metadata))
+
+
+class DataLakeLoaderUpsertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+        self.site_path = self.root / 'timeseries_iv' / 'site=S'
+        self.frame = synthetic_iv_table(['S'], ['00060', '00065'], 2020, 2021, 60).to_pandas()
+        self.frame['approval_status'] = self.frame['approval_status'].astype(str)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _load(self, frame):
+        return DataLakeLoader(frame, 'S', self.root, db_path=None)
+
+    def _read(self, year):
+        rows = pd.read_parquet(self.site_path / f"year={year}" / 'data.parquet')
+        rows['parameter_cd'] = rows['parameter_cd'].astype(str)
+        return rows.set_index(['parameter_cd', 'read_ts']).sort_index()
+
+    def _state(self, year):
+        path = self.site_path / f"year={year}" / 'data.parquet'
+        return path.stat().st_mtime_ns, hashlib.sha256(path.read_bytes()).hexdigest()
+
+    def _window(self, status, offset):
+        """The first week of 2021 for 00060 with the given status and shifted values."""
+        window = self.frame[
+            (self.frame['parameter_cd'] == '00060')
+            & (self.frame['read_ts'] < pd.Timestamp('2021-01-08'))
+            & (self.frame['year'] == 2021)
+        ].copy()
+        window['approval_status'] = status
+        window['value'] += offset
+        return window
+
+    def test_approved_replaces_provisional(self):
+        self._load(self.frame)
+        self._load(self._window('P', 1.0))
+        written = self._load(self._window('A', 2.0))
+        self.assertEqual(written, [self.site_path / 'year=2021' / 'data.parquet'])
+
+        rows = self._read(2021).loc['00060']
+        week = rows[rows.index < pd.Timestamp('2021-01-08')]
+        self.assertEqual(set(week['approval_status']), {'A'})
+        expected = self._window('A', 2.0).set_index('read_ts')['value']
+        self.assertTrue((week['value'] == expected.loc[week.index]).all())
+
+    def test_provisional_does_not_overwrite_approved(self):
+        self._load(self._window('A', 0.0))
+        before = self._read(2021)
+        self.assertEqual(self._load(self._window('P', 5.0)), [])
+        self.assertTrue(self._read(2021).equals(before))
+
+        # Among readings of the same status the new one wins
+        self._load(self._window('A', 3.0))
+        self.assertTrue((self._read(2021)['value'] == before['value'] + 3.0).all())
+
+    def test_unchanged_year_is_not_rewritten(self):
+        self._load(self.frame)
+        state_2020 = self._state(2020)
+        state_2021 = self._state(2021)
+
+        written = self._load(pd.concat([
+            self.frame[self.frame['year'] == 2020], self._window('A', 7.0)
+        ]))
+        self.assertEqual(written, [self.site_path / 'year=2021' / 'data.parquet'])
+        self.assertEqual(self._state(2020), state_2020)
+        self.assertNotEqual(self._state(2021), state_2021)
+        self.assertEqual(sorted(path.name for path in self.site_path.iterdir()),
+                         ['year=2020', 'year=2021'])
+
+    def test_reload_preserves_row_count(self):
+        self._load(self.frame)
+        counts = {year: len(self._read(year)) for year in (2020, 2021)}
+        self.assertEqual(sum(counts.values()), len(self.frame))
+
+        self.assertEqual(self._load(self.frame), [])
+        self._load(self._window('A', 1.0))
+        self.assertEqual({year: len(self._read(year)) for year in (2020, 2021)}, counts)
+        self.assertFalse(list(self.site_path.glob('.staging-*')))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+from benchmarks.synthetic import synthetic_iv_table
+from src.database.connection import connect_duckdb
+from src.database.manifest import MANIFEST_TABLE, stale_manifest_files
+from src.database.timeseries import read_timeseries
+from src.etl.extractors import fetch_high_water_marks
+from src.etl.loaders import DataLakeLoader
+
+
+class StaleManifestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+        self.db_path = Path(self.tmp.name) / 'test.duckdb'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _manifest_paths(self):
+        with connect_duckdb(self.db_path) as con:
+            rows = con.execute(f"SELECT file_path FROM {MANIFEST_TABLE}").fetchall()
+        return sorted(row[0] for row in rows)
+
+    def test_failed_update_is_marked_and_repaired(self):
+        DataLakeLoader(synthetic_iv_table(['A'], ['00060'], 2020, 2020, 60), 'A', self.root,
+                       db_path=self.db_path)
+
+        # The manifest cannot be written while site B is loaded
+        with mock.patch('src.database.manifest.update_manifest', side_effect=OSError('locked')):
+            site_b = synthetic_iv_table(['B'], ['00060'], 2020, 2021, 60)
+            written = DataLakeLoader(site_b, 'B', self.root, db_path=self.db_path)
+        self.assertEqual(len(written), 2)
+        self.assertEqual(
+            stale_manifest_files(self.root, 'timeseries_iv'),
+            ['timeseries_iv/site=B/year=2020/data.parquet',
+             'timeseries_iv/site=B/year=2021/data.parquet']
+        )
+
+        # Readers stop trusting the manifest, so site B is read in full
+        table = read_timeseries('B', datalake_root=self.root, db_path=self.db_path)
+        self.assertEqual(table.num_rows, site_b.num_rows)
+
+        # The next manifest update records the stale files as well
+        DataLakeLoader(synthetic_iv_table(['C'], ['00060'], 2020, 2020, 60), 'C', self.root,
+                       db_path=self.db_path)
+        self.assertEqual(stale_manifest_files(self.root), [])
+        self.assertEqual(len(self._manifest_paths()), 4)
+        self.assertEqual(
+            read_timeseries('B', datalake_root=self.root, db_path=self.db_path).num_rows,
+            table.num_rows
+        )
+
+
+class HighWaterMarkTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+        self.db_path = Path(self.tmp.name) / 'test.duckdb'
+        for site_code in ('A', 'B'):
+            DataLakeLoader(synthetic_iv_table([site_code], ['00060', '00065'], 2020, 2021, 60),
+                           site_code, self.root, db_path=self.db_path)
+        self.scanned = fetch_high_water_marks(self.root, db_path=None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_marks_come_from_the_manifest(self):
+        self.assertEqual(len(self.scanned), 4)
+        self.assertTrue(all(mark.min_provisional_ts for mark in self.scanned))
+        with mock.patch('src.etl.extractors.glob.glob') as lake_glob:
+            marks = fetch_high_water_marks(self.root, db_path=self.db_path)
+        lake_glob.assert_not_called()
+        self.assertEqual(marks, self.scanned)
+
+    def test_unrecorded_site_scans_the_lake(self):
+        site_c = synthetic_iv_table(['C'], ['00060'], 2021, 2021, 60)
+        DataLakeLoader(site_c, 'C', self.root, db_path=None)
+        with self.assertLogs(level='WARNING'):
+            marks = fetch_high_water_marks(self.root, db_path=self.db_path)
+        self.assertEqual(marks[:4], self.scanned)
+        self.assertEqual([mark.site_code for mark in marks[4:]], ['C'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import unittest
+import pandas as pd
+from src.etl.resampling import ResampleTransformer
+
+
+def _readings(start, end, drop_start=None, drop_end=None):
+    """15-minute readings between two UTC times, without those in [drop_start, drop_end)."""
+    read_ts = pd.date_range(start, end, freq='15min', inclusive='left')
+    if drop_start is not None:
+        read_ts = read_ts[(read_ts < drop_start) | (read_ts >= drop_end)]
+    return pd.DataFrame({
+        'site_cd': 'X', 'parameter_cd': '00060', 'read_ts': read_ts,
+        'value': 1.0, 'approval_status': 'A'
+    })
+
+
+class ResampleTransformerTest(unittest.TestCase):
+
+    def test_day_without_readings_is_flagged(self):
+        # Local (America/Denver, MDT) days 2020-06-08 through 2020-06-12, 06-10 missing
+        df = _readings('2020-06-08 06:00', '2020-06-13 06:00',
+                       '2020-06-10 06:00', '2020-06-11 06:00')
+        result = ResampleTransformer(df, 'day').to_pandas()
+
+        self.assertEqual(result['bucket_start_local'].dt.day.tolist(), [8, 9, 10, 11, 12])
+        gap = result.iloc[2]
+        self.assertEqual(gap['reading_cnt'], 0)
+        self.assertEqual(gap['expected_cnt'], 96)
+        self.assertEqual(gap['missing_cnt'], 96)
+        self.assertEqual(gap['coverage_fraction'], 0.0)
+        self.assertTrue(gap['gap_flag'])
+        self.assertTrue(pd.isna(gap['mean_value']))
+        self.assertFalse(result.drop(index=2)['gap_flag'].any())
+
+    def test_missing_short_dst_day_expects_92_slots(self):
+        # 2023-03-12 is 23 hours long in Denver; it has no readings at all
+        df = _readings('2023-03-11 07:00', '2023-03-14 06:00',
+                       '2023-03-12 07:00', '2023-03-13 06:00')
+        result = ResampleTransformer(df, 'day').to_pandas()
+
+        gap = result.set_index(result['bucket_start_local'].dt.day).loc[12]
+        self.assertEqual((gap['expected_cnt'], gap['missing_cnt']), (92, 92))
+        self.assertEqual(gap['bucket_start_utc'], pd.Timestamp('2023-03-12 07:00'))
+        self.assertEqual(len(result), 3)
+
+    def test_hour_without_readings_is_flagged(self):
+        df = _readings('2021-01-01 00:00', '2021-01-01 05:00',
+                       '2021-01-01 02:00', '2021-01-01 04:00')
+        result = ResampleTransformer(df, 'hour').to_pandas()
+
+        self.assertEqual(len(result), 5)
+        self.assertEqual(result['reading_cnt'].tolist(), [4, 4, 0, 0, 4])
+        self.assertEqual(result['gap_flag'].tolist(), [False, False, True, True, False])
+
+    def test_buckets_stay_within_each_series(self):
+        df = pd.concat([
+            _readings('2021-01-01 00:00', '2021-01-01 02:00'),
+            _readings('2021-01-01 04:00', '2021-01-01 05:00').assign(parameter_cd='00065')
+        ])
+        result = ResampleTransformer(df, 'hour').to_pandas()
+        self.assertEqual(result.groupby('parameter_cd').size().to_dict(),
+                         {'00060': 2, '00065': 1})
+        self.assertFalse(result['gap_flag'].any())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import tempfile
+import unittest
+from pathlib import Path
+import pandas as pd
+from src.etl.cache import ResponseCache
+from src.etl.resilience import (
+    CircuitBreaker, DeadLetterQueue, ResilientFetcher, RetryBudget, RetryPolicy
+)
+from src.etl.scheduler import FetchTask
+
+
+class ResilientFetcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.dead_letter = DeadLetterQueue(Path(self.tmp.name) / 'dead_letter.jsonl')
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def _fetcher(self, fetch_fn, max_attempts=3):
+        fetcher = ResilientFetcher(
+            fetch_fn,
+            policy=RetryPolicy(max_attempts=max_attempts, base_delay=0.0),
+            budget=RetryBudget(100),
+            dead_letter=self.dead_letter,
+            host='test-host'
+        )
+        fetcher.breaker = CircuitBreaker(failure_threshold=2, reset_timeout=60.0)
+        return fetcher
+
+    def test_bad_requests_do_not_open_circuit(self):
+        def bad_request(**task_fields):
+            raise ValueError("400 Bad Request")
+
+        fetcher = self._fetcher(bad_request)
+        task = FetchTask('09380000', '00060', '2020-01-01', '2020-12-31')
+        for _ in range(5):
+            self.assertIsNone(fetcher(**task._asdict()))
+        self.assertEqual(fetcher.breaker.failures, 0)
+        self.assertTrue(fetcher.breaker.allow())
+        self.assertEqual(fetcher.retries, 0)
+        self.assertIn(task, self.dead_letter)
+
+    def test_transient_failures_open_circuit(self):
+        def unavailable(**task_fields):
+            raise ConnectionError("connection reset")
+
+        fetcher = self._fetcher(unavailable, max_attempts=2)
+        self.assertIsNone(fetcher(site_code='09380000'))
+        self.assertEqual(fetcher.retries, 1)
+        self.assertFalse(fetcher.breaker.allow())
+
+    def test_cached_windows_skip_limiter_and_breaker(self):
+        class CountingLimiter:
+            acquires = 0
+
+            def acquire(self):
+                self.acquires += 1
+
+        calls = []
+
+        def fetch(**task_fields):
+            calls.append(task_fields)
+            return pd.DataFrame({'site_no': ['09380000'], '00060_cd': ['A']})
+
+        fetcher = self._fetcher(fetch)
+        fetcher.cache = ResponseCache(Path(self.tmp.name) / 'cache')
+        fetcher.rate_limiter = CountingLimiter()
+        task = FetchTask('09380000', '00060', '2020-01-01', '2020-12-31')
+        self.assertEqual(len(fetcher(**task._asdict())), 1)
+        self.assertEqual(fetcher.rate_limiter.acquires, 1)
+
+        fetcher.rate_limiter = CountingLimiter()
+        for _ in range(2):
+            fetcher.breaker.record_failure()
+        self.assertFalse(fetcher.breaker.allow())
+        self.assertEqual(len(fetcher(**task._asdict())), 1)
+        self.assertEqual(fetcher.rate_limiter.acquires, 0)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(fetcher.cache.stats()['hits'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+import duckdb
+from src.database.run_ledger import RUN_LEDGER_TABLE, RunLedger, latest_run_id
+from src.etl.scheduler import FetchTask
+
+TASKS = [
+    FetchTask('A', ['00060'], '2020-01-01', '2020-12-31', 'iv'),
+    FetchTask('A', ['00060'], '2021-01-01', '2021-12-31', 'iv'),
+    FetchTask(['B', 'C'], None, None, None, 'dv'),
+]
+
+
+class RunLedgerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+        self.db_path = Path(self.tmp.name) / 'test.duckdb'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_resumed_run_skips_done_units(self):
+        ledger = RunLedger('initial_load_1', self.root, db_path=self.db_path)
+        self.assertEqual(ledger.plan(TASKS), TASKS)
+
+        partition = self.root / 'timeseries_iv' / 'site=A' / 'year=2020' / 'data.parquet'
+        ledger.mark_done(TASKS[:1], {'iv|A|00060|2020-01-01|2020-12-31': [partition]})
+        ledger.mark_failed(TASKS[2], 'Request failed after retries')
+        self.assertEqual(ledger.progress(), {'done': 1, 'pending': 1, 'failed': 1})
+
+        with duckdb.connect(str(self.db_path)) as con:
+            row = con.execute(
+                f"SELECT start_dt, end_dt, partition_paths FROM {RUN_LEDGER_TABLE}"
+                " WHERE status_cd = 'done'"
+            ).fetchone()
+            error = con.execute(
+                f"SELECT error_tx FROM {RUN_LEDGER_TABLE} WHERE status_cd = 'failed'"
+            ).fetchone()[0]
+        self.assertEqual(row, (dt.date(2020, 1, 1), dt.date(2020, 12, 31),
+                               ['timeseries_iv/site=A/year=2020/data.parquet']))
+        self.assertEqual(error, 'Request failed after retries')
+
+        run_id = latest_run_id('initial_load_', db_path=self.db_path)
+        self.assertEqual(run_id, 'initial_load_1')
+        resumed = RunLedger(run_id, self.root, db_path=self.db_path)
+        self.assertEqual(resumed.plan(TASKS), TASKS[1:])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,47 @@
+import datetime as dt
+import tempfile
+import unittest
+from pathlib import Path
+import duckdb
+from src.database.run_metrics import RUN_METRICS_TABLE, site_throughput
+from src.etl.metrics import RunMetrics
+from src.etl.scheduler import FetchTask
+
+
+class RunMetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmp.name) / 'test.duckdb'
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_persisted_stages_rank_sites(self):
+        metrics = RunMetrics('run_1', Path(self.tmp.name) / 'run_1.metrics.jsonl')
+        task = FetchTask('A', ['00060', '00065'], '2020-01-01', '2020-12-31', 'iv')
+        with metrics.stage('extract', task) as metric:
+            metric.rows = 100
+        with self.assertRaises(ValueError):
+            with metrics.stage('load', site_code='B'):
+                raise ValueError('disk full')
+        self.assertEqual(metrics.persist(self.db_path), 2)
+
+        with duckdb.connect(str(self.db_path)) as con:
+            row = con.execute(
+                f"SELECT stage_cd, parameter_cd, start_dt, end_dt, status_cd, error_tx"
+                f" FROM {RUN_METRICS_TABLE} WHERE site_cd = 'A'"
+            ).fetchone()
+        self.assertEqual(row, (
+            'extract', '00060,00065', dt.date(2020, 1, 1), dt.date(2020, 12, 31), 'ok', None
+        ))
+
+        ranked = site_throughput(self.db_path, run_ids=['run_1'])
+        self.assertEqual(set(ranked['site_cd']), {'A', 'B'})
+        self.assertEqual(ranked.set_index('site_cd')['failed_cnt'].to_dict(), {'A': 0, 'B': 1})
+        load = site_throughput(self.db_path, stage_cd='load')
+        self.assertEqual(load['site_cd'].tolist(), ['B'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+import time
+import unittest
+from src.etl.scheduler import FetchTask, RateLimiter, fetch_concurrently, get_rate_limiter
+from tests.stubs import LatencyStub
+
+
+def _tasks(n):
+    return [FetchTask(f"site{i:02d}", '00060', '2020-01-01', '2020-12-31') for i in range(n)]
+
+
+class FetchConcurrentlyTest(unittest.TestCase):
+
+    def _wall_time(self, max_workers, tasks, stub):
+        start = time.perf_counter()
+        results = list(fetch_concurrently(tasks, fetch_fn=stub, max_workers=max_workers))
+        return time.perf_counter() - start, results
+
+    def test_wall_time_scales_with_workers(self):
+        tasks = _tasks(8)
+        serial, _ = self._wall_time(1, tasks, LatencyStub(0.1))
+        stub = LatencyStub(0.1)
+        parallel, _ = self._wall_time(4, tasks, stub)
+        self.assertGreaterEqual(serial, 0.8)
+        self.assertLess(parallel, serial / 2.5)
+        self.assertEqual(stub.peak_in_flight, 4)
+
+    def test_results_in_submission_order(self):
+        tasks = _tasks(12)
+        # Early tasks are the slowest, so they finish last
+        stub = LatencyStub(latencies={task.site_code: 0.02 * (12 - i) for i, task in
+                                      enumerate(tasks)})
+        _, results = self._wall_time(4, tasks, stub)
+        self.assertEqual([task for task, _ in results], tasks)
+        self.assertEqual([df['site_no'].iloc[0] for _, df in results],
+                         [task.site_code for task in tasks])
+
+    def test_failed_fetch_yields_none(self):
+        def failing(**task_fields):
+            raise ValueError("bad request")
+
+        results = list(fetch_concurrently(_tasks(3), fetch_fn=failing, max_workers=2))
+        self.assertEqual([df for _, df in results], [None, None, None])
+
+    def test_consumer_stopping_early_cancels_pending(self):
+        stub = LatencyStub(0.05)
+        results = fetch_concurrently(_tasks(40), fetch_fn=stub, max_workers=2)
+        next(results)
+        results.close()
+        self.assertLessEqual(stub.calls, 6)
+
+
+class RateLimiterTest(unittest.TestCase):
+
+    def test_rate_is_enforced(self):
+        limiter = RateLimiter(rate=20, burst=1)
+        start = time.perf_counter()
+        for _ in range(6):
+            limiter.acquire()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.2)
+
+    def test_shared_limiter_takes_new_rate(self):
+        first = get_rate_limiter('test-host', 2.0)
+        second = get_rate_limiter('test-host', 5.0, burst=3)
+        self.assertIs(first, second)
+        self.assertEqual((second.rate, second.burst), (5.0, 3))
+
+
+if __name__ == '__main__':
+    unittest.main()
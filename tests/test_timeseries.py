@@ -0,0 +1,51 @@
+import tempfile
+import unittest
+from pathlib import Path
+import duckdb
+from benchmarks.synthetic import synthetic_iv_table
+from src.database.timeseries import read_timeseries
+from src.etl.loaders import DataLakeLoader
+
+
+class ReadTimeseriesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp.name) / 'lake'
+        self.table = synthetic_iv_table(['A'], ['00060', '00065'], 2020, 2021, 60)
+        DataLakeLoader(self.table, 'A', self.root, db_path=None)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_database_without_manifest_prunes_on_hive_keys(self):
+        db_path = Path(self.tmp.name) / 'no_manifest.duckdb'
+        duckdb.connect(str(db_path)).close()
+
+        table = read_timeseries('A', '00060', start='2021-01-01', datalake_root=self.root,
+                                db_path=db_path)
+        self.assertEqual(table.num_rows, 365 * 24)
+        self.assertEqual(set(table['parameter_cd'].to_pylist()), {'00060'})
+
+    def test_manifest_without_site_falls_back_to_hive_keys(self):
+        # The lake predates the manifest; the first load after it records only site B
+        db_path = Path(self.tmp.name) / 'partial.duckdb'
+        DataLakeLoader(synthetic_iv_table(['B'], ['00060'], 2021, 2021, 60), 'B', self.root,
+                       db_path=db_path)
+
+        with self.assertLogs(level='WARNING') as logs:
+            table = read_timeseries('A', datalake_root=self.root, db_path=db_path)
+        self.assertEqual(table.num_rows, self.table.num_rows)
+        self.assertIn('--rebuild-manifest', logs.output[0])
+
+        table = read_timeseries(['A', 'B'], '00060', start='2021-06-01', end='2021-06-02',
+                                datalake_root=self.root, db_path=db_path)
+        self.assertEqual(table.num_rows, 2 * 24)
+
+    def test_without_database(self):
+        table = read_timeseries('A', datalake_root=self.root, db_path=None)
+        self.assertEqual(table.num_rows, self.table.num_rows)
+
+
+if __name__ == '__main__':
+    unittest.main()